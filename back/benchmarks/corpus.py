@@ -0,0 +1,221 @@
+"""Corpus of capture files for the packet pipeline benchmark.
+
+Synthetic captures are generated with dpkt, one file per protocol
+(and one with all of them interleaved) for every size:
+ARP, STP, RSTP, ICMP, TCP, UDP, DHCP, VXLAN, GRE and IPIP.
+Recorded captures (mimishark test capture of the front-end and captures
+of real emulations copied into benchmarks/recorded) are added as is.
+"""
+
+import itertools
+import os
+import shutil
+import struct
+from typing import Callable, Iterator
+
+import dpkt
+
+from dissectors import VXLAN
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RECORDED_DIRS = [
+    os.path.join(BENCHMARKS_DIR, "recorded"),
+    os.path.join(BENCHMARKS_DIR, "..", "..", "front", "src", "static", "mimi_shark"),
+]
+
+MAC1 = b"\x02\x00\x00\x00\x00\x01"
+MAC2 = b"\x02\x00\x00\x00\x00\x02"
+STP_MAC = b"\x01\x80\xc2\x00\x00\x00"
+IP1 = bytes([10, 0, 0, 1])
+IP2 = bytes([10, 0, 0, 2])
+
+# Interval between packets in the capture (in seconds)
+PACKET_INTERVAL = 0.0005
+
+
+def _ip(p: int, data: dpkt.Packet, src: bytes = IP1, dst: bytes = IP2) -> dpkt.ip.IP:
+    ip = dpkt.ip.IP(src=src, dst=dst, p=p, ttl=64, data=data)
+    ip.len = len(ip)
+    return ip
+
+
+def _eth(data: dpkt.Packet, eth_type: int = dpkt.ethernet.ETH_TYPE_IP) -> bytes:
+    return bytes(dpkt.ethernet.Ethernet(src=MAC1, dst=MAC2, type=eth_type, data=data))
+
+
+def _icmp_packet(i: int) -> dpkt.ip.IP:
+    echo = dpkt.icmp.ICMP.Echo(id=1, seq=i & 0xFFFF, data=b"x" * 56)
+    return _ip(dpkt.ip.IP_PROTO_ICMP, dpkt.icmp.ICMP(type=8 - 8 * (i % 2), data=echo))
+
+
+def arp(i: int) -> bytes:
+    arp_pkt = dpkt.arp.ARP(
+        op=1 + i % 2, sha=MAC1, spa=IP1, tha=MAC2 if i % 2 else b"\x00" * 6, tpa=IP2
+    )
+    return _eth(arp_pkt, dpkt.ethernet.ETH_TYPE_ARP)
+
+
+def _bpdu(version: int, flags: int) -> bytes:
+    bpdu = struct.pack(
+        ">HBBB8sI8sHHHHH",
+        0,  # protocol id
+        version,
+        0x02 if version == 2 else 0x00,  # BPDU type
+        flags,
+        b"\x80\x00" + MAC1,  # root id
+        0,  # root path cost
+        b"\x80\x00" + MAC1,  # bridge id
+        0x8001,  # port id
+        0,  # message age
+        20 << 8,  # max age
+        2 << 8,  # hello time
+        15 << 8,  # forward delay
+    )
+
+    # RSTP BPDU has version 1 length field
+    if version == 2:
+        bpdu += b"\x00"
+
+    llc = b"\x42\x42\x03" + bpdu
+    return STP_MAC + MAC1 + struct.pack(">H", len(llc)) + llc
+
+
+def stp(i: int) -> bytes:
+    return _bpdu(0, i % 2)
+
+
+def rstp(i: int) -> bytes:
+    return _bpdu(2, 0x0C | (i % 4))
+
+
+def icmp(i: int) -> bytes:
+    return _eth(_icmp_packet(i))
+
+
+def tcp(i: int) -> bytes:
+    flags = (dpkt.tcp.TH_SYN, dpkt.tcp.TH_SYN | dpkt.tcp.TH_ACK, dpkt.tcp.TH_ACK)
+    segment = dpkt.tcp.TCP(
+        sport=40000, dport=80, seq=i, flags=flags[i % 3], data=b"y" * (i % 100)
+    )
+    return _eth(_ip(dpkt.ip.IP_PROTO_TCP, segment))
+
+
+def udp(i: int) -> bytes:
+    datagram = dpkt.udp.UDP(sport=40000, dport=5000, data=b"z" * 64)
+    datagram.ulen = len(datagram)
+    return _eth(_ip(dpkt.ip.IP_PROTO_UDP, datagram))
+
+
+def dhcp(i: int) -> bytes:
+    msg_types = (dpkt.dhcp.DHCPDISCOVER, dpkt.dhcp.DHCPOFFER)
+    msg = dpkt.dhcp.DHCP(
+        chaddr=MAC1,
+        yiaddr=0x0A000002,
+        opts=(
+            (dpkt.dhcp.DHCP_OPT_MSGTYPE, bytes([msg_types[i % 2]])),
+            (dpkt.dhcp.DHCP_OPT_NETMASK, b"\xff\xff\xff\x00"),
+        ),
+    )
+    datagram = dpkt.udp.UDP(sport=68, dport=67, data=msg)
+    datagram.ulen = len(datagram)
+    return _eth(_ip(dpkt.ip.IP_PROTO_UDP, datagram, b"\x00" * 4, b"\xff" * 4))
+
+
+def vxlan(i: int) -> bytes:
+    inner = dpkt.ethernet.Ethernet(src=MAC1, dst=MAC2, data=_icmp_packet(i))
+    header = VXLAN(flags=0x08)
+    header.vni = 100
+    datagram = dpkt.udp.UDP(sport=50000, dport=4789, data=bytes(header) + bytes(inner))
+    datagram.ulen = len(datagram)
+    return _eth(_ip(dpkt.ip.IP_PROTO_UDP, datagram))
+
+
+def gre(i: int) -> bytes:
+    tunnel = dpkt.gre.GRE(p=dpkt.ethernet.ETH_TYPE_IP, data=_icmp_packet(i))
+    return _eth(_ip(dpkt.ip.IP_PROTO_GRE, tunnel))
+
+
+def ipip(i: int) -> bytes:
+    return _eth(_ip(dpkt.ip.IP_PROTO_IP, _icmp_packet(i)))
+
+
+PROTOCOLS: dict[str, Callable[[int], bytes]] = {
+    "arp": arp,
+    "stp": stp,
+    "rstp": rstp,
+    "icmp": icmp,
+    "tcp": tcp,
+    "udp": udp,
+    "dhcp": dhcp,
+    "vxlan": vxlan,
+    "gre": gre,
+    "ipip": ipip,
+}
+
+
+def _mixed(i: int) -> bytes:
+    generators = list(PROTOCOLS.values())
+    return generators[i % len(generators)](i // len(generators))
+
+
+def _records(make: Callable[[int], bytes], count: int) -> Iterator[tuple[float, bytes]]:
+    # Same packets repeat, build every one of them once
+    cache = [make(i) for i in range(min(count, 120))]
+    start = 1700000000.0
+
+    for i, buf in zip(range(count), itertools.cycle(cache)):
+        yield start + i * PACKET_INTERVAL, buf
+
+
+def write_pcap(path: str, records: Iterator[tuple[float, bytes]]) -> None:
+    with open(path, "wb") as file:
+        writer = dpkt.pcap.Writer(file)
+
+        for ts, buf in records:
+            writer.writepkt(buf, ts)
+
+
+def build_corpus(directory: str, sizes: list[int]) -> dict[str, list[str]]:
+    """Write capture files of the corpus (existing files are reused).
+
+    Args:
+        directory (str): Directory for the corpus.
+        sizes (list[int]): Number of packets in synthetic captures.
+
+    Returns:
+        dict: Group of captures ("<size>" or "recorded") -> list of paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus: dict[str, list[str]] = {}
+
+    for size in sizes:
+        paths = []
+        generators = dict(PROTOCOLS, mixed=_mixed)
+
+        for name, make in generators.items():
+            path = os.path.join(directory, f"{name}_{size}.pcap")
+
+            if not os.path.exists(path):
+                write_pcap(path, _records(make, size))
+
+            paths.append(path)
+
+        corpus[str(size)] = paths
+
+    recorded = []
+
+    for recorded_dir in RECORDED_DIRS:
+        if not os.path.isdir(recorded_dir):
+            continue
+
+        for f in sorted(os.listdir(recorded_dir)):
+            # Capture tool writes pcap format into *.pcapng files
+            if f.endswith((".pcap", ".pcapng")):
+                path = os.path.join(directory, f"recorded_{f}")
+                shutil.copyfile(os.path.join(recorded_dir, f), path)
+                recorded.append(path)
+
+    if recorded:
+        corpus["recorded"] = recorded
+
+    return corpus
@@ -0,0 +1,223 @@
+"""End-to-end benchmark of the emulation (requires root and Mininet, as tests do).
+
+Every network of back/tests/test_json (and of user supplied directories)
+is emulated by tasks.run_miminet several times. For every run the report has
+wall time, time of the emulation phases (see timings.py), size of captures,
+number of retries and status.
+
+The report gives capacity of the worker host: emulations per hour
+of the whole set when emulations are executed one by one.
+
+Usage (from back/benchmarks, as root):
+    python emulation.py [--repeat 3] [--dir my_networks] [--filter vlan]
+        [--output report.json] [--baseline old_report.json] [--tolerance 0.2]
+
+Exit code is 1 if some network (or the whole set) is slower than the baseline
+by more than tolerance, or if it fails more often than in the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+from tasks import run_miminet  # noqa: E402
+from timings import start_timings  # noqa: E402
+
+TEST_JSON_DIR = os.path.join(BENCHMARKS_DIR, "..", "tests", "test_json")
+NETWORK_FILE_SUFFIX = "_network.json"
+ANSWER_FILE_SUFFIX = "_answer.json"
+
+
+def load_networks(directories: list[str], pattern: str = "") -> dict[str, str]:
+    """Read networks of the benchmark.
+
+    Network files of test_json end with "_network.json",
+    in user directories every *.json file except answers is a network.
+
+    Returns:
+        dict: Network name -> network JSON.
+    """
+    networks = {}
+
+    for directory in [TEST_JSON_DIR, *directories]:
+        is_test_dir = os.path.samefile(directory, TEST_JSON_DIR)
+
+        for f in sorted(os.listdir(directory)):
+            if is_test_dir and not f.endswith(NETWORK_FILE_SUFFIX):
+                continue
+
+            if not f.endswith(".json") or f.endswith(ANSWER_FILE_SUFFIX):
+                continue
+
+            name = f.removesuffix(NETWORK_FILE_SUFFIX).removesuffix(".json")
+
+            if is_test_dir:
+                name = f"test_json/{name}"
+            else:
+                name = f"{os.path.basename(os.path.normpath(directory))}/{name}"
+
+            if pattern not in name:
+                continue
+
+            with open(os.path.join(directory, f), "r") as file:
+                networks[name] = file.read()
+
+    return networks
+
+
+def run_once(network_json: str) -> dict:
+    """Emulate the network and describe the run."""
+    timings = start_timings()
+    start = time.monotonic()
+    _, pcaps, status = run_miminet(network_json)
+    seconds = time.monotonic() - start
+
+    phases = {name: round(s, 4) for name, (s, _) in timings.totals().items()}
+    _, attempts = timings.totals().get("attempt", (0.0, 0))
+
+    return {
+        "seconds": round(seconds, 4),
+        "phases": phases,
+        "capture_bytes": sum(len(pcap) for pcap, _ in pcaps),
+        "captures": len(pcaps),
+        "retries": max(attempts - 1, 0),
+        "status": status,
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    phase_names = sorted({name for r in runs for name in r["phases"]})
+
+    return {
+        "median_seconds": round(statistics.median(r["seconds"] for r in runs), 4),
+        "max_seconds": max(r["seconds"] for r in runs),
+        "phases": {
+            name: round(statistics.median(r["phases"].get(name, 0.0) for r in runs), 4)
+            for name in phase_names
+        },
+        "capture_bytes": max(r["capture_bytes"] for r in runs),
+        "retries": sum(r["retries"] for r in runs),
+        "failures": sum(r["status"] != "ok" for r in runs),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Get descriptions of networks that became slower or less reliable."""
+    regressions = []
+
+    for name, network in report["networks"].items():
+        base = baseline.get("networks", {}).get(name)
+
+        if not base:
+            continue
+
+        summary, base_summary = network["summary"], base["summary"]
+        ratio = summary["median_seconds"] / base_summary["median_seconds"]
+
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {summary['median_seconds']}s, "
+                f"baseline {base_summary['median_seconds']}s (x{ratio:.2f})"
+            )
+
+        failure_rate = summary["failures"] / len(network["runs"])
+        base_failure_rate = base_summary["failures"] / len(base["runs"])
+
+        if failure_rate > base_failure_rate:
+            regressions.append(
+                f"{name}: {summary['failures']} of {len(network['runs'])} runs failed, "
+                f"baseline {base_summary['failures']} of {len(base['runs'])}"
+            )
+
+    capacity = report["total"]["emulations_per_hour"]
+    base_capacity = baseline.get("total", {}).get("emulations_per_hour")
+
+    if base_capacity and capacity < base_capacity * (1 - tolerance):
+        regressions.append(
+            f"capacity: {capacity} emulations/hour, baseline {base_capacity}"
+        )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--dir",
+        action="append",
+        default=[],
+        help="Additional directory with networks (can be repeated).",
+    )
+    parser.add_argument("--filter", default="", help="Run only matching networks.")
+    parser.add_argument("--output", help="Save report to this file.")
+    parser.add_argument("--baseline", help="Compare results with this report.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    networks = load_networks(args.dir, args.filter)
+
+    if not networks:
+        sys.exit("No networks found")
+
+    report: dict = {
+        "host": platform.node(),
+        "cpus": os.cpu_count(),
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "networks": {},
+    }
+
+    for name, network_json in networks.items():
+        runs = [run_once(network_json) for _ in range(args.repeat)]
+        report["networks"][name] = {"runs": runs, "summary": summarize(runs)}
+
+    medians = [n["summary"]["median_seconds"] for n in report["networks"].values()]
+    total_seconds = sum(medians)
+    report["total"] = {
+        "seconds": round(total_seconds, 4),
+        "emulations_per_hour": round(3600 * len(medians) / total_seconds, 1),
+    }
+
+    print(
+        f"{'network':<45} {'median s':>9} {'max s':>7} {'MB':>6} {'retry':>5} {'fail':>4}"
+    )
+
+    for name, network in report["networks"].items():
+        s = network["summary"]
+        print(
+            f"{name:<45} {s['median_seconds']:>9.2f} {s['max_seconds']:>7.2f} "
+            f"{s['capture_bytes'] / 1024 / 1024:>6.2f} {s['retries']:>5} "
+            f"{s['failures']:>4}"
+        )
+
+    print(
+        f"total {report['total']['seconds']:.2f}s, "
+        f"{report['total']['emulations_per_hour']} emulations/hour"
+    )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+
+        for r in regressions:
+            print("REGRESSION", r)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark of the packet pipeline without root and Mininet.
+
+Runs the stages of emulator.create_animation and group_packets_by_time
+on the capture corpus (see corpus.py):
+    parse - pkt_parser.parse_capture of every capture and sort by time;
+    merge - k-way merge of parsed captures;
+    group - grouping of packets into animation frames.
+
+Reports packets per second (best of several runs) and peak memory of every stage,
+results can be saved as a baseline and compared with it later.
+
+Usage (from back/benchmarks):
+    python pipeline.py [--sizes 1000,10000] [--repeat 3]
+        [--save-baseline baseline.json] [--baseline baseline.json] [--tolerance 0.15]
+
+Exit code is 1 if throughput of some stage is lower than the baseline by more than tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from corpus import build_corpus  # noqa: E402
+from pkt_parser import (  # noqa: E402
+    group_packets_by_time,
+    merge_captures,
+    packet_time,
+    parse_capture,
+)
+
+STAGES = ("parse", "merge", "group")
+
+
+def parse_stage(paths: list[str]) -> list[list[dict]]:
+    captures = []
+
+    for i, path in enumerate(paths):
+        packets, _ = parse_capture(path, f"edge_{i}", f"node_{i}", f"node_{i + 1}")
+        packets.sort(key=packet_time)
+        captures.append(packets)
+
+    return captures
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run_group(paths: list[str], repeat: int) -> dict[str, dict]:
+    """Measure all stages on the group of captures."""
+    captures = parse_stage(paths)
+    animation = merge_captures(captures)
+    packets_count = len(animation)
+
+    stages: dict[str, Callable[[], object]] = {
+        "parse": lambda: parse_stage(paths),
+        "merge": lambda: merge_captures(captures),
+        "group": lambda: group_packets_by_time(animation, presorted=True),
+    }
+
+    result = {}
+
+    for name in STAGES:
+        seconds = _best_time(stages[name], repeat)
+        result[name] = {
+            "packets": packets_count,
+            "seconds": round(seconds, 6),
+            "packets_per_second": round(packets_count / seconds) if seconds else 0,
+            "peak_memory_bytes": _peak_memory(stages[name]),
+        }
+
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Get descriptions of stages that became slower than the baseline."""
+    regressions = []
+
+    for group, stages in results.items():
+        for stage, measure in stages.items():
+            base = baseline.get(group, {}).get(stage)
+
+            if not base:
+                continue
+
+            ratio = measure["packets_per_second"] / base["packets_per_second"]
+
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    f"{group}/{stage}: {measure['packets_per_second']} pkt/s, "
+                    f"baseline {base['packets_per_second']} pkt/s (x{ratio:.2f})"
+                )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--corpus",
+        default=os.path.join(tempfile.gettempdir(), "miminet-pipeline-corpus"),
+        help="Directory for generated captures (reused between runs).",
+    )
+    parser.add_argument("--baseline", help="Compare results with this baseline.")
+    parser.add_argument("--save-baseline", help="Save results as a baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    corpus = build_corpus(args.corpus, sizes)
+    results = {}
+
+    print(f"{'group':>10} {'stage':>6} {'packets':>9} {'pkt/s':>10} {'peak MB':>8}")
+
+    for group, paths in corpus.items():
+        results[group] = run_group(paths, args.repeat)
+
+        for stage, m in results[group].items():
+            print(
+                f"{group:>10} {stage:>6} {m['packets']:>9} "
+                f"{m['packets_per_second']:>10} "
+                f"{m['peak_memory_bytes'] / 1024 / 1024:>8.1f}"
+            )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+
+        for r in regressions:
+            print("REGRESSION", r)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
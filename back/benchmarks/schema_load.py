@@ -0,0 +1,147 @@
+"""Benchmark of the network loading: fast path against the marshmallow schema.
+
+Networks are the networks of back/tests/test_json and synthetic networks
+with the given number of hosts (every host has a ping job).
+Both paths load the same JSON string and their results are checked to be equal.
+
+Usage (from back/benchmarks):
+    python schema_load.py [--hosts 100,1000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+import network_loader  # noqa: E402
+from network_loader import filter_unknown_nodes, get_network_schema  # noqa: E402
+
+TEST_JSON_DIR = os.path.join(BENCHMARKS_DIR, "..", "tests", "test_json")
+
+
+def synthetic_network(hosts: int) -> str:
+    """Hosts connected to a chain of switches (8 hosts per switch)."""
+    nodes: list[dict] = []
+    edges: list[dict] = []
+    jobs: list[dict] = []
+    switches = (hosts + 7) // 8
+
+    for s in range(switches):
+        nodes.append(
+            {
+                "classes": ["l2_switch"],
+                "config": {"label": f"l2sw{s}", "stp": 1, "type": "l2_switch"},
+                "data": {"id": f"l2sw{s}", "label": f"l2sw{s}"},
+                "interface": [],
+                "position": {"x": 10.5 * s, "y": 0},
+            }
+        )
+
+    for h in range(hosts):
+        switch = nodes[h // 8]
+        edge_id = f"edge_h{h}"
+        ip = f"10.{h // 65536}.{h // 256 % 256}.{h % 256 + 1}"
+
+        nodes.append(
+            {
+                "classes": ["host"],
+                "config": {"label": f"host_{h}", "type": "host", "default_gw": ""},
+                "data": {"id": f"host_{h}", "label": f"host_{h}"},
+                "interface": [
+                    {"connect": edge_id, "id": f"iface_h{h}", "ip": ip, "netmask": 8}
+                ],
+                "position": {"x": 10.5 * h, "y": 100.25},
+            }
+        )
+        switch["interface"].append(
+            {"connect": edge_id, "id": f"l2sw_h{h}", "name": f"l2sw_h{h}"}
+        )
+        edges.append(
+            {
+                "data": {
+                    "id": edge_id,
+                    "source": f"host_{h}",
+                    "target": switch["data"]["id"],
+                    "loss_percentage": 0,
+                }
+            }
+        )
+        jobs.append(
+            {
+                "id": f"job{h}",
+                "level": 0,
+                "job_id": 1,
+                "host_id": f"host_{h}",
+                "print_cmd": "ping -c 1 10.0.0.1",
+                "arg_1": "10.0.0.1",
+            }
+        )
+
+    return json.dumps(
+        {
+            "nodes": nodes,
+            "edges": edges,
+            "jobs": jobs,
+            "config": {"zoom": 1, "pan_x": 0, "pan_y": 0},
+            "pcap": [],
+        }
+    )
+
+
+def marshmallow_load(network_json: str):
+    data = filter_unknown_nodes(json.loads(network_json))
+    return get_network_schema().load(data, unknown="include")
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hosts", default="100,1000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    networks = {}
+
+    for f in sorted(os.listdir(TEST_JSON_DIR)):
+        if f.endswith("_network.json"):
+            with open(os.path.join(TEST_JSON_DIR, f), "r") as file:
+                networks[f.removesuffix("_network.json")] = file.read()
+
+    for hosts in [int(h) for h in args.hosts.split(",") if h]:
+        networks[f"synthetic_{hosts}_hosts"] = synthetic_network(hosts)
+
+    print(f"{'network':<35} {'marshmallow ms':>14} {'fast ms':>8} {'speedup':>8}")
+
+    for name, network_json in networks.items():
+        if marshmallow_load(network_json) != network_loader.load_network(network_json):
+            sys.exit(f"{name}: fast path result differs from marshmallow")
+
+        slow = _best_time(lambda: marshmallow_load(network_json), args.repeat)
+        fast = _best_time(
+            lambda: network_loader.load_network(network_json), args.repeat
+        )
+
+        print(
+            f"{name:<35} {slow * 1000:>14.3f} {fast * 1000:>8.3f} {slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Shared storage for capture files.
+
+Pcaps can be large, so instead of sending them inside the result message
+the worker uploads them (gzip compressed) to the blob store
+and sends only references. Front-end fetches them when they are needed.
+
+Store is selected by `blob_store` environment variable:
+    "" (default) - disabled, pcaps are sent inside the message;
+    "local" - directory `blob_store_dir` shared with front-end (e.g. NFS);
+    "s3" - S3-compatible storage (bucket `blob_store_bucket`,
+        endpoint `blob_store_endpoint`, credentials from standard AWS variables).
+
+Local store removes blobs older than `blob_store_ttl_hours` itself.
+S3 objects don't expire, the bucket needs a lifecycle rule with the same TTL:
+    aws s3api put-bucket-lifecycle-configuration --bucket miminet-pcaps \\
+        --lifecycle-configuration '{"Rules": [{"ID": "expire-pcaps",
+        "Status": "Enabled", "Filter": {}, "Expiration": {"Days": 7}}]}'
+(or `mc ilm rule add --expire-days 7 <alias>/miminet-pcaps` for MinIO).
+"""
+
+import gzip
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+from mininet.log import error
+
+load_dotenv()
+
+BLOB_STORE = os.getenv("blob_store", "")
+BLOB_STORE_DIR = os.getenv("blob_store_dir", "/var/lib/miminet/blobs")
+BLOB_STORE_BUCKET = os.getenv("blob_store_bucket", "miminet-pcaps")
+BLOB_STORE_ENDPOINT = os.getenv("blob_store_endpoint") or None
+# Local blobs older than this are removed (use lifecycle rules for S3)
+BLOB_STORE_TTL = int(os.getenv("blob_store_ttl_hours", "168")) * 3600
+
+# How often local store looks for expired blobs (in seconds)
+CLEANUP_INTERVAL = 3600
+
+
+class LocalBlobStore:
+    """Blobs are files in the shared directory."""
+
+    name = "local"
+
+    def __init__(self, root: str, ttl: int):
+        self.__root = root
+        self.__ttl = ttl
+        self.__last_cleanup = 0.0
+
+    def put(self, key: str, data: bytes) -> None:
+        path = os.path.join(self.__root, key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Front-end shouldn't see partially written blobs
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.rename(tmp_path, path)
+
+        self.__cleanup()
+
+    def __cleanup(self) -> None:
+        now = time.time()
+
+        if now - self.__last_cleanup < CLEANUP_INTERVAL:
+            return
+
+        self.__last_cleanup = now
+
+        for root, _, files in os.walk(self.__root):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    if now - os.path.getmtime(path) > self.__ttl:
+                        os.remove(path)
+                except OSError:
+                    continue
+
+
+class S3BlobStore:
+    """Blobs are objects in the S3-compatible bucket."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint: str | None):
+        # boto3 is needed only for this store
+        import boto3
+
+        self.__bucket = bucket
+        self.__client = boto3.client("s3", endpoint_url=endpoint)
+
+    def put(self, key: str, data: bytes) -> None:
+        self.__client.put_object(Bucket=self.__bucket, Key=key, Body=data)
+
+
+_blob_store: LocalBlobStore | S3BlobStore | None = None
+
+
+def get_blob_store() -> LocalBlobStore | S3BlobStore | None:
+    """Get configured blob store (None if pcaps should be sent inside the message)."""
+    global _blob_store
+
+    if _blob_store is None:
+        if BLOB_STORE == "local":
+            _blob_store = LocalBlobStore(BLOB_STORE_DIR, BLOB_STORE_TTL)
+        elif BLOB_STORE == "s3":
+            _blob_store = S3BlobStore(BLOB_STORE_BUCKET, BLOB_STORE_ENDPOINT)
+
+    return _blob_store
+
+
+def upload_pcaps(pcaps: list, prefix: str) -> list:
+    """Replace pcap contents with references to the uploaded blobs.
+
+    Args:
+        pcaps (list): List of (pcap bytes, interface name).
+        prefix (str): Unique prefix of blob keys (e.g. task id).
+
+    Returns:
+        list: List of (reference, interface name), reference is a dict with
+        store name, blob key, encoding and original size.
+        Pcaps are returned as is if blob store is disabled or unavailable.
+    """
+    store = get_blob_store()
+
+    if store is None:
+        return pcaps
+
+    result = []
+
+    try:
+        for data, name in pcaps:
+            key = f"{prefix}/{name}.pcap.gz"
+            store.put(key, gzip.compress(data, compresslevel=6))
+            result.append(
+                (
+                    {
+                        "store": store.name,
+                        "key": key,
+                        "encoding": "gzip",
+                        "size": len(data),
+                    },
+                    name,
+                )
+            )
+    except Exception as e:
+        # Better to send big message than lose the captures
+        error(f"[blob_store] Can't upload pcaps: {e}\n")
+        return pcaps
+
+    return result
@@ -0,0 +1,434 @@
+"""Dissectors of captured frames into animation labels and packet metadata.
+
+Frame is decoded by dpkt once, then its layers are dispatched
+to the dissectors registered for them:
+    Ethernet payload - by dpkt layer class (dpkt resolves ethertype
+        behind VLAN tags, 802.3 frames with LLC have no ethertype at all);
+    IP payload - by IP protocol number;
+    UDP payload - by destination port, then by source port.
+
+New protocol is a function registered with a decorator, e.g.:
+
+    @udp_port(5060)
+    def sip(udp) -> Dissection:
+        return "SIP " + str(udp.sport) + " > " + str(udp.dport), {"proto": "sip"}
+
+Dissector returns the label and the metadata of the packet,
+or None if the packet isn't shown in the animation.
+Ethernet dissectors return the whole label, IP and UDP dissectors
+return the protocol part (addresses are added by the IP dissector).
+
+Metadata is a dict of structured fields for the task checkers:
+    proto - Protocol of the packet;
+    src, dst - IP addresses (sender and target addresses for ARP);
+    sport, dport - ports of TCP and UDP;
+    icmp_type, icmp_code, tcp_flags, arp_op, dhcp_type, stp_flags, ip_proto;
+    tunnel - Tunnel of the packet (VXLAN, GRE or IPIP);
+    inner_src, inner_dst - IP addresses of the encapsulated packet;
+    vni - VXLAN network identifier.
+Only fields known for the packet are present.
+
+Labels and metadata are memoized by the header fields they are made of,
+captures repeat the same few flows over and over. Memoized metadata dicts
+are shared between packets and must not be modified.
+"""
+
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable
+
+import dpkt
+from dpkt.utils import inet_to_str, mac_to_str
+
+VXLAN_PORT = 4789
+LABELS_CACHE_SIZE = 4096
+
+
+class Protocol(str, Enum):
+    """Protocol of the packet in the metadata."""
+
+    ARP = "arp"
+    STP = "stp"
+    RSTP = "rstp"
+    LLC = "llc"
+    IP = "ip"
+    ICMP = "icmp"
+    TCP = "tcp"
+    UDP = "udp"
+    DHCP = "dhcp"
+    GRE = "gre"
+    IPIP = "ipip"
+
+
+class Tunnel(str, Enum):
+    VXLAN = "vxlan"
+    GRE = "gre"
+    IPIP = "ipip"
+
+
+Dissection = tuple[str, dict] | None
+Dissector = Callable[[Any], Dissection]
+
+_ethernet_dissectors: dict[type, Dissector] = {}
+_ip_dissectors: dict[int, tuple[type, Dissector]] = {}
+_udp_dissectors: dict[int, Dissector] = {}
+
+
+def ethernet_layer(layer: type) -> Callable[[Dissector], Dissector]:
+    """Register dissector of Ethernet payload decoded by dpkt as `layer`."""
+
+    def register(dissector: Dissector) -> Dissector:
+        _ethernet_dissectors[layer] = dissector
+        return dissector
+
+    return register
+
+
+def ip_protocol(*protocols: int, layer: type) -> Callable[[Dissector], Dissector]:
+    """Register dissector of IP payload (called only if dpkt decoded it as `layer`)."""
+
+    def register(dissector: Dissector) -> Dissector:
+        for protocol in protocols:
+            _ip_dissectors[protocol] = (layer, dissector)
+        return dissector
+
+    return register
+
+
+def udp_port(*ports: int) -> Callable[[Dissector], Dissector]:
+    """Register dissector of UDP datagrams sent to or from the ports."""
+
+    def register(dissector: Dissector) -> Dissector:
+        for port in ports:
+            _udp_dissectors[port] = dissector
+        return dissector
+
+    return register
+
+
+def dissect(buf: bytes) -> Dissection:
+    """Get animation label and metadata of the Ethernet frame.
+
+    Returns:
+        tuple: Label and metadata, None if the frame isn't shown.
+    """
+    try:
+        eth = dpkt.ethernet.Ethernet(buf)
+    except dpkt.UnpackError:
+        return None
+
+    dissector = _ethernet_dissectors.get(type(eth.data))
+
+    if dissector is None:
+        return None
+
+    return dissector(eth.data)
+
+
+def int_to_ip(ip_int: int | None) -> str:
+    if ip_int is not None:
+        octet1 = (ip_int >> 24) & 0xFF
+        octet2 = (ip_int >> 16) & 0xFF
+        octet3 = (ip_int >> 8) & 0xFF
+        octet4 = (ip_int >> 0) & 0xFF
+
+        return f"{octet1}.{octet2}.{octet3}.{octet4}"
+    else:
+        return ""
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _addresses(src: bytes, dst: bytes) -> tuple[str, str, str]:
+    """Addresses as strings and the address part of the label."""
+    src_str, dst_str = inet_to_str(src), inet_to_str(dst)
+    return src_str, dst_str, "\n" + src_str + " > " + dst_str
+
+
+def _inner_addresses(pkt: Any) -> dict:
+    if not isinstance(pkt, dpkt.ip.IP):
+        return {}
+
+    src, dst, _ = _addresses(pkt.src, pkt.dst)
+    return {"inner_src": src, "inner_dst": dst}
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _arp(op: int, spa: bytes, tpa: bytes, sha: bytes) -> tuple[str, dict]:
+    meta = {
+        "proto": Protocol.ARP,
+        "arp_op": op,
+        "src": inet_to_str(spa),
+        "dst": inet_to_str(tpa),
+    }
+
+    match op:
+        case 1:
+            label = "ARP-request\nWho has " + meta["dst"] + "? Tell " + meta["src"]
+        case 2:
+            label = "ARP-response\n" + meta["src"] + " at " + mac_to_str(sha)
+        case _:
+            label = "ARP packet"
+
+    return label, meta
+
+
+@ethernet_layer(dpkt.arp.ARP)
+def arp(pkt: dpkt.arp.ARP) -> Dissection:
+    return _arp(pkt.op, pkt.spa, pkt.tpa, pkt.sha)
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _stp(version: int, flags: int) -> tuple[str, dict]:
+    if version == 0x02:
+        meta = {"proto": Protocol.RSTP, "stp_flags": flags}
+
+        match flags & 0x03:
+            case 0:
+                return "RSTP (Unknown)", meta
+            case 1:
+                return "RSTP (Alternate/Backup)", meta
+            case 2:
+                return "RSTP (Root)", meta
+            case _:
+                return "RSTP (Designated)", meta
+
+    meta = {"proto": Protocol.STP, "stp_flags": flags}
+
+    match flags:
+        case 0:
+            return "STP (Root)", meta
+        case 1:
+            return "STP (TC + Root)", meta
+        case _:
+            return "STP", meta
+
+
+_LLC = ("LLC", {"proto": Protocol.LLC})
+
+
+@ethernet_layer(dpkt.llc.LLC)
+def llc(pkt: dpkt.llc.LLC) -> Dissection:
+    # dpkt decodes BPDU of STP SAP, and fails the whole frame if it can't
+    if pkt.dsap == 0x42 and isinstance(pkt.data, dpkt.stp.STP):
+        return _stp(pkt.data.v, pkt.data.flags)
+
+    return _LLC
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _ip_packet(p: int) -> tuple[str, dict]:
+    return "IP packet", {"proto": Protocol.IP, "ip_proto": p}
+
+
+@ethernet_layer(dpkt.ip.IP)
+def ip(pkt: dpkt.ip.IP) -> Dissection:
+    registered = _ip_dissectors.get(pkt.p)
+
+    # Payload is left undecoded for fragments and malformed packets
+    if registered is not None and isinstance(pkt.data, registered[0]):
+        dissection = registered[1](pkt.data)
+    else:
+        dissection = _ip_packet(pkt.p)
+
+    if dissection is None:
+        return None
+
+    label, meta = dissection
+    src, dst, addresses = _addresses(pkt.src, pkt.dst)
+
+    return label + addresses, {**meta, "src": src, "dst": dst}
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _icmp(icmp_type: int, code: int) -> tuple[str, dict]:
+    meta = {"proto": Protocol.ICMP, "icmp_type": icmp_type, "icmp_code": code}
+
+    match icmp_type, code:
+        case (8, _):
+            return "ICMP echo-request", meta
+        case (0, _):
+            return "ICMP echo-reply", meta
+        case (5, _):
+            return "ICMP redirect", meta
+        case (3, 0):
+            return "ICMP destination net unreachable", meta
+        case (3, 1):
+            return "ICMP destination host unreachable", meta
+        case (3, 3):
+            return "ICMP destination port unreachable", meta
+        case (3, _):
+            return "ICMP destination unreachable", meta
+        case (11, _):
+            return "ICMP time to live exceeded", meta
+        case _:
+            return "ICMP message", meta
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_ICMP, layer=dpkt.icmp.ICMP)
+def icmp(pkt: dpkt.icmp.ICMP) -> Dissection:
+    return _icmp(pkt.type, pkt.code)
+
+
+TCP_FLAGS = {
+    dpkt.tcp.TH_FIN: "FIN",
+    dpkt.tcp.TH_SYN: "SYN",
+    dpkt.tcp.TH_RST: "RST",
+    dpkt.tcp.TH_PUSH: "PUSH",
+    dpkt.tcp.TH_ACK: "ACK",
+    dpkt.tcp.TH_URG: "URG",
+}
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _tcp(flags: int, sport: int, dport: int) -> tuple[str, dict]:
+    flags_str = " + ".join(name for flag, name in TCP_FLAGS.items() if flag & flags)
+    label = "TCP (" + flags_str + ") " + str(sport) + " > " + str(dport)
+    meta = {"proto": Protocol.TCP, "sport": sport, "dport": dport, "tcp_flags": flags}
+
+    return label, meta
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_TCP, layer=dpkt.tcp.TCP)
+def tcp(pkt: dpkt.tcp.TCP) -> Dissection:
+    return _tcp(pkt.flags, pkt.sport, pkt.dport)
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def _udp(sport: int, dport: int) -> tuple[str, dict]:
+    label = "UDP " + str(sport) + " > " + str(dport)
+    return label, {"proto": Protocol.UDP, "sport": sport, "dport": dport}
+
+
+def udp_dissection(pkt: dpkt.udp.UDP) -> tuple[str, dict]:
+    """Label and metadata of UDP datagram without a known protocol."""
+    return _udp(pkt.sport, pkt.dport)
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_UDP, layer=dpkt.udp.UDP)
+def udp(pkt: dpkt.udp.UDP) -> Dissection:
+    dissector = _udp_dissectors.get(pkt.dport) or _udp_dissectors.get(pkt.sport)
+
+    if dissector is None:
+        return udp_dissection(pkt)
+
+    return dissector(pkt)
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_IP, dpkt.ip.IP_PROTO_IPIP, layer=dpkt.ip.IP)
+def ipip(pkt: dpkt.ip.IP) -> Dissection:
+    meta = {"proto": Protocol.IPIP, "tunnel": Tunnel.IPIP, **_inner_addresses(pkt)}
+    return "IPIP tunnel", meta
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_GRE, layer=dpkt.gre.GRE)
+def gre(pkt: dpkt.gre.GRE) -> Dissection:
+    meta = {"proto": Protocol.GRE, "tunnel": Tunnel.GRE, **_inner_addresses(pkt.data)}
+    return "GRE tunnel", meta
+
+
+@ip_protocol(dpkt.ip.IP_PROTO_IGMP, layer=dpkt.igmp.IGMP)
+def igmp(pkt: dpkt.igmp.IGMP) -> Dissection:
+    return None
+
+
+@udp_port(67, 68)
+def dhcp(pkt: dpkt.udp.UDP) -> Dissection:
+    try:
+        dh = dpkt.dhcp.DHCP(pkt.data)
+    # Short UDP payloads may fail with IndexError inside dpkt
+    except (dpkt.UnpackError, IndexError):
+        return udp_dissection(pkt)
+
+    opts = dict(dh.opts)
+    msg_type = int.from_bytes(opts.get(dpkt.dhcp.DHCP_OPT_MSGTYPE, b""), "big")
+    meta = {
+        "proto": Protocol.DHCP,
+        "sport": pkt.sport,
+        "dport": pkt.dport,
+        "dhcp_type": msg_type,
+    }
+
+    match msg_type:
+        case dpkt.dhcp.DHCPDISCOVER:
+            return "DHCP Discover", meta
+        case dpkt.dhcp.DHCPOFFER:
+            mask = bin(
+                int.from_bytes(opts.get(dpkt.dhcp.DHCP_OPT_NETMASK, b""), "big")
+            ).count("1")
+            return f"DHCP Offer {int_to_ip(dh.yiaddr)}/{mask}", meta
+        case dpkt.dhcp.DHCPREQUEST:
+            ip_int = int.from_bytes(opts.get(dpkt.dhcp.DHCP_OPT_REQ_IP, b""), "big")
+            return f"DHCP Request {int_to_ip(ip_int)}", meta
+        case dpkt.dhcp.DHCPDECLINE:
+            return "DHCP Decline", meta
+        case dpkt.dhcp.DHCPACK:
+            return "DHCP ACK", meta
+        case dpkt.dhcp.DHCPNAK:
+            return "DHCP NAK", meta
+        case dpkt.dhcp.DHCPRELEASE:
+            return "DHCP Release", meta
+        case dpkt.dhcp.DHCPINFORM:
+            return "DHCP Inform", meta
+
+    return udp_dissection(pkt)
+
+
+class VXLAN(dpkt.Packet):
+    """Virtual eXtensible Local Area Network.
+
+    Attributes:
+        __hdr__: Header fields of VXLAN.
+            flags: (int): 8 bits of flags
+            rsvd0: (int): 8 bits of reserved
+            rsvd1: (int): 16 bits of reserved
+            vnirsvd: (int): 24 bits of Virtual Network Identifier and 8 bits of reserved
+    """
+
+    __hdr__ = (
+        ("flags", "B", 0),  # 8 bits of flags
+        ("rsvd0", "B", 0),  # 8 bits of reserved
+        ("rsvd1", "H", 0),  # 16 bits of reserved
+        (
+            "vnirsvd",
+            "I",
+            0,
+        ),  # 24 bits of Virtual Network Identifier and 8 bits of reserved
+    )
+
+    @property
+    def vni(self):
+        return (self.vnirsvd >> 8) & 0xFFFFFF
+
+    @vni.setter
+    def vni(self, value):
+        self.vnirsvd = (value << 8) & 0xFFFFFF00
+
+
+@udp_port(VXLAN_PORT)
+def vxlan(pkt: dpkt.udp.UDP) -> Dissection:
+    # Only datagrams to VXLAN port are tunneled frames
+    if pkt.dport != VXLAN_PORT:
+        return udp_dissection(pkt)
+
+    try:
+        header = VXLAN(pkt.data)
+        inner = dpkt.ethernet.Ethernet(header.data).data
+    except dpkt.UnpackError:
+        return udp_dissection(pkt)
+
+    # Encapsulated IPv6 and IGMP are skipped as the outer ones
+    if isinstance(inner, dpkt.ip6.IP6):
+        return None
+
+    if isinstance(inner, dpkt.ip.IP) and isinstance(inner.data, dpkt.igmp.IGMP):
+        return None
+
+    label, meta = udp_dissection(pkt)
+    meta = {
+        **meta,
+        "tunnel": Tunnel.VXLAN,
+        "vni": header.vni,
+        **_inner_addresses(inner),
+    }
+
+    return label, meta
@@ -1,17 +1,38 @@
+import io
+import multiprocessing
 import os
 import os.path
-import subprocess
-import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import dpkt
 
+from dotenv import load_dotenv
 from ipmininet.ipnet import IPNet
+from job_scheduler import JobScheduler, job_tier
 from jobs import Jobs
 from network import MiminetNetwork
-from network_schema import Job, Network
-from pkt_parser import create_pkt_animation
-from mininet.log import setLogLevel, info, error
-from network_topology import MiminetTopology
+from network_schema import InvalidNetworkError, Job, Network
+from pkt_parser import (
+    group_packets_by_time,
+    merge_captures,
+    packet_time,
+    parse_capture,
+)
+from mininet.log import setLogLevel, error
+from network_topology import MiminetTopology, capture_path
+from timings import span
+from net_utils.cleanup import cleanup_network
+from net_utils.workdir import create_workdir, remove_workdir
+
+load_dotenv()
+
+# Log sizes and packet counts of every capture file (costs extra work per emulation)
+PCAP_DIAGNOSTICS = os.getenv("pcap_diagnostics", "0") == "1"
+# Map capture files into memory instead of reading them
+PCAP_MMAP = os.getenv("pcap_mmap", "0") == "1"
+# Number of processes parsing capture files (1 - parse in the worker itself)
+PARSE_WORKERS = int(os.getenv("parse_workers", "1"))
 
 
 def emulate(
@@ -32,30 +53,65 @@ def emulate(
     MAX_JOBS_COUNT = 30
     MAX_TIME_SLEEP = 60
     if len(network.jobs) > MAX_JOBS_COUNT:
-        raise ValueError(
+        raise InvalidNetworkError(
             f"Превышен лимит! В сети максимальное количество команд ({MAX_JOBS_COUNT}). "
             f"Текущее количество: {len(network.jobs)}"
         )
     sleep_jobs = [j for j in network.jobs if j.job_id == 7]
     total_time = sum(int(j.arg_1) for j in sleep_jobs)
     if total_time > 60 or total_time < 0:
-        raise ValueError(
+        raise InvalidNetworkError(
             f"Превышен лимит! В сети максимальное количество команд sleep {MAX_TIME_SLEEP})."
         )
 
     if len(network.jobs) == 0:
         return [], []
 
+    # Node configs and capture files of this emulation
+    workdir = create_workdir()
+
     try:
-        topo = MiminetTopology(network)
-        net = MiminetNetwork(topo, network)
+        topo = run_network(network, workdir)
 
-        net.start()
+        with span("capture_parse"):
+            animation, pcaps = create_animation(
+                topo.interfaces, workdir, topo.interface_names
+            )
+        error("[emulator] Animation groups before grouping: %d\n" % len(animation))
+        with span("grouping"):
+            animation = group_packets_by_time(animation, presorted=True)
+        error("[emulator] Animation groups after time-grouping: %d\n" % len(animation))
 
-        # Jobs with high ID have priority over low ones
-        ordered_jobs = sorted(
-            network.jobs, key=lambda job: job.job_id // 100, reverse=True
-        )
+    finally:
+        remove_workdir(workdir)
+
+    return animation, pcaps
+
+
+def run_network(network: Network, workdir: str) -> MiminetTopology:
+    """Start the network, execute its jobs and stop it.
+
+    Args:
+        network (Network): Network schema for emulation.
+        workdir (str): Working directory of the emulation.
+
+    Returns:
+        MiminetTopology: Topology of the stopped network (capture files are in workdir).
+    """
+    # Topology only describes the network, nothing is created yet
+    with span("topology_build"):
+        topo = MiminetTopology(network, workdir)
+
+    try:
+        with span("network_build"):
+            net = MiminetNetwork(topo, network)
+
+        with span("net_start"):
+            net.start()
+
+        # Jobs with high ID have priority over low ones. Jobs with the same
+        # priority run one by one unless job_concurrency allows several hosts at once
+        ordered_jobs = sorted(network.jobs, key=job_tier, reverse=True)
 
         error(
             "[emulator] Job execution order (%d jobs): %s\n"
@@ -68,98 +124,130 @@ def emulate(
             )
         )
 
-        for job in ordered_jobs:
-            info(
-                "[emulator] Executing job: host=%s job_id=%s cmd=%r args=(%r, %r, %r, %r, %r)\n"
-                % (
-                    job.host_id,
-                    job.job_id,
-                    job.print_cmd,
-                    job.arg_1,
-                    job.arg_2,
-                    job.arg_3,
-                    job.arg_4,
-                    job.arg_5,
-                )
-            )
-            t0 = time.monotonic()
-            execute_job(job, net)
-            elapsed = time.monotonic() - t0
-            info(
-                "[emulator] Finished job: host=%s job_id=%s elapsed=%.2fs\n"
-                % (job.host_id, job.job_id, elapsed)
-            )
+        with span("jobs"):
+            JobScheduler(net, execute_job).run(ordered_jobs)
 
-        # Log pcap file sizes AND actual paths used by mimidump before stop().
-        # mimidump writes to {intf.node.cwd}/capture_{intf.name}_out.pcapng —
-        # for hosts cwd may differ from /tmp (routers use /tmp, plain hosts may use /).
-        for link1, link2, edge_id, edge_source, edge_target, *_ in topo.interfaces:
-            for iface_name, node_name in [(link1, edge_source), (link2, edge_target)]:
-                node = net.get(node_name)
-                node_cwd = getattr(node, "cwd", "/tmp")
-                actual_path = f"{node_cwd}/capture_{iface_name}_out.pcapng"
-                expected_path = f"/tmp/capture_{iface_name}_out.pcapng"
-                actual_size = (
-                    os.path.getsize(actual_path) if os.path.exists(actual_path) else -1
-                )
-                expected_size = (
-                    os.path.getsize(expected_path)
-                    if os.path.exists(expected_path)
-                    else -1
-                )
-                error(
-                    "[emulator] pcap before stop: node=%s iface=%s "
-                    "node_cwd=%r actual_path=%s(%d bytes) expected_path=%s(%d bytes)\n"
-                    % (
-                        node_name,
-                        iface_name,
-                        node_cwd,
-                        actual_path,
-                        actual_size,
-                        expected_path,
-                        expected_size,
-                    )
-                )
+        if PCAP_DIAGNOSTICS:
+            log_capture_paths(topo, net)
 
         error("[emulator] calling net.stop()\n")
-        net.stop()
+        with span("net_stop"):
+            net.stop()
 
     except Exception as e:
         error(f"An error occurred during mininet configuration: {str(e)}")
-        subprocess.call("mn -c", shell=True)
+        with span("cleanup"):
+            cleanup_network(topo)
 
         raise e
 
-    animation, pcaps = create_animation(topo.interfaces)
-    # Log pcap sizes after stop to compare with pre-stop sizes
-    for link1, link2, *_ in topo.interfaces:
-        for fname in [
-            f"/tmp/capture_{link1}_out.pcapng",
-            f"/tmp/capture_{link2}_out.pcapng",
-        ]:
-            size = os.path.getsize(fname) if os.path.exists(fname) else -1
-            error("[emulator] pcap size after stop: %s = %d bytes\n" % (fname, size))
-    error("[emulator] Animation groups before grouping: %d\n" % len(animation))
-    animation = group_packets_by_time(animation)
-    error("[emulator] Animation groups after time-grouping: %d\n" % len(animation))
+    return topo
 
-    return animation, pcaps
+
+def log_capture_paths(topo: MiminetTopology, net: IPNet) -> None:
+    """Log pcap file sizes AND actual paths used by mimidump before stop().
+
+    mimidump writes to {intf.node.cwd}/capture_{intf.name}_out.pcapng —
+    nodes should have emulation workdir as cwd, this logs if some of them don't.
+    """
+    for link1, link2, edge_id, edge_source, edge_target, *_ in topo.interfaces:
+        for iface_name, node_name in [(link1, edge_source), (link2, edge_target)]:
+            node = net.get(node_name)
+            node_cwd = getattr(node, "cwd", "")
+            actual_path = f"{node_cwd}/capture_{iface_name}_out.pcapng"
+            expected_path = capture_path(topo.workdir, iface_name)
+            actual_size = (
+                os.path.getsize(actual_path) if os.path.exists(actual_path) else -1
+            )
+            expected_size = (
+                os.path.getsize(expected_path) if os.path.exists(expected_path) else -1
+            )
+            error(
+                "[emulator] pcap before stop: node=%s iface=%s "
+                "node_cwd=%r actual_path=%s(%d bytes) expected_path=%s(%d bytes)\n"
+                % (
+                    node_name,
+                    iface_name,
+                    node_cwd,
+                    actual_path,
+                    actual_size,
+                    expected_path,
+                    expected_size,
+                )
+            )
+
+
+def count_frames(data: bytes) -> tuple[int, int]:
+    """Count frames of in-memory capture as pcap and as pcapng (-1 if not parsed)."""
+    count_pcap = count_pcapng = -1
+
+    try:
+        count_pcap = sum(1 for _ in dpkt.pcap.Reader(io.BytesIO(data)))
+    except Exception:
+        pass
+
+    try:
+        count_pcapng = sum(1 for _ in dpkt.pcapng.Reader(io.BytesIO(data)))
+    except Exception:
+        pass
+
+    return count_pcap, count_pcapng
+
+
+def parse_captures(tasks: list[tuple]) -> list[tuple[list, int]]:
+    """Parse capture files, in parallel if PARSE_WORKERS > 1.
+
+    Args:
+        tasks (list[tuple]): Arguments of parse_capture for every file.
+
+    Returns:
+        list: Results of parse_capture in the same order as tasks.
+    """
+    workers = min(PARSE_WORKERS, len(tasks))
+
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                return list(pool.map(_parse_capture_task, tasks))
+        except (AssertionError, OSError, BrokenProcessPool) as e:
+            # E.g. daemonic celery worker processes can't have children
+            error(f"[create_animation] Parallel parsing is unavailable: {e}\n")
+
+    return [_parse_capture_task(task) for task in tasks]
+
+
+def _parse_capture_task(task: tuple) -> tuple[list, int]:
+    packets, frames = parse_capture(*task, use_mmap=PCAP_MMAP)
+
+    # Capture is written in time order, so this sort is linear
+    packets.sort(key=packet_time)
+
+    return packets, frames
 
 
 def create_animation(
     interfaces_info,
+    workdir: str = "/tmp",
+    interface_names: dict[str, str] | None = None,
 ) -> tuple[list[list] | list, list | list[tuple[bytes, str]]]:
     """Creates an animation using saved pcap files.
 
     Args:
         interfaces_info: Interface information stored in the topology.
+        workdir (str): Working directory of the emulation (with capture files).
+        interface_names (dict): Schema names of renamed interfaces
+            (pcaps are named after interfaces of the schema).
 
     Returns:
-        tuple: A tuple containing the animation list and a list of packet captures with their names.
+        tuple: A tuple containing the animation list (sorted by time)
+        and a list of packet captures with their names.
     """
 
     pcap_list = []
-    animation = []
+    tasks = []
+    names = interface_names or {}
 
     for (
         link1,
@@ -170,11 +258,8 @@ def create_animation(
         loss_percentage,
         duplicate_percentage,
     ) in interfaces_info:
-        pcap_out_file1 = "/tmp/capture_" + link1 + "_out.pcapng"
-        pcap_out_file2 = "/tmp/capture_" + link2 + "_out.pcapng"
-
-        pcap_file1 = "/tmp/capture_" + link1 + ".pcapng"
-        pcap_file2 = "/tmp/capture_" + link2 + ".pcapng"
+        pcap_out_file1 = capture_path(workdir, link1)
+        pcap_out_file2 = capture_path(workdir, link2)
 
         if not os.path.exists(pcap_out_file1):
             raise ValueError("No capture for interface: " + link1)
@@ -182,91 +267,70 @@ def create_animation(
         if not os.path.exists(pcap_out_file2):
             raise ValueError("No capture for interface: " + link2)
 
-        # Log pcap sizes and packet counts before parsing
-        for fname, iface, node_name, direction in [
-            (pcap_file1, link1, edge_source, "INOUT"),
-            (pcap_out_file1, link1, edge_source, "OUT"),
-            (pcap_file2, link2, edge_target, "INOUT"),
-            (pcap_out_file2, link2, edge_target, "OUT"),
-        ]:
-            if not os.path.exists(fname):
-                error(
-                    "[create_animation] pcap: node=%s iface=%s direction=%s MISSING\n"
-                    % (node_name, iface, direction)
-                )
-                continue
-            fsize = os.path.getsize(fname)
-            count_pcap = count_pcapng = -1
-            try:
-                with open(fname, "rb") as _f:
-                    count_pcap = sum(1 for _ in dpkt.pcap.Reader(_f))
-            except Exception:
-                pass
-            try:
-                with open(fname, "rb") as _f:
-                    count_pcapng = sum(1 for _ in dpkt.pcapng.Reader(_f))
-            except Exception:
-                pass
-            error(
-                "[create_animation] pcap: node=%s iface=%s direction=%s "
-                "file=%s size=%d pcap_count=%d pcapng_count=%d\n"
-                % (node_name, iface, direction, fname, fsize, count_pcap, count_pcapng)
+        # OUT files are parsed into animation
+        tasks.append(
+            (
+                pcap_out_file1,
+                edge_id,
+                edge_source,
+                edge_target,
+                loss_percentage,
+                duplicate_percentage,
+            )
+        )
+        tasks.append(
+            (
+                pcap_out_file2,
+                edge_id,
+                edge_target,
+                edge_source,
+                loss_percentage,
+                duplicate_percentage,
             )
-
-        with open(pcap_file1, "rb") as file1, open(pcap_file2, "rb") as file2:
-            pcap_list.append((file1.read(), link1))
-            pcap_list.append((file2.read(), link2))
-
-        packets = create_pkt_animation(
-            pcap_out_file1,
-            pcap_out_file2,
-            edge_id,
-            edge_source,
-            edge_target,
-            loss_percentage,
-            duplicate_percentage,
         )
 
-        animation += packets
-
-    return animation, pcap_list
-
-
-def group_packets_by_time(packets, time_slice_us: int = 14000):
-    """Group packets into animation frames by time intervals.
-
-    Args:
-        packets: List of packets.
-        time_slice_us (int): Time interval (in microseconds) to group packets.
+    results = parse_captures(tasks)
 
-    Returns:
-        list: Grouped animation frames.
-    """
-    if not packets:
-        return []
+    for i, (link1, link2, _, edge_source, edge_target, *_) in enumerate(
+        interfaces_info
+    ):
+        pcap_file1 = capture_path(workdir, link1, out=False)
+        pcap_file2 = capture_path(workdir, link2, out=False)
 
-    animation_packets = sorted(packets, key=lambda k: k.get("timestamp", 0))
+        # INOUT files are returned as is
+        with open(pcap_file1, "rb") as file1, open(pcap_file2, "rb") as file2:
+            pcap1 = file1.read()
+            pcap2 = file2.read()
 
-    grouped = []
-    current_group: list = []
-    first_packet_time = int(animation_packets[0]["timestamp"])
-    time_limit = first_packet_time + time_slice_us
+        pcap_list.append((pcap1, names.get(link1, link1)))
+        pcap_list.append((pcap2, names.get(link2, link2)))
 
-    for pkt in animation_packets:
-        pkt_time = int(pkt["timestamp"])
+        if PCAP_DIAGNOSTICS:
+            frames1 = results[2 * i][1]
+            frames2 = results[2 * i + 1][1]
 
-        if pkt_time > time_limit:
-            # Add packet to new group based on its time
-            grouped.append(current_group)
-            current_group = [pkt]
-            time_limit = pkt_time + time_slice_us
-        else:
-            current_group.append(pkt)
+            for iface, node_name, frames, pcap in [
+                (link1, edge_source, frames1, pcap1),
+                (link2, edge_target, frames2, pcap2),
+            ]:
+                count_pcap, count_pcapng = count_frames(pcap)
+                error(
+                    "[create_animation] pcap: node=%s iface=%s out_count=%d "
+                    "inout_size=%d inout_pcap_count=%d inout_pcapng_count=%d\n"
+                    % (
+                        node_name,
+                        iface,
+                        frames,
+                        len(pcap),
+                        count_pcap,
+                        count_pcapng,
+                    )
+                )
 
-    if current_group:
-        grouped.append(current_group)
+    # Every capture is sorted, k-way merge gives sorted animation
+    animation = merge_captures(packets for packets, _ in results)
 
-    return grouped
+    return animation, pcap_list
 
 
 def execute_job(job: Job, net: IPNet) -> None:
@@ -0,0 +1,189 @@
+"""Concurrent execution of network jobs.
+
+Jobs are executed in priority tiers (job_id // 100, high tiers first):
+servers (200+) are started before hosts are configured (100+),
+and traffic jobs (< 100) are executed in the configured network.
+
+Inside a tier jobs of different hosts are executed concurrently
+(every node has its own shell), jobs of the same host keep their order.
+Link down and sleep jobs change the state of the whole network,
+so they wait for all previous jobs and are executed alone.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Callable
+
+from dotenv import load_dotenv
+from ipmininet.ipnet import IPNet
+from mininet.log import error, info
+from network_schema import Job
+from timings import span
+
+load_dotenv()
+
+# Max number of hosts executing jobs at the same time (1 - jobs are executed one by one)
+JOB_CONCURRENCY = int(os.getenv("job_concurrency", "1"))
+# Job is interrupted (Ctrl+C in its node shell) if it takes longer (in seconds, 0 - never)
+JOB_TIMEOUT = float(os.getenv("job_timeout", "0"))
+
+LINK_DOWN_JOB = 6
+SLEEP_JOB = 7
+BARRIER_JOBS = (LINK_DOWN_JOB, SLEEP_JOB)
+
+
+def job_tier(job: Job) -> int:
+    return job.job_id // 100
+
+
+def split_stages(jobs: list[Job]) -> list[list[Job]]:
+    """Split jobs of the tier into stages separated by barrier jobs.
+
+    Every barrier job is a stage of its own.
+    """
+    stages: list[list[Job]] = []
+    stage: list[Job] = []
+
+    for job in jobs:
+        if job.job_id in BARRIER_JOBS:
+            if stage:
+                stages.append(stage)
+            stages.append([job])
+            stage = []
+        else:
+            stage.append(job)
+
+    if stage:
+        stages.append(stage)
+
+    return stages
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        net: IPNet,
+        execute: Callable[[Job, IPNet], None],
+        concurrency: int = JOB_CONCURRENCY,
+        timeout: float = JOB_TIMEOUT,
+    ):
+        """
+        Args:
+            net (IPNet): Started network.
+            execute (Callable): Function executing a single job.
+            concurrency (int): Max number of hosts executing jobs at the same time.
+            timeout (float): Time limit of a single job (in seconds, 0 - no limit).
+        """
+        self.__net = net
+        self.__execute = execute
+        self.__concurrency = max(concurrency, 1)
+        self.__timeout = timeout
+        # Jobs being executed by hosts, timeouts interrupt only their own job
+        self.__running: dict[str, Job] = {}
+        self.__running_lock = threading.Lock()
+
+    def run(self, jobs: list[Job]) -> float:
+        """Execute all jobs.
+
+        Returns:
+            float: Execution time (in seconds).
+        """
+        start = time.monotonic()
+        # Stable sort keeps the order of jobs inside the tier
+        ordered_jobs = sorted(jobs, key=job_tier, reverse=True)
+
+        for tier, tier_jobs in groupby(ordered_jobs, key=job_tier):
+            tier_start = time.monotonic()
+            tier_jobs_list = list(tier_jobs)
+
+            for stage in split_stages(tier_jobs_list):
+                self.__run_stage(stage)
+
+            info(
+                f"[jobs] tier {tier}: {len(tier_jobs_list)} jobs "
+                f"in {time.monotonic() - tier_start:.2f}s\n"
+            )
+
+        return time.monotonic() - start
+
+    def __run_stage(self, stage: list[Job]) -> None:
+        if self.__concurrency == 1 or len(stage) == 1:
+            self.__run_host_jobs(stage)
+            return
+
+        by_host: dict[str, list[Job]] = {}
+        for job in stage:
+            by_host.setdefault(job.host_id, []).append(job)
+
+        workers = min(self.__concurrency, len(by_host))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.__run_host_jobs, j) for j in by_host.values()]
+
+            # Re-raise exceptions of jobs
+            for future in futures:
+                future.result()
+
+    def __run_host_jobs(self, jobs: list[Job]) -> None:
+        for job in jobs:
+            self.__run_job(job)
+
+    def __run_job(self, job: Job) -> None:
+        info(
+            "[emulator] Executing job: host=%s job_id=%s cmd=%r args=(%r, %r, %r, %r, %r)\n"
+            % (
+                job.host_id,
+                job.job_id,
+                job.print_cmd,
+                job.arg_1,
+                job.arg_2,
+                job.arg_3,
+                job.arg_4,
+                job.arg_5,
+            )
+        )
+
+        timer = None
+
+        with self.__running_lock:
+            self.__running[job.host_id] = job
+
+        # Sleep is executed by the worker itself, it can't hang
+        if job.job_id != SLEEP_JOB and self.__timeout > 0:
+            timer = threading.Timer(self.__timeout, self.__interrupt, (job,))
+            timer.start()
+
+        t0 = time.monotonic()
+
+        try:
+            with span("job", job_id=job.job_id, host=job.host_id):
+                self.__execute(job, self.__net)
+        finally:
+            # Timer callback may be already started, it checks the running job
+            with self.__running_lock:
+                if timer is not None:
+                    timer.cancel()
+                del self.__running[job.host_id]
+
+        elapsed = time.monotonic() - t0
+        info(
+            "[emulator] Finished job: host=%s job_id=%s elapsed=%.2fs\n"
+            % (job.host_id, job.job_id, elapsed)
+        )
+
+    def __interrupt(self, job: Job) -> None:
+        with self.__running_lock:
+            # The job has finished, the host may execute the next one already
+            running = self.__running.get(job.host_id)
+
+            if running is None or running is not job:
+                return
+
+            error(
+                f"[jobs] job_id={job.job_id} on {job.host_id} "
+                f"takes longer than {self.__timeout}s, interrupting\n"
+            )
+            self.__net.get(job.host_id).sendInt()
@@ -1,4 +1,5 @@
 import ipaddress
+import os
 import re
 import shlex
 import time
@@ -394,8 +395,9 @@ def open_tcp_server_handler(job: Job, job_host: Any) -> None:
     if not valid_port(arg_port) or not valid_ip(arg_ip):
         return
 
+    log_file = os.path.join(job_host.cwd, f"tcpserver.{job_host.name}.{arg_port}")
     job_host.cmd(
-        f"nohup nc -k -d {arg_ip} -l {arg_port} > /tmp/tcpserver 2>&1 < /dev/null &"
+        f"nohup nc -k -d {arg_ip} -l {arg_port} > {log_file} 2>&1 < /dev/null &"
     )
 
 
@@ -407,8 +409,9 @@ def open_udp_server_handler(job: Job, job_host: Any) -> None:
     if not valid_ip(arg_ip) or not valid_port(arg_port):
         return
 
+    log_file = os.path.join(job_host.cwd, f"udpserver.{job_host.name}.{arg_port}")
     job_host.cmd(
-        f"nohup nc -d -u {arg_ip} -l {arg_port} > /tmp/udpserver 2>&1 < /dev/null &"
+        f"nohup nc -d -u {arg_ip} -l {arg_port} > {log_file} 2>&1 < /dev/null &"
     )
 
 
@@ -489,12 +492,15 @@ def dhcp_client(job: Job, job_host):
     info(f"[dhcp_client] host={job_host.name} iface={job.arg_1}")
     out_ifconfig = job_host.cmd(f"ifconfig {job.arg_1} 0")
     info(f"[dhcp_client] ifconfig {job.arg_1} 0 -> {out_ifconfig!r}")
-    out_rm = job_host.cmd("rm -f /var/lib/dhcp/dhclient.leases")
+    # Files of the client are in the emulation workdir, so concurrent
+    # emulations don't share leases and the files are removed with the workdir
+    prefix = os.path.join(job_host.cwd, f"dhclient.{job_host.name}")
+    out_rm = job_host.cmd(f"rm -f {prefix}.leases")
     info(f"[dhcp_client] rm leases -> {out_rm!r}")
-    job_host.cmd("echo 'initial-interval 6;' > /tmp/dhclient.conf")
+    job_host.cmd(f"echo 'initial-interval 6;' > {prefix}.conf")
     dhclient_cmd = (
-        f"timeout -k 1 5 dhclient -d -v -4 -cf /tmp/dhclient.conf {job.arg_1} && "
-        "ip route show && rm -f /tmp/dhclient.conf"
+        f"timeout -k 1 5 dhclient -d -v -4 -cf {prefix}.conf "
+        f"-lf {prefix}.leases -pf {prefix}.pid {job.arg_1} && ip route show"
     )
     info(f"[dhcp_client] running: {dhclient_cmd}")
     out = job_host.cmd(dhclient_cmd)
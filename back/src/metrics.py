@@ -0,0 +1,141 @@
+"""Prometheus (text exposition format) endpoint of the emulation worker.
+
+Celery runs emulations in forked pool processes, they can't share counters in memory.
+Every process dumps its totals into `metrics_dir` after each emulation,
+and HTTP server of the main worker process sums them up on every scrape.
+
+Endpoint is enabled by `metrics_port` environment variable (0 - disabled).
+"""
+
+import json
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+from mininet.log import error, info
+from timings import Timings
+
+load_dotenv()
+
+METRICS_PORT = int(os.getenv("metrics_port", "0"))
+METRICS_DIR = os.getenv("metrics_dir", "/tmp/miminet/metrics")
+
+# Totals of the current process
+_phases: dict[str, list[float]] = {}  # phase -> [seconds, count]
+_emulations: dict[str, int] = {}  # status -> count
+
+
+def record_emulation(timings: Timings, status: str) -> None:
+    """Add spans of the finished emulation to the metrics of the process."""
+    if METRICS_PORT <= 0:
+        return
+
+    for name, (seconds, count) in timings.totals().items():
+        totals = _phases.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += count
+
+    _emulations[status] = _emulations.get(status, 0) + 1
+
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+
+        with open(tmp_path, "w") as file:
+            json.dump({"phases": _phases, "emulations": _emulations}, file)
+        os.rename(tmp_path, path)
+    except OSError as e:
+        error(f"[metrics] Can't save metrics: {e}\n")
+
+
+def _collect() -> tuple[dict[str, list[float]], dict[str, int]]:
+    phases: dict[str, list[float]] = {}
+    emulations: dict[str, int] = {}
+
+    try:
+        files = [f for f in os.listdir(METRICS_DIR) if f.endswith(".json")]
+    except OSError:
+        files = []
+
+    for f in files:
+        try:
+            with open(os.path.join(METRICS_DIR, f), "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+
+        for name, (seconds, count) in data.get("phases", {}).items():
+            totals = phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += count
+
+        for status, count in data.get("emulations", {}).items():
+            emulations[status] = emulations.get(status, 0) + count
+
+    return phases, emulations
+
+
+def render_metrics() -> str:
+    phases, emulations = _collect()
+    lines = [
+        "# HELP miminet_phase_seconds Time spent in emulation phases.",
+        "# TYPE miminet_phase_seconds summary",
+    ]
+
+    for name, (seconds, count) in sorted(phases.items()):
+        lines.append(f'miminet_phase_seconds_sum{{phase="{name}"}} {seconds:.4f}')
+        lines.append(f'miminet_phase_seconds_count{{phase="{name}"}} {int(count)}')
+
+    lines.append("# HELP miminet_emulations_total Finished emulations.")
+    lines.append("# TYPE miminet_emulations_total counter")
+
+    for status, count in sorted(emulations.items()):
+        lines.append(f'miminet_emulations_total{{status="{status}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render_metrics().encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes shouldn't flood worker logs
+        pass
+
+
+def start_metrics_server() -> None:
+    """Start metrics endpoint in background thread (if enabled)."""
+    if METRICS_PORT <= 0:
+        return
+
+    # Counters of the previous worker run start from zero
+    if os.path.isdir(METRICS_DIR):
+        for f in os.listdir(METRICS_DIR):
+            try:
+                os.remove(os.path.join(METRICS_DIR, f))
+            except OSError:
+                continue
+
+    try:
+        server = ThreadingHTTPServer(("", METRICS_PORT), MetricsHandler)
+    except OSError as e:
+        error(f"[metrics] Can't start metrics server: {e}\n")
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    info(f"[metrics] Serving metrics on port {METRICS_PORT}\n")
@@ -0,0 +1,86 @@
+import time
+
+from mininet.log import info
+
+# Node shell reads commands from pseudo-tty line by line,
+# tty line can't be longer than 4095 characters
+MAX_LINE_LENGTH = 3000
+
+
+class CommandBatch:
+    """Shell commands grouped by node.
+
+    Instead of a round-trip through the node shell for every command,
+    all commands of a node are sent as one script,
+    and scripts of different nodes are executed concurrently.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Name of the configuration phase (used in logs).
+        """
+        self.__name = name
+        self.__commands: dict = {}  # node -> list of commands
+
+    def add(self, node, *commands: str) -> None:
+        """Add commands that should be executed on the node (in the given order)."""
+        self.__commands.setdefault(node, []).extend(commands)
+
+    def __len__(self) -> int:
+        return sum(len(cmds) for cmds in self.__commands.values())
+
+    @staticmethod
+    def __split_lines(commands: list[str]) -> list[str]:
+        lines = []
+        line = ""
+
+        for cmd in commands:
+            if line and len(line) + len(cmd) + 2 > MAX_LINE_LENGTH:
+                lines.append(line)
+                line = ""
+
+            line = f"{line}; {cmd}" if line else cmd
+
+        if line:
+            lines.append(line)
+
+        return lines
+
+    def run(self) -> float:
+        """Execute all commands and clear the batch.
+
+        Returns:
+            float: Execution time (in seconds).
+        """
+        start = time.monotonic()
+        commands_count = len(self)
+        scripts = {
+            node: self.__split_lines(cmds) for node, cmds in self.__commands.items()
+        }
+
+        step = 0
+        while True:
+            running = [node for node, lines in scripts.items() if step < len(lines)]
+
+            if not running:
+                break
+
+            # Nodes have their own shells, so they can work simultaneously
+            for node in running:
+                node.sendCmd(scripts[node][step])
+
+            for node in running:
+                node.waitOutput()
+
+            step += 1
+
+        self.__commands = {}
+        elapsed = time.monotonic() - start
+
+        info(
+            f"[batch] {self.__name}: {commands_count} commands "
+            f"on {len(scripts)} nodes in {elapsed:.3f}s\n"
+        )
+
+        return elapsed
@@ -0,0 +1,108 @@
+"""Cleanup after a failed emulation.
+
+`mn -c` removes every mininet object on the host (including ones of concurrent
+emulations) and takes seconds. Instead, only objects of the failed emulation are removed:
+    - processes started by this worker (node shells, daemons, capture tools),
+      network namespaces of hosts and routers disappear with their shells;
+    - devices of the topology's switches and hubs living in the root namespace
+      (with IFB devices of their direct links).
+"""
+
+import subprocess
+import time
+
+import psutil
+from mininet.log import error, info
+from shell_pool import get_shell_pool
+
+# Whole cleanup script shouldn't hang the worker
+CLEANUP_TIMEOUT = 10
+
+
+def _kill_children() -> int:
+    """Kill all processes started by the worker (except idle pooled shells)."""
+    pool = get_shell_pool()
+    spared = pool.pids() if pool is not None else set()
+    killed = []
+
+    for child in psutil.Process().children(recursive=True):
+        if child.pid in spared:
+            continue
+
+        try:
+            child.kill()
+            killed.append(child)
+        except psutil.NoSuchProcess:
+            continue
+
+    psutil.wait_procs(killed, timeout=1)
+
+    return len(killed)
+
+
+def _root_namespace_devices(topo) -> tuple[list[str], list[str]]:
+    """Get bridges and their ports created by the topology in the root namespace.
+
+    Args:
+        topo (MiminetTopology): Topology of the emulation.
+
+    Returns:
+        tuple: Bridge names and interface names.
+    """
+    switches = set(topo.switches())
+    bridges: list[str] = []
+    ports: list[str] = []
+
+    for switch in switches:
+        # VLAN setup creates additional bridge for every switch
+        bridges.extend((switch, f"br-{switch}"))
+
+    for node1, node2, link_info in topo.links(withInfo=True):
+        for node, intf_name, port in (
+            (node1, link_info.get("intfName1"), link_info.get("port1")),
+            (node2, link_info.get("intfName2"), link_info.get("port2")),
+        ):
+            if node in switches:
+                ports.append(intf_name or f"{node}-eth{port}")
+
+    ports.extend(ifb for _, ifb in topo.root_ingress_devices)
+
+    return bridges, ports
+
+
+def cleanup_network(topo) -> float:
+    """Remove everything that the emulation of the topology could leave behind.
+
+    Args:
+        topo (IPTopo): Topology of the failed emulation.
+
+    Returns:
+        float: Cleanup time (in seconds).
+    """
+    start = time.monotonic()
+    killed = _kill_children()
+    bridges, ports = _root_namespace_devices(topo)
+
+    commands = [f"ip link del {port}" for port in ports]
+
+    if bridges:
+        commands.append(
+            "ovs-vsctl " + " ".join(f"-- --if-exists del-br {br}" for br in bridges)
+        )
+        commands.extend(f"ip link del {br}" for br in bridges)
+
+    if commands:
+        script = "; ".join(f"{cmd} 2>/dev/null" for cmd in commands)
+
+        try:
+            subprocess.run(["sh", "-c", script], timeout=CLEANUP_TIMEOUT, check=False)
+        except subprocess.TimeoutExpired:
+            error("[cleanup] removing devices timed out\n")
+
+    elapsed = time.monotonic() - start
+    info(
+        f"[cleanup] killed {killed} processes, removed {len(bridges)} bridges "
+        f"and {len(ports)} ports in {elapsed:.3f}s\n"
+    )
+
+    return elapsed
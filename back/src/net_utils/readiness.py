@@ -0,0 +1,236 @@
+import os
+import time
+from typing import Callable
+
+from ipmininet.ipnet import IPNet
+from ipmininet.ipovs_switch import IPOVSSwitch
+from mininet.log import info
+from network_schema import Node
+from node_types import NodeType
+
+# How often network state is polled (in seconds)
+POLL_INTERVAL = 0.05
+# Network should stay ready for several polls in a row
+READY_CONFIRMATIONS = 2
+# Traffic is considered drained if interface counters didn't change for this time
+DRAIN_QUIET_PERIOD = 0.3
+
+# Linux bridge port state (/sys/class/net/<intf>/brport/state)
+BR_STATE_FORWARDING = "3"
+
+STP_FINAL_STATES = {"forwarding", "blocking", "disabled"}
+RSTP_FINAL_STATES = {"forwarding", "discarding", "disabled"}
+
+
+def _poll(condition: Callable[[], bool], timeout: float, confirmations: int) -> bool:
+    """Poll condition until it holds `confirmations` times in a row or timeout expires.
+
+    Returns:
+        bool: True if condition was satisfied, False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    in_a_row = 0
+
+    while True:
+        in_a_row = in_a_row + 1 if condition() else 0
+
+        if in_a_row >= confirmations:
+            return True
+
+        if time.monotonic() + POLL_INTERVAL > deadline:
+            return False
+
+        time.sleep(POLL_INTERVAL)
+
+
+def _interfaces_by_node(interfaces: list) -> dict[str, list[str]]:
+    """Group captured interfaces (MiminetTopology.interfaces) by node name."""
+    result: dict[str, list[str]] = {}
+
+    for link1, link2, _, edge_source, edge_target, *_ in interfaces:
+        result.setdefault(edge_source, []).append(link1)
+        result.setdefault(edge_target, []).append(link2)
+
+    return result
+
+
+def _read_sys_files(node, paths: list[str]) -> list[str]:
+    """Read several sysfs files inside node namespace with a single command."""
+    out = node.cmd(
+        "for f in " + " ".join(paths) + "; do cat $f 2>/dev/null || echo -; done"
+    )
+    return out.split()
+
+
+def captures_started(capture_files: list[str]) -> bool:
+    """Check that capture tool created all pcap files."""
+    return all(os.path.exists(f) for f in capture_files)
+
+
+def carriers_up(net: IPNet, interfaces: list) -> bool:
+    """Check that all connected interfaces have carrier."""
+    for node_name, ifaces in _interfaces_by_node(interfaces).items():
+        node = net.get(node_name)
+        states = _read_sys_files(node, [f"/sys/class/net/{i}/carrier" for i in ifaces])
+
+        if any(state != "1" for state in states):
+            return False
+
+    return True
+
+
+def bridge_ports_forwarding(net: IPNet) -> bool:
+    """Check that all ports of linux bridges (hubs) are in forwarding state."""
+    for switch in net.switches:
+        if isinstance(switch, IPOVSSwitch):
+            continue
+
+        ports = [intf.name for intf in switch.intfList() if intf.name != "lo"]
+
+        if not ports:
+            continue
+
+        states = _read_sys_files(
+            switch, [f"/sys/class/net/{p}/brport/state" for p in ports]
+        )
+
+        # "-" means that port isn't attached to a bridge (yet)
+        if any(state not in (BR_STATE_FORWARDING, "-") for state in states):
+            return False
+
+    return True
+
+
+def _ovs_port_states(switch, column: str) -> list[str]:
+    ports = [intf.name for intf in switch.intfList() if intf.name != "lo"]
+
+    if not ports:
+        return []
+
+    out = switch.cmd(
+        "for p in "
+        + " ".join(ports)
+        + f"; do ovs-vsctl --if-exists get Port $p {column} 2>/dev/null || echo -; done"
+    )
+
+    return [line.strip().strip('"').lower() for line in out.splitlines() if line]
+
+
+def spanning_tree_converged(net: IPNet, nodes: list[Node]) -> bool:
+    """Check that STP/RSTP on every switch finished port state transitions.
+
+    Every switch should have at least one forwarding port,
+    other ports should be in one of the final (non-transitional) states.
+    """
+    for node in nodes:
+        if node.config.type != NodeType.SWITCH or node.config.stp not in (1, 2):
+            continue
+
+        switch = net.get(node.data.id)
+
+        if node.config.stp == 1:
+            states = _ovs_port_states(switch, "status:stp_state")
+            final_states = STP_FINAL_STATES
+        else:
+            states = _ovs_port_states(switch, "rstp_status:rstp_port_state")
+            final_states = RSTP_FINAL_STATES
+
+        if not states or "forwarding" not in states:
+            return False
+
+        if any(state not in final_states for state in states):
+            return False
+
+    return True
+
+
+def wait_until_ready(
+    net: IPNet,
+    interfaces: list,
+    nodes: list[Node],
+    capture_files: list[str],
+    timeout: float,
+) -> float:
+    """Wait until network is configured.
+
+    Args:
+        net (IPNet): Started network.
+        interfaces (list): Captured interfaces (MiminetTopology.interfaces).
+        nodes (list[Node]): Nodes of the network schema.
+        capture_files (list[str]): Pcap files that capture tool should create.
+        timeout (float): Upper bound of waiting (in seconds).
+
+    Returns:
+        float: Time spent waiting (in seconds).
+    """
+    start = time.monotonic()
+
+    def is_ready() -> bool:
+        return (
+            captures_started(capture_files)
+            and carriers_up(net, interfaces)
+            and bridge_ports_forwarding(net)
+            and spanning_tree_converged(net, nodes)
+        )
+
+    ready = _poll(is_ready, timeout, READY_CONFIRMATIONS)
+    elapsed = time.monotonic() - start
+
+    info(
+        f"[readiness] network is {'ready' if ready else 'not ready'} "
+        f"after {elapsed:.2f}s (timeout {timeout}s)\n"
+    )
+
+    return elapsed
+
+
+def _traffic_counters(net: IPNet, interfaces: list) -> list[str]:
+    counters = []
+
+    for node_name, ifaces in _interfaces_by_node(interfaces).items():
+        paths = []
+        for i in ifaces:
+            paths.append(f"/sys/class/net/{i}/statistics/tx_packets")
+            paths.append(f"/sys/class/net/{i}/statistics/rx_packets")
+
+        counters.extend(_read_sys_files(net.get(node_name), paths))
+
+    return counters
+
+
+def wait_until_drained(net: IPNet, interfaces: list, timeout: float) -> float:
+    """Wait until packets stop flowing through captured interfaces.
+
+    Args:
+        net (IPNet): Started network.
+        interfaces (list): Captured interfaces (MiminetTopology.interfaces).
+        timeout (float): Upper bound of waiting (in seconds).
+
+    Returns:
+        float: Time spent waiting (in seconds).
+    """
+    start = time.monotonic()
+    last_counters: list[str] = []
+    quiet_since = start
+
+    def is_drained() -> bool:
+        nonlocal last_counters, quiet_since
+
+        counters = _traffic_counters(net, interfaces)
+        now = time.monotonic()
+
+        if counters != last_counters:
+            last_counters = counters
+            quiet_since = now
+
+        return now - quiet_since >= DRAIN_QUIET_PERIOD
+
+    drained = _poll(is_drained, timeout, 1)
+    elapsed = time.monotonic() - start
+
+    info(
+        f"[readiness] traffic is {'drained' if drained else 'not drained'} "
+        f"after {elapsed:.2f}s (timeout {timeout}s)\n"
+    )
+
+    return elapsed
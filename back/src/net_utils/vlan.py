@@ -1,82 +1,106 @@
+from typing import Callable
+
 from ipmininet.ipnet import IPNet
 from ipmininet.ipovs_switch import IPOVSSwitch
 from ipmininet.ipswitch import IPSwitch
+from net_utils.batch import CommandBatch
 from network_schema import Node, NodeInterface
 from node_types import NodeType
 
 
-def setup_vlans(net: IPNet, nodes: list[Node]) -> None:
+def setup_vlans(
+    net: IPNet,
+    nodes: list[Node],
+    batch: CommandBatch,
+    device_name: Callable[[str], str],
+) -> None:
     """Function to configure VLANs on the presented network
 
     Args:
         net (IPNet): network
         nodes (list[Node]): nodes on the network
+        batch (CommandBatch): batch where configuration commands are added
+        device_name (Callable): emulation name of the interface by its schema name
 
     """
 
     for node in nodes:
         if node.config.type == NodeType.SWITCH:
             switch = net.get(node.data.id)
-            add_bridge(switch, node.interface)
+            add_bridge(switch, node.interface, batch)
 
             for iface in node.interface:
                 vlan = iface.vlan
                 type_connection = iface.type_connection
                 if vlan is not None:
                     if type_connection == 0:  # Access link
-                        configure_access(switch, iface.name, vlan)
+                        configure_access(switch, device_name(iface.name), vlan, batch)
                     elif type_connection == 1:  # Trunk link
-                        configure_trunk(switch, iface.name, sorted(vlan))
+                        configure_trunk(
+                            switch, device_name(iface.name), sorted(vlan), batch
+                        )
 
 
-def clean_bridges(net: IPNet) -> None:
+def clean_bridges(net: IPNet, batch: CommandBatch) -> None:
     """Function to clear bridges that were supplied during VLAN configuration
 
     Args:
         net (IPNet): network
+        batch (CommandBatch): batch where cleanup commands are added
 
     """
 
     for switch in net.switches:
-        switch.cmd(f'ip link set {f"br-{switch.name}"} down')
+        batch.add(switch, f'ip link set {f"br-{switch.name}"} down')
         if isinstance(switch, IPOVSSwitch):
-            switch.vsctl(f' del-br {f"br-{switch.name}"}')
+            batch.add(switch, f'ovs-vsctl del-br {f"br-{switch.name}"}')
         else:
-            switch.cmd(f'brctl delbr {f"br-{switch.name}"}')
+            batch.add(switch, f'brctl delbr {f"br-{switch.name}"}')
 
 
-def configure_access(switch: IPSwitch, intf: str, vlan: int) -> None:
+def configure_access(
+    switch: IPSwitch, intf: str, vlan: int, batch: CommandBatch
+) -> None:
     if isinstance(switch, IPOVSSwitch):
-        switch.vsctl(f" del-port {switch} {intf}")
-        switch.vsctl(f' add-port {f"br-{switch.name}"} {intf}')
-        switch.vsctl(f" set port {intf} tag={vlan}")
+        batch.add(switch, f"ovs-vsctl del-port {switch} {intf}")
+        batch.add(switch, f'ovs-vsctl add-port {f"br-{switch.name}"} {intf}')
+        batch.add(switch, f"ovs-vsctl set port {intf} tag={vlan}")
     else:
-        switch.cmd(f'ip link set {intf} master {f"br-{switch.name}"}')
-        switch.cmd(f"bridge vlan del dev {intf} vid 1")
-        switch.cmd(f"bridge vlan add dev {intf} vid {vlan} pvid untagged")
+        batch.add(switch, f'ip link set {intf} master {f"br-{switch.name}"}')
+        batch.add(switch, f"bridge vlan del dev {intf} vid 1")
+        batch.add(switch, f"bridge vlan add dev {intf} vid {vlan} pvid untagged")
 
 
-def configure_trunk(switch: IPSwitch, intf: str, vlans: list[int]) -> None:
+def configure_trunk(
+    switch: IPSwitch, intf: str, vlans: list[int], batch: CommandBatch
+) -> None:
     if isinstance(switch, IPOVSSwitch):
-        switch.vsctl(f" del-port {switch} {intf}")
-        switch.vsctl(f' add-port {f"br-{switch.name}"} {intf}')
-        switch.vsctl(f" set port {intf} trunks={','.join(map(str, vlans))}")
+        batch.add(switch, f"ovs-vsctl del-port {switch} {intf}")
+        batch.add(switch, f'ovs-vsctl add-port {f"br-{switch.name}"} {intf}')
+        batch.add(
+            switch, f"ovs-vsctl set port {intf} trunks={','.join(map(str, vlans))}"
+        )
     else:
-        switch.cmd(f'ip link set {intf} master {f"br-{switch.name}"}')
-        switch.cmd(f"bridge vlan del dev {intf} vid 1")
+        batch.add(switch, f'ip link set {intf} master {f"br-{switch.name}"}')
+        batch.add(switch, f"bridge vlan del dev {intf} vid 1")
 
         for vlan in vlans:
-            switch.cmd(f"bridge vlan add dev {intf} vid {vlan}")
+            batch.add(switch, f"bridge vlan add dev {intf} vid {vlan}")
 
 
-def add_bridge(switch: IPSwitch, interface: list[NodeInterface]) -> None:
+def add_bridge(
+    switch: IPSwitch, interface: list[NodeInterface], batch: CommandBatch
+) -> None:
     if isinstance(switch, IPOVSSwitch):
         if any(iface.vlan is not None for iface in interface):
-            switch.vsctl(f' add-br {f"br-{switch.name}"}')
-            switch.vsctl(
-                f' set bridge {f"br-{switch.name}"} other_config:enable-vlan-filtering=true'
+            batch.add(switch, f'ovs-vsctl add-br {f"br-{switch.name}"}')
+            batch.add(
+                switch,
+                f'ovs-vsctl set bridge {f"br-{switch.name}"} other_config:enable-vlan-filtering=true',
             )
     else:
-        switch.cmd(f'ip link add name {f"br-{switch.name}"} type bridge')
-    switch.cmd(f'ip link set dev {f"br-{switch.name}"} up')
-    switch.cmd(f'ip link set dev {f"br-{switch.name}"} type bridge vlan_filtering 1')
+        batch.add(switch, f'ip link add name {f"br-{switch.name}"} type bridge')
+    batch.add(switch, f'ip link set dev {f"br-{switch.name}"} up')
+    batch.add(
+        switch, f'ip link set dev {f"br-{switch.name}"} type bridge vlan_filtering 1'
+    )
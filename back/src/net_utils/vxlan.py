@@ -1,17 +1,19 @@
 import re
 
 from ipmininet.ipnet import IPNet
+from net_utils.batch import CommandBatch
 from network_schema import Node
 from node_types import NodeType
 
 
-def setup_vtep_interfaces(net: IPNet, nodes: list[Node]) -> None:
+def setup_vtep_interfaces(net: IPNet, nodes: list[Node], batch: CommandBatch) -> None:
     """
     Configures VXLAN interfaces on router nodes within the network.
 
     Args:
         net (IPNet): The network containing all nodes.
         nodes (list[Node]): A list of nodes to configure.
+        batch (CommandBatch): Batch where configuration commands are added.
     """
     for node in nodes:
         if node.config.type == NodeType.ROUTER:
@@ -23,7 +25,9 @@ def setup_vtep_interfaces(net: IPNet, nodes: list[Node]) -> None:
                 target_ips = iface.vxlan_vni_to_target_ip
 
                 if target_ips and connection_type == 1:
-                    setup_network_interface(router, iface.name, iface.ip, target_ips)
+                    setup_network_interface(
+                        router, iface.name, iface.ip, target_ips, batch
+                    )
 
             # Configure VXLAN endpoint interfaces (connection_type == 0)
             for iface in node.interface:
@@ -31,11 +35,15 @@ def setup_vtep_interfaces(net: IPNet, nodes: list[Node]) -> None:
                 connection_type = iface.vxlan_connection_type
 
                 if vni is not None and connection_type == 0:
-                    setup_endpoint_interface(router, iface.name, vni)
+                    setup_endpoint_interface(router, iface.name, vni, batch)
 
 
 def setup_network_interface(
-    router: "Node", intf: str, local_ip: str, target_ips: list[list[str]]
+    router: "Node",
+    intf: str,
+    local_ip: str,
+    target_ips: list[list[str]],
+    batch: CommandBatch,
 ) -> None:
     """
     Sets up a VXLAN network interface on the router.
@@ -45,6 +53,7 @@ def setup_network_interface(
         intf (str): The name of the physical interface.
         local_ip (str): The local IP address for VXLAN.
         target_ips (list[list[str]]): A list containing [vni, target_ip] pairs.
+        batch (CommandBatch): Batch where configuration commands are added.
     """
     # Extract unique VNIs from the target IP list
     vxlan_vnis = {elem[0] for elem in target_ips}
@@ -59,29 +68,33 @@ def setup_network_interface(
         bridge_name = f'"{bridge_name}"'
 
         # Add VXLAN interface
-        router.cmd(
+        batch.add(
+            router,
             f"ip link add {vxlan_name} type vxlan id {vni} local {local_ip} "
-            f"dstport 4789 dev {intf}"
+            f"dstport 4789 dev {intf}",
         )
-        router.cmd(f"ip link set {vxlan_name} up")
+        batch.add(router, f"ip link set {vxlan_name} up")
 
         # Create and set up bridge
-        router.cmd(f"brctl addbr {bridge_name}")
-        router.cmd(f"brctl addif {bridge_name} {vxlan_name}")
-        router.cmd(f"brctl stp {bridge_name} off")
-        router.cmd(f"ip link set {bridge_name} up")
+        batch.add(router, f"brctl addbr {bridge_name}")
+        batch.add(router, f"brctl addif {bridge_name} {vxlan_name}")
+        batch.add(router, f"brctl stp {bridge_name} off")
+        batch.add(router, f"ip link set {bridge_name} up")
     # Populate forwarding database (FDB) with target MAC addresses and destinations
     for elem in target_ips:
         vni, target_ip = elem
         vxlan_name = re.sub(r"[^a-zA-Z0-9\-_]", "", f"vx{router.name}-{vni}")[-15:]
         vxlan_name = f'"{vxlan_name}"'
 
-        router.cmd(
-            f"bridge fdb append 00:00:00:00:00:00 dev {vxlan_name} dst {target_ip}"
+        batch.add(
+            router,
+            f"bridge fdb append 00:00:00:00:00:00 dev {vxlan_name} dst {target_ip}",
         )
 
 
-def setup_endpoint_interface(router: "Node", intf: str, vni: int) -> None:
+def setup_endpoint_interface(
+    router: "Node", intf: str, vni: int, batch: CommandBatch
+) -> None:
     """
     Sets up a VXLAN endpoint interface on the router by attaching it to the bridge.
 
@@ -89,22 +102,26 @@ def setup_endpoint_interface(router: "Node", intf: str, vni: int) -> None:
         router (Node): The router node where the endpoint interface will be added.
         intf (str): The name of the physical interface.
         vni (int): The VXLAN Network Identifier.
+        batch (CommandBatch): Batch where configuration commands are added.
     """
     bridge_name = re.sub(r"[^a-zA-Z0-9\-_]", "", f"br-{router.name}-{vni}")[-15:]
     bridge_name = f'"{bridge_name}"'
 
     # Attach physical interface to the bridge and bring it up
-    router.cmd(f"brctl addif {bridge_name} {intf}")
-    router.cmd(f"ip link set dev {intf} up")
+    batch.add(router, f"brctl addif {bridge_name} {intf}")
+    batch.add(router, f"ip link set dev {intf} up")
 
 
-def teardown_vtep_bridges(net: "IPNet", nodes: list["Node"]) -> None:
+def teardown_vtep_bridges(
+    net: "IPNet", nodes: list["Node"], batch: CommandBatch
+) -> None:
     """
     Removes all VXLAN bridges and associated interfaces on routers after simulation.
 
     Args:
         net (IPNet): The network containing all nodes.
         nodes (List[Node]): The list of nodes to be cleaned.
+        batch (CommandBatch): Batch where cleanup commands are added.
     """
     for node in nodes:
         if node.config.type == "router":
@@ -129,7 +146,7 @@ def teardown_vtep_bridges(net: "IPNet", nodes: list["Node"]) -> None:
                         vxlan_name = f'"{vxlan_name}"'
                         bridge_name = f'"{bridge_name}"'
 
-                        router.cmd(f"ip link set {bridge_name} down")
-                        router.cmd(f"brctl delbr {bridge_name}")
-                        router.cmd(f"ip link set {vxlan_name} down")
-                        router.cmd(f"ip link del {vxlan_name}")
+                        batch.add(router, f"ip link set {bridge_name} down")
+                        batch.add(router, f"brctl delbr {bridge_name}")
+                        batch.add(router, f"ip link set {vxlan_name} down")
+                        batch.add(router, f"ip link del {vxlan_name}")
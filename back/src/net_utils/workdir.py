@@ -0,0 +1,47 @@
+"""Isolation of concurrent emulations running on the same host.
+
+Every emulation gets its own working directory: node configs and capture files
+are written there instead of shared /tmp.
+
+Hosts and routers live in their own network namespaces, switches and hubs
+are created in the root namespace under names with the process tag
+(see MiminetTopology.node_name).
+"""
+
+import os
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Parent directory of emulation working directories
+EMULATION_DIR = os.getenv("emulation_dir", "/tmp/miminet")
+
+
+def create_workdir() -> str:
+    """Create unique working directory for the emulation."""
+    os.makedirs(EMULATION_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix="emulation_", dir=EMULATION_DIR)
+
+
+def remove_workdir(workdir: str) -> None:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def process_tag() -> str:
+    """Short tag of the current process, unique among running processes of the host.
+
+    Used in names of interfaces and devices created in the root namespace.
+    """
+    pid = os.getpid()
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    tag = ""
+
+    while True:
+        pid, rest = divmod(pid, 36)
+        tag = digits[rest] + tag
+
+        if pid == 0:
+            return tag
@@ -1,42 +1,92 @@
 import os
-import time
 
 import psutil
 from ipmininet.ipnet import IPNet
 from mininet.log import info
+from net_utils.batch import CommandBatch
+from net_utils.readiness import wait_until_drained, wait_until_ready
 from net_utils.vlan import clean_bridges, setup_vlans
 from net_utils.vxlan import setup_vtep_interfaces, teardown_vtep_bridges
 from network_schema import Network
-from network_topology import MiminetTopology
+from network_topology import MiminetTopology, capture_path
 from psutil import Process
+from shell_pool import PooledIPHost, PooledRouter, get_shell_pool
+from timings import span
 
 
 class MiminetNetwork(IPNet):
     def __init__(self, topo: MiminetTopology, network: Network):
-        super().__init__(topo=topo, use_v6=False, autoSetMacs=True, allocate_IPs=False)
+        node_classes = {}
+
+        # Take pre-started namespace shells for hosts and routers
+        if get_shell_pool() is not None:
+            node_classes = {"host": PooledIPHost, "router": PooledRouter}
+
+        super().__init__(
+            topo=topo,
+            use_v6=False,
+            autoSetMacs=True,
+            allocate_IPs=False,
+            **node_classes,
+        )
         self.__network_topology = topo
         self.__network_schema = network
 
+        # Capture tool writes pcaps into the node's cwd, linux bridges don't have it
+        for switch in self.switches:
+            if not hasattr(switch, "cwd"):
+                switch.cwd = topo.workdir
+
+    def getNodeByName(self, *args):
+        """Return node(s) by name, switches and hubs are also found by node id."""
+        return super().getNodeByName(*map(self.__network_topology.node_name, args))
+
+    def __getitem__(self, key):
+        return super().__getitem__(self.__network_topology.node_name(key))
+
     def start(self):
         # Start network
         super().start()
 
         # Additional settings
-        setup_vlans(self, self.__network_schema.nodes)
-        setup_vtep_interfaces(self, self.__network_schema.nodes)
-
-        # Waiting for network setup
-        time.sleep(self.__network_topology.network_configuration_time)
+        batch = CommandBatch("vlan_vxlan")
+        setup_vlans(
+            self,
+            self.__network_schema.nodes,
+            batch,
+            self.__network_topology.device_name,
+        )
+        setup_vtep_interfaces(self, self.__network_schema.nodes, batch)
+        batch.run()
+
+        # Waiting for network setup,
+        # configuration time of the topology is the upper bound
+        with span("convergence_wait"):
+            wait_until_ready(
+                self,
+                self.__network_topology.interfaces,
+                self.__network_schema.nodes,
+                self.__capture_files(),
+                timeout=self.__network_topology.network_configuration_time,
+            )
 
         self.__check_files()
 
     def stop(self):
-        info("[network.stop] called, sleeping 2s before teardown\n")
-        # Wait before stop
-        time.sleep(2)
+        info("[network.stop] called, waiting for traffic to drain before teardown\n")
+        # Let in-flight packets reach capture files, but no longer than 2 seconds
+        with span("traffic_drain"):
+            wait_until_drained(self, self.__network_topology.interfaces, timeout=2)
+
+        batch = CommandBatch("teardown")
+        clean_bridges(self, batch)
 
-        clean_bridges(self)
-        teardown_vtep_bridges(self, self.__network_schema.nodes)
+        # IFB devices of namespaced nodes go away with their namespaces
+        for node, ifb in self.__network_topology.root_ingress_devices:
+            batch.add(self[node], f"ip link del {ifb}")
+
+        teardown_vtep_bridges(self, self.__network_schema.nodes, batch)
+        batch.run()
 
         info("[network.stop] calling __clean_services\n")
         self.__clean_services()
@@ -46,11 +96,24 @@ class MiminetNetwork(IPNet):
         super().stop()
         info("[network.stop] done\n")
 
+    def __capture_files(self) -> list[str]:
+        """Outgoing traffic pcap files of all captured interfaces."""
+        workdir = self.__network_topology.workdir
+        files = []
+
+        for link1, link2, *_ in self.__network_topology.interfaces:
+            files.append(capture_path(workdir, link1))
+            files.append(capture_path(workdir, link2))
+
+        return files
+
     def __check_files(self):
         """Checking for the existence of pcap files."""
+        workdir = self.__network_topology.workdir
+
         for link1, link2, *_ in self.__network_topology.interfaces:
-            pcap_out_file1 = f"/tmp/capture_{link1}_out.pcapng"
-            pcap_out_file2 = f"/tmp/capture_{link2}_out.pcapng"
+            pcap_out_file1 = capture_path(workdir, link1)
+            pcap_out_file2 = capture_path(workdir, link2)
 
             if not os.path.exists(pcap_out_file1):
                 self.__clear_files()
@@ -62,12 +125,14 @@ class MiminetNetwork(IPNet):
 
     def __clear_files(self):
         """Remove pcap files."""
+        workdir = self.__network_topology.workdir
+
         for link1, link2, *_ in self.__network_topology.interfaces:
             files = [
-                f"/tmp/capture_{link1}_out.pcapng",
-                f"/tmp/capture_{link2}_out.pcapng",
-                f"/tmp/capture_{link1}.pcapng",
-                f"/tmp/capture_{link2}.pcapng",
+                capture_path(workdir, link1),
+                capture_path(workdir, link2),
+                capture_path(workdir, link1, out=False),
+                capture_path(workdir, link2, out=False),
             ]
             for f in files:
                 if os.path.exists(f):
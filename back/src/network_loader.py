@@ -0,0 +1,225 @@
+"""Loading of the network JSON into network_schema dataclasses.
+
+marshmallow_dataclass schema is reflective and slow, for big networks it takes
+most of the worker time before the emulation starts. Loaders of the fast path
+are built from the dataclass fields once (on import) and check values
+in the same pass that creates dataclasses.
+
+Fast path accepts only values that marshmallow loads as is (str for str field,
+int for int field, ...). Anything else (unknown or missing fields, "5" for int, ...)
+is loaded by the marshmallow schema, so the results and the errors are the same.
+"""
+
+import dataclasses
+import json
+import math
+import os
+import types
+import typing
+from typing import Any, Callable
+
+import marshmallow_dataclass
+from dotenv import load_dotenv
+from marshmallow import Schema
+from network_schema import Network
+from node_types import NodeType
+from timings import span
+
+load_dotenv()
+
+# Set to 0 to load every network with the marshmallow schema
+FAST_SCHEMA_LOAD = os.getenv("fast_schema_load", "1") == "1"
+
+Loader = Callable[[Any], Any]
+
+_network_schema: Schema | None = None
+
+
+class _Fallback(Exception):
+    """Value should be loaded by the marshmallow schema."""
+
+
+def filter_unknown_nodes(data: dict) -> dict:
+    allowed = set(NodeType)
+    data["nodes"] = [
+        node
+        for node in data.get("nodes", [])
+        if node.get("config", {}).get("type") in allowed
+    ]
+    return data
+
+
+def get_network_schema() -> Schema:
+    global _network_schema
+    if _network_schema is None:
+        _network_schema = marshmallow_dataclass.class_schema(Network)()
+    return _network_schema
+
+
+def _load_str(value: Any) -> str:
+    if type(value) is not str:
+        raise _Fallback
+    return value
+
+
+def _load_int(value: Any) -> int:
+    if type(value) is int:
+        return value
+
+    # marshmallow accepts integral floats (1.0 -> 1)
+    if type(value) is float and value.is_integer():
+        return int(value)
+
+    raise _Fallback
+
+
+def _load_float(value: Any) -> float:
+    if type(value) is float and math.isfinite(value):
+        return value
+
+    if type(value) is int:
+        return float(value)
+
+    raise _Fallback
+
+
+_SCALAR_LOADERS: dict[Any, Loader] = {
+    str: _load_str,
+    int: _load_int,
+    float: _load_float,
+}
+
+
+def _optional_loader(load: Loader) -> Loader:
+    def load_optional(value: Any) -> Any:
+        return None if value is None else load(value)
+
+    return load_optional
+
+
+def _union_loader(loads: list[Loader]) -> Loader:
+    # marshmallow_dataclass tries types of the union in the declared order
+    def load_union(value: Any) -> Any:
+        for load in loads:
+            try:
+                return load(value)
+            except _Fallback:
+                continue
+
+        raise _Fallback
+
+    return load_union
+
+
+def _list_loader(load: Loader) -> Loader:
+    def load_list(value: Any) -> list:
+        if type(value) is not list:
+            raise _Fallback
+        return [load(v) for v in value]
+
+    return load_list
+
+
+def _is_optional(tp: Any) -> bool:
+    return type(None) in typing.get_args(tp)
+
+
+def _dataclass_loader(cls: type) -> Loader:
+    hints = typing.get_type_hints(cls)
+    loaders = {}
+    required = set()
+    # marshmallow_dataclass loads missing optional fields as None
+    none_defaults = []
+
+    for field in dataclasses.fields(cls):
+        loaders[field.name] = _compile(hints[field.name])
+        has_default = (
+            field.default is not dataclasses.MISSING
+            or field.default_factory is not dataclasses.MISSING
+        )
+
+        if has_default:
+            continue
+
+        if _is_optional(hints[field.name]):
+            none_defaults.append(field.name)
+        else:
+            required.add(field.name)
+
+    def load_dataclass(value: Any) -> Any:
+        if type(value) is not dict:
+            raise _Fallback
+
+        kwargs = {}
+
+        for key, v in value.items():
+            load = loaders.get(key)
+
+            if load is None:
+                raise _Fallback
+
+            kwargs[key] = load(v)
+
+        if not required.issubset(kwargs):
+            raise _Fallback
+
+        for name in none_defaults:
+            kwargs.setdefault(name, None)
+
+        return cls(**kwargs)
+
+    return load_dataclass
+
+
+def _compile(tp: Any) -> Loader:
+    """Build loader of values of the type."""
+    if tp in _SCALAR_LOADERS:
+        return _SCALAR_LOADERS[tp]
+
+    if dataclasses.is_dataclass(tp):
+        return _dataclass_loader(typing.cast(type, tp))
+
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+
+    if origin is list:
+        return _list_loader(_compile(args[0]))
+
+    if origin in (typing.Union, types.UnionType):
+        alternatives = [a for a in args if a is not type(None)]
+
+        if len(alternatives) == 1:
+            load = _compile(alternatives[0])
+        else:
+            load = _union_loader([_compile(a) for a in alternatives])
+
+        return _optional_loader(load) if _is_optional(tp) else load
+
+    raise TypeError(f"Unsupported type of network field: {tp}")
+
+
+_load_network = _compile(Network)
+
+
+def load_network(network_json: str | bytes) -> Network:
+    """Load network from JSON.
+
+    Args:
+        network_json (str | bytes): JSON network from queue.
+
+    Returns:
+        Network: Network without nodes of unknown types.
+
+    Raises:
+        marshmallow.ValidationError: Network doesn't match the schema.
+    """
+    data = filter_unknown_nodes(json.loads(network_json))
+
+    if FAST_SCHEMA_LOAD:
+        try:
+            return _load_network(data)
+        except _Fallback:
+            pass
+
+    with span("schema_fallback"):
+        return get_network_schema().load(data, unknown="include")
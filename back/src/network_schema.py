@@ -4,6 +4,10 @@ from dataclasses import dataclass
 from typing import Optional, Union
 
 
+class InvalidNetworkError(ValueError):
+    """Network can't be emulated as described (emulation shouldn't be retried)."""
+
+
 @dataclass
 class NodeData:
     """
@@ -1,24 +1,98 @@
+import os
+import re
 from typing import List
 
+from dotenv import load_dotenv
 from ipmininet.ipnet import IPNet
 from ipmininet.ipovs_switch import IPOVSSwitch
 from ipmininet.ipswitch import IPSwitch
 from ipmininet.iptopo import IPTopo
 from ipmininet.router.config import RouterConfig
-from network_schema import Network, Node, NodeConfig, NodeInterface
+from net_utils.batch import CommandBatch
+from net_utils.workdir import process_tag
+from network_schema import (
+    InvalidNetworkError,
+    Network,
+    Node,
+    NodeConfig,
+    NodeInterface,
+)
 from pkt_parser import is_ipv4_address
 from node_types import NodeType
 
+load_dotenv()
+
+# Connect nodes with a single veth pair instead of putting a hub between them
+DIRECT_LINKS = os.getenv("direct_links", "0") == "1"
+
+HOST_SYSCTL = (
+    "sysctl -w net.bridge.bridge-nf-call-arptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-iptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-ip6tables=0",
+    "sysctl -w net.ipv6.conf.all.disable_ipv6=1",
+    "sysctl -w net.ipv6.conf.default.disable_ipv6=1",
+    "sysctl -w net.ipv6.conf.lo.disable_ipv6=1",
+    "sysctl -w net.ipv4.tcp_min_tso_segs=1",
+    "sysctl -w net.ipv4.conf.all.accept_source_route=1",
+    "sysctl -w net.ipv4.conf.all.log_martians=1",
+)
+
+ROUTER_SYSCTL = (
+    "sysctl -w net.bridge.bridge-nf-call-arptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-iptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-ip6tables=0",
+    "sysctl -w net.ipv4.conf.all.accept_source_route=1",
+    "sysctl -w net.ipv4.conf.all.log_martians=1",
+    "sysctl -w net.ipv6.conf.all.disable_ipv6=1",
+    "sysctl -w net.ipv6.conf.default.disable_ipv6=1",
+)
+
+SWITCH_SYSCTL = (
+    "sysctl -w net.bridge.bridge-nf-call-arptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-iptables=0",
+    "sysctl -w net.bridge.bridge-nf-call-ip6tables=0",
+    "sysctl -w net.ipv6.conf.all.disable_ipv6=1",
+    "sysctl -w net.ipv6.conf.default.disable_ipv6=1",
+    "sysctl -w net.ipv6.conf.lo.disable_ipv6=1",
+)
+
+
+def capture_path(workdir: str, iface: str, out: bool = True) -> str:
+    """Pcap file written by capture tool for the interface.
+
+    Args:
+        workdir (str): Working directory of the emulation.
+        iface (str): Interface name.
+        out (bool): Capture of outgoing traffic only (or of all traffic).
+    """
+    suffix = "_out" if out else ""
+    return os.path.join(workdir, f"capture_{iface}{suffix}.pcapng")
+
 
 class MiminetTopology(IPTopo):
     """Class representing topology for miminet networks."""
 
-    def __init__(self, network: Network):
+    def __init__(self, network: Network, workdir: str = "/tmp"):
+        """
+        Args:
+            network (Network): Network schema.
+            workdir (str): Working directory of the emulation
+                (node configs and capture files are written there).
+        """
         # List with useful information about every interface
         self.__iface_pairs: list = []
         # Used to generate unique names
         self.__switch_count = 0
-        # Minimum suitable time for which the network is configured
+        # Switches and hubs are created in the root namespace,
+        # their names shouldn't clash with switches of concurrent emulations
+        self.__hub_prefix = f"h{process_tag()}_"
+        # Netem of direct links: (node, interface, IFB device, netem options)
+        self.__ingress_netem: list[tuple[str, str, str, str]] = []
+        # Node ids and interface names of user switches and hubs -> their names
+        self.__node_names: dict[str, str] = {}
+        self.__device_names: dict[str, str] = {}
+        self.__workdir = workdir
+        # Upper bound of time it takes to configure the network
         self.__network_configuration_time = 3
 
         self.__network: Network = network
@@ -34,9 +108,39 @@ class MiminetTopology(IPTopo):
         Return: List with useful information about every interface."""
         return self.__iface_pairs.copy()
 
+    @property
+    def interface_names(self) -> dict[str, str]:
+        """Interface names from the network schema by names of the renamed interfaces."""
+        return {device: name for name, device in self.__device_names.items()}
+
+    def node_name(self, node_id: str) -> str:
+        """Name of the node in the emulation (switches and hubs are renamed)."""
+        return self.__node_names.get(node_id, node_id)
+
+    def device_name(self, iface_name: str) -> str:
+        """Name of the interface in the emulation."""
+        return self.__device_names.get(iface_name, iface_name)
+
+    @property
+    def root_ingress_devices(self) -> list[tuple[str, str]]:
+        """IFB devices of direct links created in the root namespace.
+
+        Return: (switch or hub name, IFB device) for every such device,
+        they aren't removed with the network namespaces of the nodes."""
+        return [
+            (node, ifb)
+            for node, _, ifb, _ in self.__ingress_netem
+            if self.isSwitch(node)
+        ]
+
+    @property
+    def workdir(self) -> str:
+        """Working directory of the emulation."""
+        return self.__workdir
+
     @property
     def network_configuration_time(self) -> int:
-        """Get amount of time it takes to properly configure the network (in seconds)."""
+        """Get max amount of time it takes to properly configure the network (in seconds)."""
         return self.__network_configuration_time
 
     def __set_network_configuration_time(self, value: int):
@@ -66,11 +170,12 @@ class MiminetTopology(IPTopo):
         is_rstp_enabled = config.stp == 2
 
         self.__nodes[node_id] = self.addSwitch(
-            node_id,
+            self.__root_name(node_id),
             cls=IPOVSSwitch,
+            dpid=self.__dpid(node_id),
             stp=is_stp_enabled,
             rstp=is_rstp_enabled,
-            cwd="/tmp",
+            cwd=self.__workdir,
             priority=config.priority,
         )
 
@@ -83,18 +188,53 @@ class MiminetTopology(IPTopo):
     def __handle_host_or_server(self, node_id: str, config: NodeConfig):
         default_gw = config.default_gw
         route = f"via {default_gw}" if default_gw else ""
-        self.__nodes[node_id] = self.addHost(node_id, defaultRoute=route)
+        self.__nodes[node_id] = self.addHost(
+            node_id, defaultRoute=route, cwd=self.__workdir
+        )
 
     def __handle_l1_hub(self, node_id: str):
         self.__nodes[node_id] = self.addSwitch(
-            node_id, cls=IPSwitch, stp=False, hub=True
+            self.__root_name(node_id),
+            cls=IPSwitch,
+            dpid=self.__dpid(node_id),
+            stp=False,
+            hub=True,
         )
 
+    def __root_name(self, node_id: str) -> str:
+        """Unique name of the switch or hub in the root namespace."""
+        name = f"{self.__hub_prefix}n{len(self.__node_names) + 1}"
+        self.__node_names[node_id] = name
+
+        return name
+
+    def __dpid(self, node_id: str) -> str | None:
+        # Same datapath id mininet derives from the node id (s1 -> 1)
+        nums = re.findall(r"\d+", node_id)
+
+        return hex(int(nums[0]))[2:] if nums else None
+
+    def __device_name(self, node_id: str, iface_name: str) -> str:
+        """Unique name of the switch or hub interface in the root namespace."""
+        if node_id not in self.__node_names:
+            return iface_name
+
+        if iface_name not in self.__device_names:
+            node_name = self.__node_names[node_id]
+            port = sum(
+                device.startswith(f"{node_name}-")
+                for device in self.__device_names.values()
+            )
+            self.__device_names[iface_name] = f"{node_name}-{port + 1}"
+
+        return self.__device_names[iface_name]
+
     def __handle_router(self, node_id: str, config: NodeConfig):
         default_gw = config.default_gw
         kwargs = {
             "use_v6": False,
             "config": RouterConfig,
+            "cwd": self.__workdir,
         }
 
         if default_gw:
@@ -112,10 +252,10 @@ class MiminetTopology(IPTopo):
             return matches[0]
 
         elif len(matches) == 0:
-            raise ValueError(f"Can't find {edge_id} in node interfaces.")
+            raise InvalidNetworkError(f"Can't find {edge_id} in node interfaces.")
 
         else:
-            raise ValueError(
+            raise InvalidNetworkError(
                 f"Found {len(matches)} matching interfaces in node (expected 1)."
             )
 
@@ -157,11 +297,11 @@ class MiminetTopology(IPTopo):
             duplicate_percentage = _to_percent(edge.data.duplicate_percentage)
 
             if source_id not in self.__nodes:
-                raise ValueError(
+                raise InvalidNetworkError(
                     f"Edge '{edge_id}' references unknown source node '{source_id}'."
                 )
             if target_id not in self.__nodes:
-                raise ValueError(
+                raise InvalidNetworkError(
                     f"Edge '{edge_id}' references unknown target node '{target_id}'."
                 )
 
@@ -176,10 +316,13 @@ class MiminetTopology(IPTopo):
             src_iface = self.__find_interface(edge_id, src_node.interface)
             trg_iface = self.__find_interface(edge_id, trg_node.interface)
 
+            src_name = self.__device_name(source_id, src_iface.name)
+            trg_name = self.__device_name(target_id, trg_iface.name)
+
             self.__iface_pairs.append(
                 (
-                    src_iface.name,
-                    trg_iface.name,
+                    src_name,
+                    trg_name,
                     edge_id,
                     source_id,
                     target_id,
@@ -188,12 +331,13 @@ class MiminetTopology(IPTopo):
                 )
             )
 
-            # Put virtual switch between nodes and return link between them
+            # Put virtual switch between nodes (or connect them directly)
+            # and return links between them
             link1, link2 = self.addLink(
                 src_host,
                 trg_host,
-                interface_name_1=src_iface.name,
-                interface_name_2=trg_iface.name,
+                interface_name_1=src_name,
+                interface_name_2=trg_name,
                 delay="15ms",
                 loss_percentage=loss_percentage,
                 duplicate_percentage=duplicate_percentage,
@@ -205,8 +349,8 @@ class MiminetTopology(IPTopo):
             links.append(link1[src_host])
             links.append(link2[trg_host])
 
-            interfaces.append(src_iface.name)
-            interfaces.append(trg_iface.name)
+            interfaces.append(src_name)
+            interfaces.append(trg_name)
 
         if links:
             # Set up packet capturing
@@ -229,31 +373,47 @@ class MiminetTopology(IPTopo):
         loss_percentage=0,
         duplicate_percentage=0,
     ):
-        """Connects two hosts through a virtual switch."""
+        """Connects two hosts through a virtual switch (or directly, see DIRECT_LINKS).
+
+        Netem is on the switch side of the links, so capture on the hosts
+        sees outgoing traffic before delay, loss and duplication.
+        Direct link has netem on ingress of both ends (through IFB devices)
+        for the same reason. Outgoing captures, and so the animation,
+        are the same as with a switch, but full captures of the receiving end
+        see incoming packets before netem.
+
+        Returns:
+            tuple: Links (src host <-> switch, switch <-> dst host).
+            In direct mode both of them are the same link.
+        """
+        link_params = {
+            "delay": delay,
+            "max_queue_size": max_queue_size,
+            "loss": loss_percentage,
+            "duplicate": duplicate_percentage,
+        }
+
+        if DIRECT_LINKS:
+            link = super().addLink(
+                h_source,
+                h_target,
+                intfName1=interface_name_1,
+                intfName2=interface_name_2,
+            )
+            self.__add_ingress_netem(h_source, interface_name_1, **link_params)
+            self.__add_ingress_netem(h_target, interface_name_2, **link_params)
+
+            return link, link
+
         # Create unique switch name
         self.__switch_count += 1
-        switch_name = "mimiswsw%d" % self.__switch_count
+        switch_name = f"{self.__hub_prefix}{self.__switch_count}"
 
         self.addSwitch(switch_name, cls=IPSwitch, stp=False, hub=True)
 
         # Link options for (src host <-> switch <-> dst host) connections
-        link_opts_src = {
-            "params2": {
-                "delay": delay,
-                "max_queue_size": max_queue_size,
-                "loss": loss_percentage,
-                "duplicate": duplicate_percentage,
-            }
-        }
-
-        link_opts_dst = {
-            "params1": {
-                "delay": delay,
-                "max_queue_size": max_queue_size,
-                "loss": loss_percentage,
-                "duplicate": duplicate_percentage,
-            }
-        }
+        link_opts_src = {"params2": link_params}
+        link_opts_dst = {"params1": link_params.copy()}
 
         # Create links
         link1 = super().addLink(
@@ -265,39 +425,51 @@ class MiminetTopology(IPTopo):
 
         return link1, link2
 
+    def __add_ingress_netem(
+        self, node: str, iface: str, delay, max_queue_size, loss, duplicate
+    ):
+        # IFB devices of switches and hubs are in the root namespace too
+        ifb = f"{self.__hub_prefix}i{len(self.__ingress_netem) + 1}"
+        options = f"delay {delay} loss {loss}% duplicate {duplicate}%"
+
+        if max_queue_size is not None:
+            options += f" limit {max_queue_size}"
+
+        self.__ingress_netem.append((node, iface, ifb, options))
+
     def post_build(self, net: IPNet):
+        # All node settings are applied at once (one script per node)
+        batch = CommandBatch("post_build")
+
+        # Incoming packets of direct links are delayed on IFB device
+        for node, iface, ifb, options in self.__ingress_netem:
+            batch.add(
+                net[node],
+                f"ip link add {ifb} type ifb",
+                f"ip link set {ifb} up",
+                f"tc qdisc add dev {iface} handle ffff: ingress",
+                f"tc filter add dev {iface} parent ffff: protocol all u32 match u32 0 0"
+                f" action mirred egress redirect dev {ifb}",
+                f"tc qdisc add dev {ifb} root netem {options}",
+            )
+
         for node in self.__id_to_node.values():
             config = node.config
             if config.type == "router":
-                net[node.data.id].cmd(f"route add default gw {config.default_gw}")
+                batch.add(
+                    net[node.data.id], f"route add default gw {config.default_gw}"
+                )
 
         for h in net.hosts:
-            h.cmd("sysctl -w net.bridge.bridge-nf-call-arptables=0")
-            h.cmd("sysctl -w net.bridge.bridge-nf-call-iptables=0")
-            h.cmd("sysctl -w net.bridge.bridge-nf-call-ip6tables=0")
-            h.cmd("sysctl -w net.ipv6.conf.all.disable_ipv6=1")
-            h.cmd("sysctl -w net.ipv6.conf.default.disable_ipv6=1")
-            h.cmd("sysctl -w net.ipv6.conf.lo.disable_ipv6=1")
-            h.cmd("sysctl -w net.ipv4.tcp_min_tso_segs=1")
-            h.cmd("sysctl -w net.ipv4.conf.all.accept_source_route=1")
-            h.cmd("sysctl -w net.ipv4.conf.all.log_martians=1")
+            batch.add(h, *HOST_SYSCTL)
 
         # Enable source route
         for r in net.routers:
-            r.cmd("sysctl -w net.bridge.bridge-nf-call-arptables=0")
-            r.cmd("sysctl -w net.bridge.bridge-nf-call-iptables=0")
-            r.cmd("sysctl -w net.bridge.bridge-nf-call-ip6tables=0")
-            r.cmd("sysctl -w net.ipv4.conf.all.accept_source_route=1")
-            r.cmd("sysctl -w net.ipv4.conf.all.log_martians=1")
-            r.cmd("sysctl -w net.ipv6.conf.all.disable_ipv6=1")
-            r.cmd("sysctl -w net.ipv6.conf.default.disable_ipv6=1")
+            batch.add(r, *ROUTER_SYSCTL)
 
         for sw in net.switches:
-            sw.cmd("sysctl -w net.bridge.bridge-nf-call-arptables=0")
-            sw.cmd("sysctl -w net.bridge.bridge-nf-call-iptables=0")
-            sw.cmd("sysctl -w net.bridge.bridge-nf-call-ip6tables=0")
-            sw.cmd("sysctl -w net.ipv6.conf.all.disable_ipv6=1")
-            sw.cmd("sysctl -w net.ipv6.conf.default.disable_ipv6=1")
-            sw.cmd("sysctl -w net.ipv6.conf.lo.disable_ipv6=1")
+            batch.add(sw, *SWITCH_SYSCTL)
+
+        batch.run()
 
         super().post_build(net)
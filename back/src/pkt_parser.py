@@ -1,16 +1,18 @@
+import heapq
+import mmap
 import os
 import random
 import string
+from typing import Iterable, Iterator
 
 import dpkt
-from dpkt.pcap import Reader
-from dpkt.utils import inet_to_str, mac_to_str
+from dissectors import dissect
 
 
 def packet_uuid(
     size: int = 8, chars: str = string.ascii_uppercase + string.digits
 ) -> str:
-    uid = "".join(random.choice(chars) for _ in range(size))
+    uid = "".join(random.choices(chars, k=size))
     return "pkt_" + uid
 
 
@@ -19,138 +21,6 @@ def is_ipv4_address(dotquad: str) -> bool:
     return len(octets) == 4 and all(o.isdigit() and 0 <= int(o) < 256 for o in octets)
 
 
-def int_to_ip(ip_int: int | None) -> str:
-    if ip_int is not None:
-        octet1 = (ip_int >> 24) & 0xFF
-        octet2 = (ip_int >> 16) & 0xFF
-        octet3 = (ip_int >> 8) & 0xFF
-        octet4 = (ip_int >> 0) & 0xFF
-
-        return f"{octet1}.{octet2}.{octet3}.{octet4}"
-    else:
-        return ""
-
-
-def is_dhcp(udp) -> bool:
-    try:
-        dh = dpkt.dhcp.DHCP(udp.data)
-        return dict(dh.opts).get(dpkt.dhcp.DHCP_OPT_MSGTYPE) is not None
-    except (dpkt.dpkt.NeedData, dpkt.dpkt.UnpackError):
-        return False
-
-
-def udp_packet_type(pkt) -> str:
-    if is_dhcp(pkt):
-        dh = dpkt.dhcp.DHCP(pkt.data)
-        opts = dict(dh.opts)
-        msg_type = int.from_bytes(
-            opts.get(dpkt.dhcp.DHCP_OPT_MSGTYPE, b""), byteorder="big"
-        )
-        match msg_type:
-            case dpkt.dhcp.DHCPDISCOVER:
-                return "DHCP Discover"
-            case dpkt.dhcp.DHCPOFFER:
-                ip = dh.yiaddr
-                mask = bin(
-                    int.from_bytes(
-                        opts.get(dpkt.dhcp.DHCP_OPT_NETMASK, b""), byteorder="big"
-                    )
-                ).count("1")
-                return f"DHCP Offer {int_to_ip(ip)}/{mask}"
-            case dpkt.dhcp.DHCPREQUEST:
-                ip = int.from_bytes(
-                    opts.get(dpkt.dhcp.DHCP_OPT_REQ_IP, b""), byteorder="big"
-                )
-                return f"DHCP Request {int_to_ip(ip)}"
-            case dpkt.dhcp.DHCPDECLINE:
-                return "DHCP Decline"
-            case dpkt.dhcp.DHCPACK:
-                return "DHCP ACK"
-            case dpkt.dhcp.DHCPNAK:
-                return "DHCP NAK"
-            case dpkt.dhcp.DHCPRELEASE:
-                return "DHCP Release"
-            case dpkt.dhcp.DHCPINFORM:
-                return "DHCP Inform"
-    return "UDP " + str(pkt.sport) + " > " + str(pkt.dport)
-
-
-def ip_packet_type(pkt) -> str:
-    if isinstance(pkt.data, dpkt.icmp.ICMP):
-        icmp = pkt.data
-        match icmp.type, icmp.code:
-            case (8, _):
-                return "ICMP echo-request"
-            case (0, _):
-                return "ICMP echo-reply"
-            case (5, _):
-                return "ICMP redirect"
-            case (3, 0):
-                return "ICMP destination net unreachable"
-            case (3, 1):
-                return "ICMP destination host unreachable"
-            case (3, 3):
-                return "ICMP destination port unreachable"
-            case (3, _):
-                return "ICMP destination unreachable"
-            case (11, _):
-                return "ICMP time to live exceeded"
-            case _:
-                return "ICMP message"
-
-    if isinstance(pkt.data, dpkt.udp.UDP):
-        return udp_packet_type(pkt.data)
-
-    if isinstance(pkt.data, dpkt.tcp.TCP):
-        tcp = pkt.data
-        d = {
-            dpkt.tcp.TH_FIN: "FIN",
-            dpkt.tcp.TH_SYN: "SYN",
-            dpkt.tcp.TH_RST: "RST",
-            dpkt.tcp.TH_PUSH: "PUSH",
-            dpkt.tcp.TH_ACK: "ACK",
-            dpkt.tcp.TH_URG: "URG",
-        }
-
-        active_flags = filter(lambda t: t[0] & tcp.flags, d.items())
-        flags_str = " + ".join(t[1] for t in active_flags)
-
-        return "TCP (" + str(flags_str) + ") " + str(tcp.sport) + " > " + str(tcp.dport)
-
-    # If it's IPIP tunnel ?
-    if isinstance(pkt.data, dpkt.ip.IP):
-        return "IPIP tunnel"
-
-    if isinstance(pkt.data, dpkt.gre.GRE):
-        return "GRE tunnel"
-
-    return "IP packet"
-
-
-def arp_packet_type(pkt) -> str:
-    if isinstance(pkt.data, dpkt.arp.ARP):
-        arp = pkt.data
-        match arp.op:
-            case 1:
-                return (
-                    "ARP-request\nWho has "
-                    + inet_to_str(arp.tpa)
-                    + "? Tell "
-                    + inet_to_str(arp.spa)
-                )
-            case 2:
-                return (
-                    "ARP-response\n"
-                    + inet_to_str(arp.spa)
-                    + " at "
-                    + mac_to_str(arp.sha)
-                )
-            case _:
-                return "ARP packet"
-
-    return "Unknown IP packet"
-
-
 def create_pkt_animation(
     file1: str,
     file2: str,
@@ -163,21 +33,82 @@ def create_pkt_animation(
     if not os.path.exists(file1) or not os.path.exists(file2):
         return None
 
-    with open(file1, "rb") as f1, open(file2, "rb") as f2:
-        pcap1 = dpkt.pcap.Reader(f1)
-        pcap2 = dpkt.pcap.Reader(f2)
-        pkts = packet_parser(
-            pcap1, edge_id, e_source, e_target, loss_percentage, duplicate_percentage
-        )
-        pkts2 = packet_parser(
-            pcap2, edge_id, e_target, e_source, loss_percentage, duplicate_percentage
-        )
+    pkts, _ = parse_capture(
+        file1, edge_id, e_source, e_target, loss_percentage, duplicate_percentage
+    )
+    pkts2, _ = parse_capture(
+        file2, edge_id, e_target, e_source, loss_percentage, duplicate_percentage
+    )
 
     return pkts + pkts2
 
 
+def parse_capture(
+    path: str,
+    edge_id: str,
+    e_source: str,
+    e_target: str,
+    loss_percentage: int = 0,
+    duplicate_percentage: int = 0,
+    use_mmap: bool = False,
+) -> tuple[list, int]:
+    """Parse pcap file in a single sequential pass.
+
+    Args:
+        path (str): Pcap file with outgoing traffic of the interface.
+        use_mmap (bool): Map file into memory instead of reading it.
+
+    Returns:
+        tuple: Animation packets and number of frames in the file.
+    """
+    with open(path, "rb") as file:
+        if use_mmap and os.fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _parse_stream(
+                    mm,
+                    edge_id,
+                    e_source,
+                    e_target,
+                    loss_percentage,
+                    duplicate_percentage,
+                )
+
+        return _parse_stream(
+            file, edge_id, e_source, e_target, loss_percentage, duplicate_percentage
+        )
+
+
+def _parse_stream(
+    stream,
+    edge_id: str,
+    e_source: str,
+    e_target: str,
+    loss_percentage: int,
+    duplicate_percentage: int,
+) -> tuple[list, int]:
+    frames = 0
+
+    def counted(reader: dpkt.pcap.Reader) -> Iterator[tuple[float, bytes]]:
+        nonlocal frames
+
+        for record in reader:
+            frames += 1
+            yield record
+
+    pkts = packet_parser(
+        counted(dpkt.pcap.Reader(stream)),
+        edge_id,
+        e_source,
+        e_target,
+        loss_percentage,
+        duplicate_percentage,
+    )
+
+    return pkts, frames
+
+
 def packet_parser(
-    pcap1: Reader,
+    pcap1: Iterable[tuple[float, bytes]],
     edge_id: str,
     e_source: str,
     e_target: str,
@@ -188,136 +119,156 @@ def packet_parser(
 
     # For each packet in the pcap1 process the contents
     for timestamp, buf in pcap1:
-        # Unpack the Ethernet frame (mac flask/dst, ethertype)
-        try:
-            eth = dpkt.ethernet.Ethernet(buf)
-        except dpkt.NeedData:
+        dissection = dissect(buf)
+
+        # Not shown in the animation (IPv6, IGMP, unknown frames)
+        if dissection is None:
             continue
 
-        # ARP
-        if isinstance(eth.data, dpkt.arp.ARP):
-            ts = str(timestamp)
-            ts = ts.replace(".", "").ljust(16, "0")
-
-            pkt_type = arp_packet_type(eth)
-            pkts.append(
-                {
-                    "data": {"id": packet_uuid(), "label": pkt_type, "type": "packet"},
-                    "config": {
-                        "type": pkt_type,
-                        "path": edge_id,
-                        "source": e_source,
-                        "target": e_target,
-                        "loss_percentage": loss_percentage,
-                        "duplicate_percentage": duplicate_percentage,
-                    },
-                    "timestamp": ts,
-                }
-            )
+        label, meta = dissection
+
+        ts = str(timestamp)
+        ts = ts.replace(".", "").ljust(16, "0")
+
+        pkts.append(
+            {
+                "data": {"id": packet_uuid(), "label": label, "type": "packet"},
+                "config": {
+                    "type": label,
+                    "path": edge_id,
+                    "source": e_source,
+                    "target": e_target,
+                    "loss_percentage": loss_percentage,
+                    "duplicate_percentage": duplicate_percentage,
+                },
+                "timestamp": ts,
+                # Structured fields for the task checkers (see dissectors.py)
+                "meta": meta,
+            }
+        )
 
-            continue
+    return pkts
 
-        if isinstance(eth.data, dpkt.llc.LLC):
-            llc = eth.data
-
-            ts = str(timestamp)
-            ts = ts.replace(".", "").ljust(16, "0")
-
-            llc_label = "LLC"
-
-            if llc.dsap == 0x42:
-                data = bytes(llc.data)
-                version = data[2]
-                if version == 0x02:
-                    llc_label = "RSTP"
-
-                    match llc.data.flags & 0x03:
-                        case 0:
-                            llc_label = "RSTP (Unknown)"
-                        case 1:
-                            llc_label = "RSTP (Alternate/Backup)"
-                        case 2:
-                            llc_label = "RSTP (Root)"
-                        case 3:
-                            llc_label = "RSTP (Designated)"
-                        case _:
-                            llc_label = "RSTP (Reserved)"
-                else:
-                    llc_label = "STP"
-
-                    match llc.data.flags:
-                        case 0:
-                            llc_label = "STP (Root)"
-                        case 1:
-                            llc_label = "STP (TC + Root)"
-                        case _:
-                            llc_label = "STP"
-
-            pkts.append(
-                {
-                    "data": {"id": packet_uuid(), "label": llc_label, "type": "packet"},
-                    "config": {
-                        "type": llc_label,
-                        "path": edge_id,
-                        "source": e_source,
-                        "target": e_target,
-                        "loss_percentage": loss_percentage,
-                        "duplicate_percentage": duplicate_percentage,
-                    },
-                    "timestamp": ts,
-                }
-            )
 
-        # Skip IPv6
-        if isinstance(eth.data, dpkt.ip6.IP6):
-            continue
+def packet_time(pkt: dict) -> int:
+    return int(pkt["timestamp"])
 
-        # IP?
-        if isinstance(eth.data, dpkt.ip.IP):
-            ip = eth.data
-
-            # Skip IGMP
-            if isinstance(ip.data, dpkt.igmp.IGMP):
-                continue
-
-            # VXLAN encapsulates packets inside UDP. Check inside UDP packets to skip IPv6 and IGMP
-            if isinstance(ip.data, dpkt.udp.UDP):
-                udp = ip.data
-                if udp.dport == 4789:
-                    vxlan = VXLAN(udp.data)
-                    # Unpack the Ethernet frame
-                    inner_eth = dpkt.ethernet.Ethernet(vxlan.data)
-                    if isinstance(inner_eth.data, dpkt.ip6.IP6):
-                        continue
-                    if isinstance(inner_eth.data, dpkt.ip.IP):
-                        inner_ip = inner_eth.data
-                        if isinstance(inner_ip.data, dpkt.igmp.IGMP):
-                            continue
-
-            ts = str(timestamp)
-            ts = ts.replace(".", "").ljust(16, "0")
-
-            pkt_type = ip_packet_type(ip)
-            pkt_type = (
-                pkt_type + "\n" + inet_to_str(ip.src) + " > " + inet_to_str(ip.dst)
-            )
 
-            pkts.append(
-                {
-                    "data": {"id": packet_uuid(), "label": pkt_type, "type": "packet"},
-                    "config": {
-                        "type": pkt_type,
-                        "path": edge_id,
-                        "source": e_source,
-                        "target": e_target,
-                        "loss_percentage": loss_percentage,
-                        "duplicate_percentage": duplicate_percentage,
-                    },
-                    "timestamp": ts,
-                }
+def merge_captures(captures: Iterable[list[dict]]) -> list[dict]:
+    """Merge animation packets of captures (each sorted by time) into one sorted list."""
+    return list(heapq.merge(*captures, key=packet_time))
+
+
+def group_packets_by_time(packets, time_slice_us: int = 14000, presorted: bool = False):
+    """Group packets into animation frames by time intervals.
+
+    Args:
+        packets: List of packets.
+        time_slice_us (int): Time interval (in microseconds) to group packets.
+        presorted (bool): Packets are already sorted by time.
+
+    Returns:
+        list: Grouped animation frames.
+    """
+    if not packets:
+        return []
+
+    if presorted:
+        animation_packets = packets
+    else:
+        animation_packets = sorted(packets, key=lambda k: k.get("timestamp", 0))
+
+    grouped = []
+    current_group: list = []
+    first_packet_time = int(animation_packets[0]["timestamp"])
+    time_limit = first_packet_time + time_slice_us
+
+    for pkt in animation_packets:
+        pkt_time = int(pkt["timestamp"])
+
+        if pkt_time > time_limit:
+            # Add packet to new group based on its time
+            grouped.append(current_group)
+            current_group = [pkt]
+            time_limit = pkt_time + time_slice_us
+        else:
+            current_group.append(pkt)
+
+    if current_group:
+        grouped.append(current_group)
+
+    return grouped
+
+
+# Animation wire formats: list of frames with packet dicts (1) and compact (2)
+ANIMATION_FORMAT_LEGACY = 1
+ANIMATION_FORMAT_COMPACT = 2
+
+
+def encode_animation(animation: list[list[dict]]) -> dict:
+    """Encode grouped animation into compact (version 2) format.
+
+    Every string (labels, edge and node ids) is stored once in `strings`,
+    every direction of a link once in `links` as
+    [path, source, target, loss_percentage, duplicate_percentage].
+    Packets are stored column-wise: label and link indexes
+    and timestamp deltas (in microseconds, the first one is absolute).
+    Frames are consecutive runs of packets, `frames` keeps their sizes.
+    Packet metadata isn't encoded, task checks request the legacy format.
+
+    Decoder: DecodeAnimation in front/src/static/miminet_animation.js.
+    """
+    strings: list[str] = []
+    string_idx: dict[str, int] = {}
+    links: list[list] = []
+    link_idx: dict[tuple, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in string_idx:
+            string_idx[value] = len(strings)
+            strings.append(value)
+
+        return string_idx[value]
+
+    labels = []
+    packet_links = []
+    timestamps = []
+    frames = []
+    last_ts = 0
+
+    for frame in animation:
+        frames.append(len(frame))
+
+        for pkt in frame:
+            config = pkt["config"]
+            link = (
+                intern(config["path"]),
+                intern(config["source"]),
+                intern(config["target"]),
+                config.get("loss_percentage", 0),
+                config.get("duplicate_percentage", 0),
             )
 
-    return pkts
+            if link not in link_idx:
+                link_idx[link] = len(links)
+                links.append(list(link))
+
+            ts = int(pkt["timestamp"])
+
+            labels.append(intern(pkt["data"]["label"]))
+            packet_links.append(link_idx[link])
+            timestamps.append(ts - last_ts)
+            last_ts = ts
+
+    return {
+        "v": ANIMATION_FORMAT_COMPACT,
+        "strings": strings,
+        "links": links,
+        "labels": labels,
+        "link": packet_links,
+        "ts": timestamps,
+        "frames": frames,
+    }
 
 
 if __name__ == "__main__":
@@ -328,34 +279,3 @@ if __name__ == "__main__":
         "host1",
         "sw1",
     )
-
-
-class VXLAN(dpkt.Packet):
-    """Virtual eXtensible Local Area Network.
-
-    Attributes:
-        __hdr__: Header fields of VXLAN.
-            flags: (int): 8 bits of flags
-            rsvd0: (int): 8 bits of reserved
-            rsvd1: (int): 16 bits of reserved
-            vnirsvd: (int): 24 bits of Virtual Network Identifier and 8 bits of reserved
-    """
-
-    __hdr__ = (
-        ("flags", "B", 0),  # 8 bits of flags
-        ("rsvd0", "B", 0),  # 8 bits of reserved
-        ("rsvd1", "H", 0),  # 16 bits of reserved
-        (
-            "vnirsvd",
-            "I",
-            0,
-        ),  # 24 bits of Virtual Network Identifier and 8 bits of reserved
-    )
-
-    @property
-    def vni(self):
-        return (self.vnirsvd >> 8) & 0xFFFFFF
-
-    @vni.setter
-    def vni(self, value):
-        self.vnirsvd = (value << 8) & 0xFFFFFF00
@@ -0,0 +1,233 @@
+"""Pool of pre-started network namespace shells.
+
+Every mininet host and router is a bash process running in its own network namespace.
+Mininet starts it for every node of every emulation and waits for the prompt.
+The pool starts such shells in advance (in background, between and during emulations)
+and nodes adopt them instead of spawning new ones.
+
+Shells are used only once: namespace is destroyed with the node,
+so the state of one emulation can't leak into the next one.
+"""
+
+import os
+import pty
+import select
+import subprocess
+import threading
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from ipmininet.host import IPHost
+from ipmininet.router import Router
+from mininet.log import error, info
+
+load_dotenv()
+
+# Mininet uses this character as a shell prompt
+PROMPT = chr(127)
+SHELL_START_TIMEOUT_MS = 5000
+
+_shell_pool: "ShellPool | None" = None
+_shell_pool_pid: int | None = None
+
+
+@dataclass
+class PooledShell:
+    """Started shell process and its pseudo-tty."""
+
+    shell: subprocess.Popen
+    master: int
+    slave: int
+
+    def alive(self) -> bool:
+        return self.shell.poll() is None
+
+    def close(self) -> None:
+        if self.alive():
+            self.shell.kill()
+
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _wait_prompt(fd: int, timeout_ms: int = SHELL_START_TIMEOUT_MS) -> None:
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    data = b""
+
+    while not data.endswith(PROMPT.encode()):
+        if not poller.poll(timeout_ms):
+            raise TimeoutError("Shell prompt wasn't received.")
+
+        data += os.read(fd, 1024)
+
+
+def spawn_shell() -> PooledShell:
+    """Start bash in a new network namespace the same way mininet does."""
+    master, slave = pty.openpty()
+    shell = subprocess.Popen(
+        [
+            "mnexec",
+            "-cdn",
+            "env",
+            "PS1=" + PROMPT,
+            "bash",
+            "--norc",
+            "--noediting",
+            "-is",
+            "mininet:pool",
+        ],
+        stdin=slave,
+        stdout=slave,
+        stderr=slave,
+        close_fds=False,
+    )
+    pooled = PooledShell(shell, master, slave)
+
+    try:
+        _wait_prompt(master)
+        # Same initial setup as in mininet.node.Node.startShell
+        os.write(master, b"unset HISTFILE; stty -echo; set +m\n")
+        _wait_prompt(master)
+    except (OSError, TimeoutError):
+        pooled.close()
+        raise
+
+    return pooled
+
+
+class ShellPool:
+    """Keeps up to `size` started shells, refills itself in background thread."""
+
+    def __init__(self, size: int):
+        self.__size = size
+        self.__shells: list[PooledShell] = []
+        self.__lock = threading.Lock()
+        self.__need_refill = threading.Event()
+        self.__closed = False
+
+        self.__need_refill.set()
+        threading.Thread(target=self.__refill_loop, daemon=True).start()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__shells)
+
+    def pids(self) -> set[int]:
+        """Process ids of idle shells."""
+        with self.__lock:
+            return {pooled.shell.pid for pooled in self.__shells}
+
+    def acquire(self) -> PooledShell | None:
+        """Take started shell from the pool.
+
+        Returns:
+            PooledShell | None: Shell or None if pool is empty.
+        """
+        shell = None
+
+        with self.__lock:
+            while self.__shells:
+                candidate = self.__shells.pop()
+
+                # Shell could be killed by cleanup after failed emulation
+                if candidate.alive():
+                    shell = candidate
+                    break
+
+                candidate.close()
+
+        self.__need_refill.set()
+        return shell
+
+    def close(self) -> None:
+        self.__closed = True
+        self.__need_refill.set()
+
+        with self.__lock:
+            shells, self.__shells = self.__shells, []
+
+        for shell in shells:
+            shell.close()
+
+    def __refill_loop(self) -> None:
+        while not self.__closed:
+            self.__need_refill.wait()
+            self.__need_refill.clear()
+
+            while not self.__closed and len(self) < self.__size:
+                try:
+                    shell = spawn_shell()
+                except (OSError, TimeoutError) as e:
+                    error(f"[shell_pool] Can't start shell: {e}\n")
+                    break
+
+                with self.__lock:
+                    self.__shells.append(shell)
+
+            info(f"[shell_pool] {len(self)} shells are ready\n")
+
+
+def get_shell_pool() -> ShellPool | None:
+    """Get pool of the current worker process (None if pool is disabled).
+
+    Pool size is set by `namespace_pool_size` environment variable.
+    """
+    global _shell_pool, _shell_pool_pid
+
+    size = int(os.getenv("namespace_pool_size", "0"))
+
+    if size <= 0:
+        return None
+
+    # Celery forks worker processes, each of them needs its own pool
+    if _shell_pool is None or _shell_pool_pid != os.getpid():
+        _shell_pool = ShellPool(size)
+        _shell_pool_pid = os.getpid()
+
+    return _shell_pool
+
+
+class PooledShellMixin:
+    """Mixin for mininet nodes that takes shell from the pool if possible."""
+
+    def startShell(self, mnopts=None):
+        pool = get_shell_pool()
+        pooled = None
+
+        if pool is not None and mnopts is None and self.inNamespace:
+            pooled = pool.acquire()
+
+        if pooled is None:
+            return super().startShell(mnopts)  # type: ignore[misc]
+
+        # Same fields as mininet.node.Node.startShell sets
+        self.master, self.slave = pooled.master, pooled.slave
+        self.shell = pooled.shell
+        self.stdin = os.fdopen(self.master, "r")
+        self.stdout = self.stdin
+        self.pid = self.shell.pid
+        self.pollOut = select.poll()
+        self.pollOut.register(self.stdout)
+        self.outToNode[self.stdout.fileno()] = self
+        self.inToNode[self.stdin.fileno()] = self
+        self.execed = False
+        self.lastCmd = None
+        self.lastPid = None
+        self.readbuf = ""
+        self.waiting = False
+
+
+class PooledIPHost(PooledShellMixin, IPHost):
+    pass
+
+
+class PooledRouter(PooledShellMixin, Router):
+    pass
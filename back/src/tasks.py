@@ -2,47 +2,54 @@ import json
 import os
 import signal
 
-from marshmallow import Schema
-import marshmallow_dataclass
-
-from node_types import NodeType
+from blob_store import upload_pcaps
+from celery.signals import worker_init, worker_process_init
 from celery_app import (
     SEND_NETWORK_RESPONSE_EXCHANGE,
     SEND_NETWORK_RESPONSE_ROUTING_KEY,
     app,
 )
 from emulator import emulate
+from metrics import record_emulation, start_metrics_server
 from mininet.log import error, setLogLevel
-from network_schema import Network
+from network_loader import load_network
+from network_schema import InvalidNetworkError
+from pkt_parser import (
+    ANIMATION_FORMAT_COMPACT,
+    ANIMATION_FORMAT_LEGACY,
+    encode_animation,
+)
+from shell_pool import get_shell_pool
+from timings import span, start_timings
 
-_network_schema: Schema | None = None
+# Result of the emulation (see run_miminet)
+EMULATION_OK = "ok"
+EMULATION_FAILED = "failed"  # Mininet failed on every attempt
+EMULATION_INVALID = "invalid"  # Network can't be emulated
 
 
-def _filter_unknown_nodes(data: dict) -> dict:
-    allowed = set(NodeType)
-    data["nodes"] = [
-        node
-        for node in data.get("nodes", [])
-        if node.get("config", {}).get("type") in allowed
-    ]
-    return data
+@worker_init.connect
+def init_worker(**kwargs):
+    # Served by the main process, pool processes only dump their metrics
+    start_metrics_server()
 
 
-def get_network_schema() -> Schema:
-    global _network_schema
-    if _network_schema is None:
-        _network_schema = marshmallow_dataclass.class_schema(Network)()
-    return _network_schema
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Start filling the pool of namespace shells before the first emulation
+    get_shell_pool()
 
 
-def run_miminet(network_json: str):
+def run_miminet(network_json: str, animation_format: int = ANIMATION_FORMAT_LEGACY):
     """Load network from JSON and start emulation safely.
 
     Args:
         network_json (str): JSON network from queue.
+        animation_format (int): Version of the animation format for the result.
 
     Returns:
-        tuple: Tuple (json emulation results, List[pcap, pcap name]).
+        tuple: Tuple (json emulation results, List[pcap, pcap name], status),
+        status is EMULATION_OK, EMULATION_FAILED or EMULATION_INVALID.
 
     """
 
@@ -52,22 +59,29 @@ def run_miminet(network_json: str):
         print("Set default handler to SIGCHLD")
         signal.signal(signal.SIGCHLD, signal.SIG_IGN)
 
-    jnet = _filter_unknown_nodes(json.loads(network_json))
-    schema = get_network_schema()
-    network_json = schema.load(jnet, unknown="include")
+    with span("schema_load"):
+        network = load_network(network_json)
 
     for _ in range(4):
         try:
-            animation, pcaps = emulate(network_json)
+            with span("attempt"):
+                animation, pcaps = emulate(network)
 
-            return json.dumps(animation), pcaps
+            if animation_format == ANIMATION_FORMAT_COMPACT:
+                return json.dumps(encode_animation(animation)), pcaps, EMULATION_OK
+
+            return json.dumps(animation), pcaps, EMULATION_OK
+        except InvalidNetworkError as e:
+            # Network is the same on every attempt, so is the result
+            error(e)
+            return "[]", [], EMULATION_INVALID
         except Exception as e:
             # Sometimes mininet doesn't work correctly and simulation needs to be redone,
             # Example of mininet error: https://github.com/mininet/mininet/issues/737.
             error(e)
             continue
 
-    return "[]", []
+    return "[]", [], EMULATION_FAILED
 
 
 @app.task(bind=True)
@@ -78,28 +92,47 @@ def mininet_worker(self, network_json: str):
         network_json (str): JSON network from queue.
 
     Returns:
-        tuple: Tuple (json emulation results, List[pcap, pcap name])
+        tuple: Tuple (json emulation results, List[pcap, pcap name]),
+        pcap is a blob reference if blob store is enabled (see blob_store.py).
 
     """
 
-    animation, pcaps = run_miminet(network_json)
+    headers = self.request.headers or {}
+    timings = start_timings()
+
+    # Old clients don't send format version and expect legacy animation
+    animation_format = int(headers.get("animation_format", ANIMATION_FORMAT_LEGACY))
+    animation, pcaps, status = run_miminet(network_json, animation_format)
+
+    # Task checks need only the animation, pcaps are neither uploaded nor sent
+    if not int(headers.get("return_pcaps", 1)):
+        pcaps = []
+
+    # Keep big captures out of the broker, send only references to them
+    with span("pcap_upload"):
+        pcaps = upload_pcaps(pcaps, self.request.id)
 
     # Task that starts emulation proccess may specify where we should send the result
+    network_task = headers.get("network_task_name")
 
-    if self.request.headers:
-        network_task = self.request.headers["network_task_name"]
+    if network_task:
         task_id = self.request.id
 
-        app.send_task(
-            network_task,
-            (
-                animation,
-                pcaps,
-            ),
-            routing_key=SEND_NETWORK_RESPONSE_ROUTING_KEY,
-            exchange=SEND_NETWORK_RESPONSE_EXCHANGE.name,
-            exchange_type=SEND_NETWORK_RESPONSE_EXCHANGE.type,
-            task_id=task_id,
-        )
+        with span("result_publish"):
+            app.send_task(
+                network_task,
+                (
+                    animation,
+                    pcaps,
+                ),
+                # Front-end stores timings of the emulation phases with its log
+                headers={"timings": timings.as_list()},
+                routing_key=SEND_NETWORK_RESPONSE_ROUTING_KEY,
+                exchange=SEND_NETWORK_RESPONSE_EXCHANGE.name,
+                exchange_type=SEND_NETWORK_RESPONSE_EXCHANGE.type,
+                task_id=task_id,
+            )
+
+    record_emulation(timings, status)
 
     return json.dumps(animation), pcaps
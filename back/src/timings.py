@@ -0,0 +1,70 @@
+"""Timing spans of the emulation phases.
+
+Worker executes one emulation at a time, so spans are collected
+into the current (per process) collector:
+
+    timings = start_timings()
+
+    with span("net_start"):
+        net.start()
+
+    timings.as_list()  # [{"name": "net_start", "seconds": 1.234}]
+
+Spans outside of started collector are not recorded.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+_current: "Timings | None" = None
+
+
+class Timings:
+    """Spans of a single emulation (jobs may add them from several threads)."""
+
+    def __init__(self) -> None:
+        self.__spans: list[dict] = []
+        self.__lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, **attrs) -> None:
+        with self.__lock:
+            self.__spans.append({"name": name, "seconds": round(seconds, 4), **attrs})
+
+    def as_list(self) -> list[dict]:
+        with self.__lock:
+            return [s.copy() for s in self.__spans]
+
+    def totals(self) -> dict[str, tuple[float, int]]:
+        """Total time and number of spans of every phase."""
+        result: dict[str, tuple[float, int]] = {}
+
+        for s in self.as_list():
+            seconds, count = result.get(s["name"], (0.0, 0))
+            result[s["name"]] = (seconds + s["seconds"], count + 1)
+
+        return result
+
+
+def start_timings() -> Timings:
+    """Start collecting spans of a new emulation."""
+    global _current
+    _current = Timings()
+    return _current
+
+
+def current_timings() -> Timings | None:
+    return _current
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[None]:
+    """Measure the block as a span of the current emulation."""
+    start = time.monotonic()
+
+    try:
+        yield
+    finally:
+        if _current is not None:
+            _current.add(name, time.monotonic() - start, **attrs)
@@ -0,0 +1,339 @@
+import socket
+
+import dpkt
+import pytest
+from src.dissectors import VXLAN, VXLAN_PORT, dissect
+
+SRC_MAC = b"\x00\x00\x00\x00\x00\x01"
+DST_MAC = b"\x00\x00\x00\x00\x00\x02"
+STP_MAC = b"\x01\x80\xc2\x00\x00\x00"
+
+SRC_IP = "10.0.0.1"
+DST_IP = "10.0.0.2"
+INNER_SRC_IP = "192.168.0.1"
+INNER_DST_IP = "192.168.0.2"
+ADDRESSES = f"\n{SRC_IP} > {DST_IP}"
+
+
+def ethernet(data, eth_type: int = dpkt.ethernet.ETH_TYPE_IP) -> bytes:
+    return bytes(
+        dpkt.ethernet.Ethernet(src=SRC_MAC, dst=DST_MAC, type=eth_type, data=data)
+    )
+
+
+def ip(data, protocol: int, src: str = SRC_IP, dst: str = DST_IP) -> dpkt.ip.IP:
+    return dpkt.ip.IP(
+        src=socket.inet_aton(src), dst=socket.inet_aton(dst), p=protocol, data=data
+    )
+
+
+def inner_ip(data=b"", protocol: int = 253) -> dpkt.ip.IP:
+    return ip(data, protocol, INNER_SRC_IP, INNER_DST_IP)
+
+
+def udp(sport: int, dport: int, data: bytes = b"") -> bytes:
+    return ethernet(
+        ip(dpkt.udp.UDP(sport=sport, dport=dport, data=data), dpkt.ip.IP_PROTO_UDP)
+    )
+
+
+def arp(op: int) -> bytes:
+    pkt = dpkt.arp.ARP(
+        op=op,
+        sha=SRC_MAC,
+        spa=socket.inet_aton(SRC_IP),
+        tpa=socket.inet_aton(DST_IP),
+    )
+    return ethernet(pkt, dpkt.ethernet.ETH_TYPE_ARP)
+
+
+def bpdu(version: int, flags: int) -> bytes:
+    """802.3 frame with LLC header of STP SAP."""
+    pkt = dpkt.stp.STP(v=version, type=0x02 if version == 0x02 else 0x00, flags=flags)
+    # RSTP BPDU has Version 1 Length field
+    data = b"\x42\x42\x03" + bytes(pkt) + (b"\x00" if version == 0x02 else b"")
+
+    return STP_MAC + SRC_MAC + len(data).to_bytes(2, "big") + data
+
+
+def icmp(icmp_type: int, code: int = 0) -> bytes:
+    pkt = dpkt.icmp.ICMP(type=icmp_type, code=code, data=dpkt.icmp.ICMP.Echo())
+    return ethernet(ip(pkt, dpkt.ip.IP_PROTO_ICMP))
+
+
+def tcp(flags: int) -> bytes:
+    pkt = dpkt.tcp.TCP(sport=1234, dport=80, flags=flags)
+    return ethernet(ip(pkt, dpkt.ip.IP_PROTO_TCP))
+
+
+def dhcp(msg_type: int, *opts: tuple[int, bytes]) -> bytes:
+    pkt = dpkt.dhcp.DHCP(
+        yiaddr=0x0A000005,
+        opts=((dpkt.dhcp.DHCP_OPT_MSGTYPE, bytes([msg_type])), *opts),
+    )
+    return udp(68, 67, bytes(pkt))
+
+
+def vxlan(inner: bytes, sport: int = 5555, dport: int = VXLAN_PORT) -> bytes:
+    header = VXLAN(flags=0x08)
+    header.vni = 42
+    return udp(sport, dport, bytes(header) + inner)
+
+
+def icmp_meta(icmp_type: int, code: int = 0) -> dict:
+    return {
+        "proto": "icmp",
+        "icmp_type": icmp_type,
+        "icmp_code": code,
+        "src": SRC_IP,
+        "dst": DST_IP,
+    }
+
+
+def tcp_meta(flags: int) -> dict:
+    return {
+        "proto": "tcp",
+        "sport": 1234,
+        "dport": 80,
+        "tcp_flags": flags,
+        "src": SRC_IP,
+        "dst": DST_IP,
+    }
+
+
+def dhcp_meta(msg_type: int) -> dict:
+    return {
+        "proto": "dhcp",
+        "sport": 68,
+        "dport": 67,
+        "dhcp_type": msg_type,
+        "src": SRC_IP,
+        "dst": DST_IP,
+    }
+
+
+INNER_ICMP = ethernet(inner_ip(dpkt.icmp.ICMP(type=8), dpkt.ip.IP_PROTO_ICMP))
+INNER_IGMP = ethernet(inner_ip(dpkt.igmp.IGMP(type=0x16), dpkt.ip.IP_PROTO_IGMP))
+INNER_IP6 = ethernet(
+    dpkt.ip6.IP6(src=b"\x00" * 16, dst=b"\x00" * 16, nxt=59, data=b""),
+    dpkt.ethernet.ETH_TYPE_IP6,
+)
+
+# (frame, expected label, expected metadata)
+CASES = {
+    "arp_request": (
+        arp(dpkt.arp.ARP_OP_REQUEST),
+        f"ARP-request\nWho has {DST_IP}? Tell {SRC_IP}",
+        {"proto": "arp", "arp_op": 1, "src": SRC_IP, "dst": DST_IP},
+    ),
+    "arp_response": (
+        arp(dpkt.arp.ARP_OP_REPLY),
+        f"ARP-response\n{SRC_IP} at 00:00:00:00:00:01",
+        {"proto": "arp", "arp_op": 2, "src": SRC_IP, "dst": DST_IP},
+    ),
+    "stp_root": (bpdu(0x00, 0x00), "STP (Root)", {"proto": "stp", "stp_flags": 0}),
+    "stp_tc_root": (
+        bpdu(0x00, 0x01),
+        "STP (TC + Root)",
+        {"proto": "stp", "stp_flags": 1},
+    ),
+    "stp": (bpdu(0x00, 0x80), "STP", {"proto": "stp", "stp_flags": 0x80}),
+    "rstp_root": (
+        bpdu(0x02, 0x3E),
+        "RSTP (Root)",
+        {"proto": "rstp", "stp_flags": 0x3E},
+    ),
+    "rstp_designated": (
+        bpdu(0x02, 0x3F),
+        "RSTP (Designated)",
+        {"proto": "rstp", "stp_flags": 0x3F},
+    ),
+    "rstp_alternate": (
+        bpdu(0x02, 0x01),
+        "RSTP (Alternate/Backup)",
+        {"proto": "rstp", "stp_flags": 0x01},
+    ),
+    "icmp_echo_request": (
+        icmp(8),
+        "ICMP echo-request" + ADDRESSES,
+        icmp_meta(8),
+    ),
+    "icmp_echo_reply": (icmp(0), "ICMP echo-reply" + ADDRESSES, icmp_meta(0)),
+    "icmp_redirect": (icmp(5, 1), "ICMP redirect" + ADDRESSES, icmp_meta(5, 1)),
+    "icmp_net_unreachable": (
+        icmp(3, 0),
+        "ICMP destination net unreachable" + ADDRESSES,
+        icmp_meta(3, 0),
+    ),
+    "icmp_host_unreachable": (
+        icmp(3, 1),
+        "ICMP destination host unreachable" + ADDRESSES,
+        icmp_meta(3, 1),
+    ),
+    "icmp_port_unreachable": (
+        icmp(3, 3),
+        "ICMP destination port unreachable" + ADDRESSES,
+        icmp_meta(3, 3),
+    ),
+    "icmp_unreachable": (
+        icmp(3, 13),
+        "ICMP destination unreachable" + ADDRESSES,
+        icmp_meta(3, 13),
+    ),
+    "icmp_ttl_exceeded": (
+        icmp(11),
+        "ICMP time to live exceeded" + ADDRESSES,
+        icmp_meta(11),
+    ),
+    "icmp_message": (icmp(13), "ICMP message" + ADDRESSES, icmp_meta(13)),
+    "tcp_syn": (
+        tcp(dpkt.tcp.TH_SYN),
+        "TCP (SYN) 1234 > 80" + ADDRESSES,
+        tcp_meta(dpkt.tcp.TH_SYN),
+    ),
+    "tcp_syn_ack": (
+        tcp(dpkt.tcp.TH_SYN | dpkt.tcp.TH_ACK),
+        "TCP (SYN + ACK) 1234 > 80" + ADDRESSES,
+        tcp_meta(dpkt.tcp.TH_SYN | dpkt.tcp.TH_ACK),
+    ),
+    "tcp_fin_push_ack": (
+        tcp(dpkt.tcp.TH_FIN | dpkt.tcp.TH_PUSH | dpkt.tcp.TH_ACK),
+        "TCP (FIN + PUSH + ACK) 1234 > 80" + ADDRESSES,
+        tcp_meta(dpkt.tcp.TH_FIN | dpkt.tcp.TH_PUSH | dpkt.tcp.TH_ACK),
+    ),
+    "tcp_rst": (
+        tcp(dpkt.tcp.TH_RST),
+        "TCP (RST) 1234 > 80" + ADDRESSES,
+        tcp_meta(dpkt.tcp.TH_RST),
+    ),
+    "udp": (
+        udp(5000, 6000),
+        "UDP 5000 > 6000" + ADDRESSES,
+        {"proto": "udp", "sport": 5000, "dport": 6000, "src": SRC_IP, "dst": DST_IP},
+    ),
+    "dhcp_discover": (
+        dhcp(dpkt.dhcp.DHCPDISCOVER),
+        "DHCP Discover" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPDISCOVER),
+    ),
+    "dhcp_offer": (
+        dhcp(
+            dpkt.dhcp.DHCPOFFER,
+            (dpkt.dhcp.DHCP_OPT_NETMASK, socket.inet_aton("255.255.255.0")),
+        ),
+        "DHCP Offer 10.0.0.5/24" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPOFFER),
+    ),
+    "dhcp_request": (
+        dhcp(
+            dpkt.dhcp.DHCPREQUEST,
+            (dpkt.dhcp.DHCP_OPT_REQ_IP, socket.inet_aton("10.0.0.5")),
+        ),
+        "DHCP Request 10.0.0.5" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPREQUEST),
+    ),
+    "dhcp_decline": (
+        dhcp(dpkt.dhcp.DHCPDECLINE),
+        "DHCP Decline" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPDECLINE),
+    ),
+    "dhcp_ack": (
+        dhcp(dpkt.dhcp.DHCPACK),
+        "DHCP ACK" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPACK),
+    ),
+    "dhcp_nak": (
+        dhcp(dpkt.dhcp.DHCPNAK),
+        "DHCP NAK" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPNAK),
+    ),
+    "dhcp_release": (
+        dhcp(dpkt.dhcp.DHCPRELEASE),
+        "DHCP Release" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPRELEASE),
+    ),
+    "dhcp_inform": (
+        dhcp(dpkt.dhcp.DHCPINFORM),
+        "DHCP Inform" + ADDRESSES,
+        dhcp_meta(dpkt.dhcp.DHCPINFORM),
+    ),
+    "dhcp_malformed": (
+        udp(68, 67, b"\x01"),
+        "UDP 68 > 67" + ADDRESSES,
+        {"proto": "udp", "sport": 68, "dport": 67, "src": SRC_IP, "dst": DST_IP},
+    ),
+    "vxlan": (
+        vxlan(INNER_ICMP),
+        f"UDP 5555 > {VXLAN_PORT}" + ADDRESSES,
+        {
+            "proto": "udp",
+            "sport": 5555,
+            "dport": VXLAN_PORT,
+            "tunnel": "vxlan",
+            "vni": 42,
+            "inner_src": INNER_SRC_IP,
+            "inner_dst": INNER_DST_IP,
+            "src": SRC_IP,
+            "dst": DST_IP,
+        },
+    ),
+    "vxlan_source_port": (
+        vxlan(INNER_ICMP, sport=VXLAN_PORT, dport=5555),
+        f"UDP {VXLAN_PORT} > 5555" + ADDRESSES,
+        {
+            "proto": "udp",
+            "sport": VXLAN_PORT,
+            "dport": 5555,
+            "src": SRC_IP,
+            "dst": DST_IP,
+        },
+    ),
+    "gre": (
+        ethernet(ip(dpkt.gre.GRE(p=0x0800, data=inner_ip()), dpkt.ip.IP_PROTO_GRE)),
+        "GRE tunnel" + ADDRESSES,
+        {
+            "proto": "gre",
+            "tunnel": "gre",
+            "inner_src": INNER_SRC_IP,
+            "inner_dst": INNER_DST_IP,
+            "src": SRC_IP,
+            "dst": DST_IP,
+        },
+    ),
+    "ipip": (
+        ethernet(ip(inner_ip(), dpkt.ip.IP_PROTO_IPIP)),
+        "IPIP tunnel" + ADDRESSES,
+        {
+            "proto": "ipip",
+            "tunnel": "ipip",
+            "inner_src": INNER_SRC_IP,
+            "inner_dst": INNER_DST_IP,
+            "src": SRC_IP,
+            "dst": DST_IP,
+        },
+    ),
+    "ip": (
+        ethernet(ip(b"", 253)),
+        "IP packet" + ADDRESSES,
+        {"proto": "ip", "ip_proto": 253, "src": SRC_IP, "dst": DST_IP},
+    ),
+}
+
+# Frames which aren't shown in the animation
+SKIPPED = {
+    "igmp": ethernet(ip(dpkt.igmp.IGMP(type=0x16), dpkt.ip.IP_PROTO_IGMP)),
+    "vxlan_ip6": vxlan(INNER_IP6),
+    "vxlan_igmp": vxlan(INNER_IGMP),
+    "ip6": INNER_IP6,
+    "truncated": SRC_MAC,
+}
+
+
+@pytest.mark.parametrize("frame, label, meta", CASES.values(), ids=list(CASES.keys()))
+def test_dissect(frame: bytes, label: str, meta: dict) -> None:
+    assert dissect(frame) == (label, meta)
+
+
+@pytest.mark.parametrize("frame", SKIPPED.values(), ids=list(SKIPPED.keys()))
+def test_skipped(frame: bytes) -> None:
+    assert dissect(frame) is None
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 
+import pytest
 from src.tasks import run_miminet
 
 TEST_JSON_DIR = Path("network_examples_json/")
@@ -40,12 +41,16 @@ def assert_duplicate_and_loss_present(animation_json: str) -> None:
 # ---------------- Test cases ---------------- #
 
 
-def test_duplicate_edges_double_packets():
+@pytest.mark.parametrize("direct_links", [False, True], ids=["hub", "direct"])
+def test_duplicate_edges_double_packets(direct_links, monkeypatch):
+    # Module imported by the emulator (src is in pythonpath)
+    monkeypatch.setattr("network_topology.DIRECT_LINKS", direct_links)
+
     net_json = load_file("duplication_network.json")
-    animation_with_dup, _ = run_miminet(net_json)
+    animation_with_dup, _, _ = run_miminet(net_json)
 
     net_zero_dup = set_duplicate_percentage(net_json, 0)
-    animation_no_dup, _ = run_miminet(net_zero_dup)
+    animation_no_dup, _, _ = run_miminet(net_zero_dup)
 
     count_with_dup = count_packets(animation_with_dup)
     count_no_dup = count_packets(animation_no_dup)
@@ -57,11 +62,11 @@ def test_duplicate_edges_double_packets():
 
 def test_backward_compatibility_no_dup_percentage():
     net_json = load_file("issues_no_dup_backward_compatibility_network.json")
-    animation_json, _ = run_miminet(net_json)
+    animation_json, _, _ = run_miminet(net_json)
     assert_duplicate_and_loss_present(animation_json)
 
 
 def test_backward_compatibility_no_loss_no_dup_percentage():
     net_json = load_file("issues_no_loss_no_dup_backward_compatibility_network.json")
-    animation_json, _ = run_miminet(net_json)
+    animation_json, _, _ = run_miminet(net_json)
     assert_duplicate_and_loss_present(animation_json)
@@ -135,15 +135,22 @@ def cleanup_pcap_files():
         os.remove(f)
 
 
+@pytest.mark.parametrize("direct_links", [False, True], ids=["hub", "direct"])
 @pytest.mark.parametrize("test", TEST_CASES, ids=TEST_IDS)
-def test_miminet_work(test: Case, request) -> None:
-    """Test network emulation using Mininet."""
+def test_miminet_work(test: Case, direct_links: bool, request, monkeypatch) -> None:
+    """Test network emulation using Mininet.
+
+    Direct links must give the same animation as links through a hub.
+    """
     info(f"Running test: {request.node.name}.")
 
+    # Module imported by the emulator (src is in pythonpath)
+    monkeypatch.setattr("network_topology.DIRECT_LINKS", direct_links)
+
     cleanup_pcap_files()
 
     # Emulate network behavior based on the test case
-    animation, _ = run_miminet(test.json_network)
+    animation, _, _ = run_miminet(test.json_network)
 
     # Extract important packet fields while ignoring excluded packets
     actual_packets = extract_important_fields(animation)
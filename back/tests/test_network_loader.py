@@ -0,0 +1,34 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+from src.network_loader import _load_network, filter_unknown_nodes, get_network_schema
+
+# Networks of emulation tests
+NETWORK_FILES = sorted(Path("network_examples_json/").glob("*.json")) + sorted(
+    Path("test_json/").glob("*_network.json")
+)
+
+
+def read_network(path: Path) -> dict | None:
+    data = json.loads(path.read_text())
+
+    # Some examples aren't networks
+    if not isinstance(data, dict):
+        return None
+
+    return filter_unknown_nodes(data)
+
+
+NETWORKS = [(path.name, read_network(path)) for path in NETWORK_FILES]
+NETWORKS = [(name, data) for name, data in NETWORKS if data is not None]
+
+
+@pytest.mark.parametrize("data", [d for _, d in NETWORKS], ids=[n for n, _ in NETWORKS])
+def test_fast_load_matches_schema(data: dict) -> None:
+    """Fast loader gives the same network as the marshmallow schema."""
+    expected = get_network_schema().load(copy.deepcopy(data), unknown="include")
+
+    # Networks of the tests don't need the schema fallback
+    assert _load_network(copy.deepcopy(data)) == expected
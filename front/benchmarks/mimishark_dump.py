@@ -0,0 +1,90 @@
+"""Micro-benchmark of mimishark hex/ASCII dump generation.
+
+Compares the old per-byte dump (mac_to_str + bytes.fromhex round-trip)
+with pcap_parser.hex_dump/ascii_dump on the packets of the test capture,
+repeated until they take the given amount of megabytes.
+
+Usage (from front/src):
+    python ../benchmarks/mimishark_dump.py [megabytes]
+"""
+
+import os
+import sys
+import time
+
+import dpkt
+from dpkt.utils import mac_to_str
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pcap_parser import ascii_dump, hex_dump  # noqa: E402
+
+TEST_PCAP = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "src",
+    "static",
+    "mimi_shark",
+    "test_mimishark_pcap_file.pcap",
+)
+
+
+def legacy_dump(buf: bytes) -> tuple[str, str]:
+    bytes_repr = " ".join(mac_to_str(buf).split(":"))
+    ascii = ""
+    for i in bytes_repr.split(" "):
+        a = bytes.fromhex(i)
+        b = str(a)[2 : len((str(a))) - 1]
+        if len(b) < 2:
+            ascii += b
+        else:
+            ascii += "."
+
+    ascii = ascii.replace('"', "doublePrime").replace("'", "singlePrime")
+    return bytes_repr, ascii
+
+
+def dump(buf: bytes) -> tuple[str, str]:
+    return hex_dump(buf), ascii_dump(buf)
+
+
+def load_packets(megabytes: float) -> list[bytes]:
+    with open(TEST_PCAP, "rb") as file:
+        sample = [buf for _, buf in dpkt.pcap.Reader(file)]
+
+    packets = []
+    size = 0
+
+    while size < megabytes * 1024 * 1024:
+        for buf in sample:
+            packets.append(buf)
+            size += len(buf)
+
+    return packets
+
+
+def measure(func, packets: list[bytes]) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = [func(buf) for buf in packets]
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    packets = load_packets(megabytes)
+    size = sum(len(buf) for buf in packets) / 1024 / 1024
+
+    legacy_time, legacy_result = measure(legacy_dump, packets)
+    new_time, new_result = measure(dump, packets)
+
+    if legacy_result != new_result:
+        sys.exit("Dumps differ!")
+
+    print(f"{len(packets)} packets, {size:.1f} MB")
+    print(f"legacy: {legacy_time:.3f}s ({size / legacy_time:.1f} MB/s)")
+    print(f"new:    {new_time:.3f}s ({size / new_time:.1f} MB/s)")
+    print(f"speedup: x{legacy_time / new_time:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -81,7 +81,7 @@ from miminet_network import (
     web_network,
     web_network_shared,
 )
-from miminet_shark import mimishark_page
+from miminet_shark import mimishark_packets, mimishark_page
 from miminet_simulation import check_simulation, run_simulation
 from ai_generate import generate_ai_task
 from quiz.controller.image_controller import image_routes, upload_image_endpoint
@@ -336,6 +336,7 @@ app.add_url_rule("/router/mimishark", methods=["GET"], view_func=mimishark_page)
 app.add_url_rule("/server/mimishark", methods=["GET"], view_func=mimishark_page)
 app.add_url_rule("/hub/mimishark", methods=["GET"], view_func=mimishark_page)
 app.add_url_rule("/switch/mimishark", methods=["GET"], view_func=mimishark_page)
+app.add_url_rule("/mimishark/packets", methods=["GET"], view_func=mimishark_packets)
 
 # Quiz
 app.add_url_rule(
@@ -15,6 +15,7 @@ from sqlalchemy import (
     Text,
     inspect,
     not_,
+    text,
 )
 from werkzeug.security import generate_password_hash
 
@@ -92,6 +93,9 @@ class SimulateLog(db.Model):  # type: ignore[name-defined]
 
     ready = db.Column(Boolean, default=False, nullable=False)
 
+    # JSON list of emulation phase spans sent by the worker
+    timings = db.Column(Text, nullable=True)
+
 
 def ensure_db_exists(
     host,
@@ -237,6 +241,21 @@ def init_db(app):
                     db.session.commit()
         else:
             print(f"[{mode.upper()}] Schema exists.")
+
+            # Columns added after the table was created
+            simulate_log_columns = {
+                c["name"] for c in inspector.get_columns(SimulateLog.__tablename__)
+            }
+
+            if "timings" not in simulate_log_columns:
+                print("[!] Add timings column to simulate_log...")
+                db.session.execute(
+                    text(
+                        f"ALTER TABLE {SimulateLog.__tablename__} ADD COLUMN timings TEXT"
+                    )
+                )
+                db.session.commit()
+
             # Only fix data if tables exist
             try:
                 # Some networks can be marked as non-emulated in the database, we should fix them.
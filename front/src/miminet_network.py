@@ -17,6 +17,7 @@ from flask_jwt_extended import get_jwt_identity, jwt_required
 from flask_login import current_user, login_required
 from miminet_config import check_image_with_pil
 from miminet_model import Network, Simulate, SimulateLog, db
+from pcap_store import list_pcaps
 from sqlalchemy import not_
 
 PREVIEW_IMAGES_ROOT = "static/images/preview"
@@ -191,11 +192,7 @@ def web_network_shared():
     pcap_dir = "static/pcaps/" + network_guid
 
     if os.path.exists(pcap_dir):
-        jnet["pcap"] = [
-            os.path.splitext(f)[0]
-            for f in os.listdir(pcap_dir)
-            if os.path.isfile(os.path.join(pcap_dir, f))
-        ]
+        jnet["pcap"] = list_pcaps(pcap_dir)
         net.network = json.dumps(jnet)
         db.session.commit()
 
@@ -275,11 +272,7 @@ def web_network():
     pcap_dir = "static/pcaps/" + network_guid
 
     if os.path.exists(pcap_dir):
-        jnet["pcap"] = [
-            os.path.splitext(f)[0]
-            for f in os.listdir(pcap_dir)
-            if os.path.isfile(os.path.join(pcap_dir, f))
-        ]
+        jnet["pcap"] = list_pcaps(pcap_dir)
         net.network = json.dumps(jnet)
         db.session.commit()
 
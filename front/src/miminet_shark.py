@@ -1,14 +1,31 @@
-import json
 import os.path
 
-from flask import flash, redirect, render_template, request, url_for
+from flask import (
+    flash,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import current_user
 from miminet_model import Network
-from pcap_parser import from_pcap_to_json
+from pcap_store import resolve_pcap
+from pcap_parser import build_packet_index, read_packet_index
 
 test_mimishark_json_file = "static/mimi_shark/test_mimishark_json_file.json"
 test_mimishark_pcap_file = "static/mimi_shark/test_mimishark_pcap_file.pcap"
 
+# Rows per request of the packet list
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+def _index_path(pcap_dir: str, iface: str) -> str:
+    # Separate directory: every file in pcap_dir is listed as a capture
+    return os.path.join(pcap_dir, "index", iface + ".jsonl")
+
 
 def mimishark_page():
     user = current_user
@@ -41,31 +58,64 @@ def mimishark_page():
         flash("Нет PCAP файлов")
         return redirect("home")
 
-    file_path = pcap_dir + "/" + iface + ".pcap"
-
     # Do we have a pcap file for a given iface?
-    if not os.path.exists(file_path):
+    file_path = resolve_pcap(pcap_dir, iface)
+
+    if file_path is None:
         flash("Нет PCAP файла для интерфейса " + iface)
         return redirect("home")
 
-    # Do we have a json file?
-    if not os.path.exists(pcap_dir + "/" + iface + ".json"):
-        from_pcap_to_json(file_path, pcap_dir + "/" + iface + ".json")
-
-    # Get JSON file
-    if not os.path.isfile(pcap_dir + "/" + iface + ".json"):
+    # Rows are loaded page by page from the index (see mimishark_packets)
+    if not build_packet_index(file_path, _index_path(pcap_dir, iface)):
         flash("Нет такого JSON файла с пакетами")
         return redirect(url_for("home"))
 
-    json_pcap_data = ""
-
-    with open(pcap_dir + "/" + iface + ".json", encoding="utf-8-sig") as json_data:
-        json_pcap_data = json.load(json_data)
-
     return render_template(
         "mimishark.html",
-        pcap_data=json_pcap_data,
+        page_size=PAGE_SIZE,
         mimishark_nav=1,
         network=net,
         iface=iface,
     )
+
+
+def mimishark_packets():
+    """Page of the packet list of the interface capture.
+
+    Query args: guid, iface, offset, limit, protocol and address filters.
+    """
+    user = current_user
+    network_guid = request.args.get("guid", type=str)
+    iface = request.args.get("iface", type=str)
+    offset = max(request.args.get("offset", default=0, type=int), 0)
+    limit = request.args.get("limit", default=PAGE_SIZE, type=int)
+    limit = min(max(limit, 0), MAX_PAGE_SIZE)
+    protocol = request.args.get("protocol", default="", type=str).strip()
+    address = request.args.get("address", default="", type=str).strip()
+
+    if not network_guid or not iface or "/" in iface:
+        ret = {"message": "Пропущен параметр GUID или iface."}
+        return make_response(jsonify(ret), 400)
+
+    net = Network.query.filter(Network.guid == network_guid).first()
+
+    if not net:
+        ret = {"message": "Нет такой сети."}
+        return make_response(jsonify(ret), 400)
+
+    if user.is_anonymous and not net.share_mode:
+        ret = {"message": "У вас нет доступа к этой сети."}
+        return make_response(jsonify(ret), 403)
+
+    pcap_dir = "static/pcaps/" + network_guid
+    file_path = resolve_pcap(pcap_dir, iface)
+    index_path = _index_path(pcap_dir, iface)
+
+    if file_path is None or not build_packet_index(file_path, index_path):
+        ret = {"message": "Нет PCAP файла для интерфейса " + iface}
+        return make_response(jsonify(ret), 404)
+
+    packets, total = read_packet_index(index_path, offset, limit, protocol, address)
+
+    ret = {"total": total, "offset": offset, "packets": packets}
+    return make_response(jsonify(ret), 200)
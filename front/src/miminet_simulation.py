@@ -1,12 +1,18 @@
 import os
 import uuid
 
+import simulation_cache
 from celery_app import EXCHANGE_TYPE, SEND_NETWORK_EXCHANGE, app
 from flask import jsonify, make_response, redirect, request, url_for
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from miminet_model import Network, Simulate, SimulateLog, db
+from pcap_store import list_pcaps
 from werkzeug.wrappers import Response
 
+# Version of animation format requested from back-end
+# (1 - list of frames with packet objects, 2 - compact format, see DecodeAnimation)
+ANIMATION_FORMAT = int(os.getenv("ANIMATION_FORMAT", "2"))
+
 
 @jwt_required()
 def run_simulation() -> Response:
@@ -46,13 +52,37 @@ def run_simulation() -> Response:
             author_id=net.author_id, network=net.network, network_guid=net.guid
         )
 
+        # Identical network was emulated before?
+        network_key = simulation_cache.network_hash(net.network)
+        no_cache = request.args.get("no_cache", default=0, type=int)
+        cacheable = simulation_cache.is_cacheable(net.network)
+        cached_packets = None
+
+        if cacheable and not no_cache:
+            cached_packets = simulation_cache.get(
+                network_key, "static/pcaps/" + net.guid
+            )
+
         # Add new network
         task_guid = uuid.uuid4()
         sim = Simulate(network_id=net.id, packets=None, task_guid=str(task_guid))
+
+        if cached_packets is not None:
+            sim.packets = cached_packets
+            sim.ready = True
+            simlog.ready = True
+
         db.session.add(sim)
         db.session.add(simlog)
         db.session.commit()
 
+        if cached_packets is not None:
+            ret = {"simulation_id": sim.id}
+            return make_response(jsonify(ret), 201)
+
+        if cacheable:
+            simulation_cache.add_pending(str(task_guid), network_key)
+
         # Send emulation task to celery
         app.send_task(
             "tasks.mininet_worker",
@@ -61,7 +91,10 @@ def run_simulation() -> Response:
             exchange=SEND_NETWORK_EXCHANGE,
             exchange_type=EXCHANGE_TYPE,
             task_id=str(task_guid),
-            headers={"network_task_name": "tasks.save_simulate_result"},
+            headers={
+                "network_task_name": "tasks.save_simulate_result",
+                "animation_format": ANIMATION_FORMAT,
+            },
         )
 
         # Return network id to check emulation result
@@ -90,15 +123,7 @@ def check_simulation():
         return make_response(jsonify(ret), 400)
 
     if sim.ready:
-        pcap_dir = "static/pcaps/" + network_guid
-        pcaps = []
-
-        if os.path.exists(pcap_dir):
-            pcaps = [
-                os.path.splitext(f)[0]
-                for f in os.listdir(pcap_dir)
-                if os.path.isfile(os.path.join(pcap_dir, f))
-            ]
+        pcaps = list_pcaps("static/pcaps/" + network_guid)
 
         ret = {"message": "Симуляция завершена", "packets": sim.packets, "pcaps": pcaps}
         return make_response(jsonify(ret), 200)
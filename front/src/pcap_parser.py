@@ -1,136 +1,220 @@
 import datetime
 import json
 import os.path
+import uuid
+from array import array
+from typing import Iterator
 
 import dpkt
 from dpkt import utils
-from dpkt.utils import inet_to_str, mac_to_str
-
-
-def create_mimishark_json(pcap, to_json):
-    json_file = []
-    start_timestamp = 0
-
-    with open(to_json, "w") as file:
-        for timestamp, buf in pcap:
-            pcap_file = {}
-            eth = dpkt.ethernet.Ethernet(buf)
-
-            if not start_timestamp:
-                start_timestamp = datetime.datetime.fromtimestamp(timestamp)
-                pcap_file["time"] = "00:00.000000"
-            else:
-                dt = datetime.datetime.fromtimestamp(timestamp) - start_timestamp
-                pcap_file["time"] = ":".join(str(dt).split(":")[1:])
-
-            if isinstance(eth.data, dpkt.arp.ARP):
-                arp_pkt = eth.data
-                pcap_file["source"] = str(utils.mac_to_str(arp_pkt.sha))
-                pcap_file["destination"] = str(utils.mac_to_str(eth.dst))
-                pcap_file["protocol"] = "ARP"
-                pcap_file["length"] = str(len(mac_to_str(buf).split(":")))
-
-                bytes_repr = " ".join(mac_to_str(buf).split(":"))
-                ascii = ""
-                for i in bytes_repr.split(" "):
-                    a = bytes.fromhex(i)
-                    b = str(a)[2 : len((str(a))) - 1]
-                    if len(b) < 2:
-                        ascii += b
-                    else:
-                        ascii += "."
-
-                pcap_file["ascii"] = ascii.replace('"', "doublePrime").replace(
-                    "'", "singlePrime"
-                )
-                pcap_file["bytes"] = bytes_repr
-
-                # .replace('"','doublePrime').replace("'",'singlePrime').replace('\\','doubleslash')
-                json_file.append(pcap_file)
-
-            if isinstance(eth.data, dpkt.llc.LLC):
-                llc = eth.data
-
-                pcap_file["source"] = str(utils.mac_to_str(eth.src))
-                pcap_file["destination"] = str(utils.mac_to_str(eth.dst))
-                pcap_file["length"] = len(mac_to_str(buf).split(":"))
-
-                if llc.dsap == 0x42:
-                    data = bytes(llc.data)
-                    version = data[2]
-                    if version == 0x02:
-                        match llc.data.flags & 0x03:
-                            case 0:
-                                pcap_file["protocol"] = "RSTP (Unknown)"
-                            case 1:
-                                pcap_file["protocol"] = "RSTP (Alternate/Backup)"
-                            case 2:
-                                pcap_file["protocol"] = "RSTP (Root)"
-                            case 3:
-                                pcap_file["protocol"] = "RSTP (Designated)"
-                            case _:
-                                pcap_file["protocol"] = "RSTP (Reserved)"
-                    else:
-                        match llc.data.flags:
-                            case 0:
-                                pcap_file["protocol"] = "STP (Root)"
-                            case 1:
-                                pcap_file["protocol"] = "STP (TC + Root)"
-                            case _:
-                                pcap_file["protocol"] = "STP"
-
-                    bytes_repr = " ".join(mac_to_str(buf).split(":"))
-                    ascii = ""
-                    for i in bytes_repr.split(" "):
-                        a = bytes.fromhex(i)
-                        b = str(a)[2 : len((str(a))) - 1]
-                        if len(b) < 2:
-                            ascii += b
-                        else:
-                            ascii += "."
-
-                    pcap_file["ascii"] = ascii.replace('"', "doublePrime").replace(
-                        "'", "singlePrime"
-                    )
-
-                    pcap_file["bytes"] = bytes_repr
-                    json_file.append(pcap_file)
-
-            if isinstance(eth.data, dpkt.ip.IP):
-                ip = eth.data
-                pcap_file["source"] = inet_to_str(ip.src)
-                pcap_file["destination"] = inet_to_str(ip.dst)
-                pcap_file["protocol"] = ip.get_proto(ip.p).__name__
-                pcap_file["length"] = str(len(mac_to_str(buf).split(":")))
-
-                bytes_repr = " ".join(mac_to_str(buf).split(":"))
-                ascii = ""
-                for i in bytes_repr.split(" "):
-                    a = bytes.fromhex(i)
-                    b = str(a)[2 : len((str(a))) - 1]
-                    if len(b) < 2:
-                        ascii += b
-                    else:
-                        ascii += "."
-                pcap_file["ascii"] = ascii.replace('"', "doublePrime").replace(
-                    "'", "singlePrime"
-                )
-                pcap_file["bytes"] = bytes_repr
-                json_file.append(pcap_file)
-
-        print(json.dumps(json_file), file=file)
-
-
-def from_pcap_to_json(from_pcap, to_json):
-    # Do we already have a JSON file?
-    if os.path.isfile(to_json):
-        return to_json
-
-    # No ?
-    # Is pcap file exists?
+from dpkt.utils import inet_to_str
+
+# Offsets of the index lines are stored next to the index
+OFFSETS_SUFFIX = ".off"
+
+# Printable ASCII characters (except backslash) are shown as is, others as dots
+ASCII_DUMP_TABLE = bytes(
+    c if 0x20 <= c < 0x7F and c != 0x5C else 0x2E for c in range(256)
+)
+
+
+def hex_dump(buf: bytes) -> str:
+    """Packet bytes as space separated hex pairs ("00 1a ff ...")."""
+    return buf.hex(" ")
+
+
+def ascii_dump(buf: bytes) -> str:
+    """Packet bytes as ASCII characters.
+
+    Quotes are replaced with words because mimishark page
+    embeds rows into its templates (see shark_script.js).
+    """
+    return (
+        buf.translate(ASCII_DUMP_TABLE)
+        .decode("ascii")
+        .replace('"', "doublePrime")
+        .replace("'", "singlePrime")
+    )
+
+
+def mimishark_records(pcap) -> Iterator[dict]:
+    """Convert pcap packets into mimishark rows (one by one)."""
+    start_timestamp: datetime.datetime | None = None
+
+    for timestamp, buf in pcap:
+        pcap_file: dict = {}
+        eth = dpkt.ethernet.Ethernet(buf)
+
+        if start_timestamp is None:
+            start_timestamp = datetime.datetime.fromtimestamp(timestamp)
+            pcap_file["time"] = "00:00.000000"
+        else:
+            dt = datetime.datetime.fromtimestamp(timestamp) - start_timestamp
+            pcap_file["time"] = ":".join(str(dt).split(":")[1:])
+
+        if isinstance(eth.data, dpkt.arp.ARP):
+            arp_pkt = eth.data
+            pcap_file["source"] = str(utils.mac_to_str(arp_pkt.sha))
+            pcap_file["destination"] = str(utils.mac_to_str(eth.dst))
+            pcap_file["protocol"] = "ARP"
+            pcap_file["length"] = str(len(buf))
+
+            pcap_file["bytes"] = hex_dump(buf)
+            pcap_file["ascii"] = ascii_dump(buf)
+            yield pcap_file
+
+        if isinstance(eth.data, dpkt.llc.LLC):
+            llc = eth.data
+
+            pcap_file["source"] = str(utils.mac_to_str(eth.src))
+            pcap_file["destination"] = str(utils.mac_to_str(eth.dst))
+            pcap_file["length"] = len(buf)
+
+            if llc.dsap == 0x42:
+                data = bytes(llc.data)
+                version = data[2]
+                if version == 0x02:
+                    match llc.data.flags & 0x03:
+                        case 0:
+                            pcap_file["protocol"] = "RSTP (Unknown)"
+                        case 1:
+                            pcap_file["protocol"] = "RSTP (Alternate/Backup)"
+                        case 2:
+                            pcap_file["protocol"] = "RSTP (Root)"
+                        case 3:
+                            pcap_file["protocol"] = "RSTP (Designated)"
+                        case _:
+                            pcap_file["protocol"] = "RSTP (Reserved)"
+                else:
+                    match llc.data.flags:
+                        case 0:
+                            pcap_file["protocol"] = "STP (Root)"
+                        case 1:
+                            pcap_file["protocol"] = "STP (TC + Root)"
+                        case _:
+                            pcap_file["protocol"] = "STP"
+
+                pcap_file["bytes"] = hex_dump(buf)
+                pcap_file["ascii"] = ascii_dump(buf)
+                yield pcap_file
+
+        if isinstance(eth.data, dpkt.ip.IP):
+            ip = eth.data
+            pcap_file["source"] = inet_to_str(ip.src)
+            pcap_file["destination"] = inet_to_str(ip.dst)
+            pcap_file["protocol"] = ip.get_proto(ip.p).__name__
+            pcap_file["length"] = str(len(buf))
+
+            pcap_file["bytes"] = hex_dump(buf)
+            pcap_file["ascii"] = ascii_dump(buf)
+            yield pcap_file
+
+
+def build_packet_index(from_pcap: str, index_path: str) -> bool:
+    """Build on-disk index of mimishark rows for the pcap.
+
+    Index is a JSON Lines file (one row per packet) and "<index>.off" file
+    with offsets of the lines, so any page of rows can be read without
+    loading the whole capture.
+
+    Returns:
+        bool: True if index exists (or has been built).
+    """
+    if os.path.isfile(index_path) and os.path.isfile(index_path + OFFSETS_SUFFIX):
+        return True
+
     if not os.path.isfile(from_pcap):
         return False
 
-    with open(from_pcap, "rb") as f:
-        pcap = dpkt.pcap.Reader(f)
-        create_mimishark_json(pcap, to_json)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+
+    # Index can be built by several web workers at the same time
+    tmp_suffix = "." + uuid.uuid4().hex + ".tmp"
+    offsets = array("Q")
+
+    with open(from_pcap, "rb") as f, open(index_path + tmp_suffix, "wb") as index:
+        for number, record in enumerate(mimishark_records(dpkt.pcap.Reader(f)), 1):
+            record["number"] = number
+            offsets.append(index.tell())
+            index.write(json.dumps(record).encode() + b"\n")
+
+    with open(index_path + OFFSETS_SUFFIX + tmp_suffix, "wb") as file:
+        offsets.tofile(file)
+
+    # Offsets are renamed last: index is ready only when both files exist
+    os.rename(index_path + tmp_suffix, index_path)
+    os.rename(index_path + OFFSETS_SUFFIX + tmp_suffix, index_path + OFFSETS_SUFFIX)
+
+    return True
+
+
+def _matches(record: dict, protocol: str, address: str) -> bool:
+    if protocol and protocol not in record.get("protocol", "").lower():
+        return False
+
+    if address and not (
+        address in record.get("source", "").lower()
+        or address in record.get("destination", "").lower()
+    ):
+        return False
+
+    return True
+
+
+def read_packet_index(
+    index_path: str,
+    offset: int = 0,
+    limit: int = 100,
+    protocol: str = "",
+    address: str = "",
+) -> tuple[list[dict], int]:
+    """Read page of mimishark rows from the index.
+
+    Args:
+        index_path (str): Index built by build_packet_index.
+        offset (int): Number of (matching) rows to skip.
+        limit (int): Max number of rows.
+        protocol (str): Only rows with protocol containing this string.
+        address (str): Only rows with source or destination containing this string.
+
+    Returns:
+        tuple: Rows of the page and total number of matching rows.
+    """
+    protocol = protocol.lower()
+    address = address.lower()
+
+    with open(index_path, "rb") as index:
+        # No filters: jump straight to the page
+        if not protocol and not address:
+            offsets = array("Q")
+
+            with open(index_path + OFFSETS_SUFFIX, "rb") as file:
+                offsets.frombytes(file.read())
+
+            total = len(offsets)
+
+            if offset >= total:
+                return [], total
+
+            index.seek(offsets[offset])
+            rows = [
+                json.loads(index.readline()) for _ in range(min(limit, total - offset))
+            ]
+
+            return rows, total
+
+        rows = []
+        total = 0
+
+        for line in index:
+            record = json.loads(line)
+
+            if not _matches(record, protocol, address):
+                continue
+
+            if offset <= total < offset + limit:
+                rows.append(record)
+
+            total += 1
+
+        return rows, total
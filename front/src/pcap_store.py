@@ -0,0 +1,141 @@
+"""Capture files uploaded by back-end workers to the blob store.
+
+Worker may send references to pcaps instead of their contents
+(see back/src/blob_store.py). References are saved next to regular pcaps
+as "<iface>.ref" files and pcaps are downloaded only when they are opened.
+"""
+
+import gzip
+import json
+import os
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local blob store (directory shared with back-end workers)
+PCAP_STORE_DIR = os.getenv("PCAP_STORE_DIR", "/var/lib/miminet/blobs")
+# S3-compatible blob store
+PCAP_STORE_BUCKET = os.getenv("PCAP_STORE_BUCKET", "miminet-pcaps")
+PCAP_STORE_ENDPOINT = os.getenv("PCAP_STORE_ENDPOINT") or None
+
+REF_SUFFIX = ".ref"
+
+_s3_client = None
+
+
+def is_ref(pcap) -> bool:
+    """Check if pcap received from worker is a reference to the blob."""
+    return isinstance(pcap, dict) and "key" in pcap
+
+
+def write_ref(pcap_dir: str, name: str, ref: dict) -> None:
+    with open(os.path.join(pcap_dir, name + REF_SUFFIX), "w") as file:
+        json.dump(ref, file)
+
+
+def list_pcaps(pcap_dir: str) -> list[str]:
+    """Names of interfaces which have pcaps (downloaded or referenced) in the directory."""
+    if not os.path.isdir(pcap_dir):
+        return []
+
+    return sorted(
+        {
+            stem
+            for stem, ext in map(os.path.splitext, os.listdir(pcap_dir))
+            if ext in (".pcap", REF_SUFFIX)
+        }
+    )
+
+
+def _s3():
+    global _s3_client
+
+    if _s3_client is None:
+        # boto3 is needed only for S3 store
+        import boto3
+
+        _s3_client = boto3.client("s3", endpoint_url=PCAP_STORE_ENDPOINT)
+
+    return _s3_client
+
+
+def _fetch(ref: dict) -> bytes:
+    if ref.get("store") == "s3":
+        obj = _s3().get_object(Bucket=PCAP_STORE_BUCKET, Key=ref["key"])
+        data = obj["Body"].read()
+    else:
+        with open(os.path.join(PCAP_STORE_DIR, ref["key"]), "rb") as file:
+            data = file.read()
+
+    if ref.get("encoding") == "gzip":
+        data = gzip.decompress(data)
+
+    return data
+
+
+def _read_ref(path: str) -> dict | None:
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_pcap(pcap_dir: str, iface: str) -> str | None:
+    """Get path to the pcap of the interface, download it if needed.
+
+    Returns:
+        str | None: Path to the pcap file or None if there is no such pcap
+        (or its blob has expired).
+    """
+    pcap_path = os.path.join(pcap_dir, iface + ".pcap")
+
+    if os.path.exists(pcap_path):
+        return pcap_path
+
+    ref = _read_ref(os.path.join(pcap_dir, iface + REF_SUFFIX))
+
+    if ref is None:
+        return None
+
+    try:
+        data = _fetch(ref)
+    except Exception as e:
+        print("Can't fetch pcap from blob store:", e)
+        return None
+
+    # Several requests may resolve the same pcap simultaneously
+    tmp_path = f"{pcap_path}.{uuid.uuid4().hex}.tmp"
+
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.rename(tmp_path, pcap_path)
+
+    return pcap_path
+
+
+def blobs_available(pcap_dir: str) -> bool:
+    """Check that all referenced blobs of the directory still exist."""
+    if not os.path.isdir(pcap_dir):
+        return True
+
+    for f in os.listdir(pcap_dir):
+        if not f.endswith(REF_SUFFIX):
+            continue
+
+        ref = _read_ref(os.path.join(pcap_dir, f))
+
+        if ref is None:
+            return False
+
+        try:
+            if ref.get("store") == "s3":
+                _s3().head_object(Bucket=PCAP_STORE_BUCKET, Key=ref["key"])
+            elif not os.path.exists(os.path.join(PCAP_STORE_DIR, ref["key"])):
+                return False
+        except Exception:
+            return False
+
+    return True
@@ -1,11 +1,329 @@
 import ipaddress
+from bisect import bisect_right
+from heapq import merge
 
+VXLAN_PORT = 4789
+# Tunnels that carry echo requests and replies between tunnel endpoints
+TUNNELS = ("vxlan", "gre", "ipip")
+IP_TUNNELS = ("gre", "ipip")
 
-def check_subnet_mask(answer, device, target, expected_mask):
-    nodes = answer["nodes"]
-    edges = answer["edges"]
+
+def packet_meta(packet):
+    """Structured fields of the animation packet (see back/src/dissectors.py).
+
+    Animations of older workers have only labels,
+    fields used by the checks are recovered from the label then.
+    """
+    meta = packet.get("meta")
+
+    if meta is None:
+        return meta_from_label(packet.get("config", {}).get("type") or "")
+
+    return meta
+
+
+def meta_from_label(label):
+    if "ICMP echo-request" in label:
+        return {"proto": "icmp", "icmp_type": 8}
+    if "ICMP echo-reply" in label:
+        return {"proto": "icmp", "icmp_type": 0}
+    if "ICMP" in label:
+        return {"proto": "icmp"}
+    if "IPIP tunnel" in label:
+        return {"proto": "ipip", "tunnel": "ipip"}
+    if "GRE tunnel" in label:
+        return {"proto": "gre", "tunnel": "gre"}
+    if "UDP" in label and f"> {VXLAN_PORT}" in label:
+        return {"proto": "udp", "dport": VXLAN_PORT, "tunnel": "vxlan"}
+
+    return {}
+
+
+def is_echo_request(meta):
+    return meta.get("proto") == "icmp" and meta.get("icmp_type") == 8
+
+
+def is_echo_reply(meta):
+    return meta.get("proto") == "icmp" and meta.get("icmp_type") == 0
+
+
+# Classes of packets the checks follow (tunnels are classes too, see TUNNELS)
+ICMP = "icmp"
+ECHO_REQUEST = "echo-request"
+ECHO_REPLY = "echo-reply"
+ECHO = (ECHO_REQUEST, ECHO_REPLY)
+
+
+def packet_classes(meta):
+    classes = set()
+
+    if meta.get("proto") == "icmp":
+        classes.add(ICMP)
+    if is_echo_request(meta):
+        classes.add(ECHO_REQUEST)
+    if is_echo_reply(meta):
+        classes.add(ECHO_REPLY)
+    if meta.get("tunnel") in TUNNELS:
+        classes.add(meta["tunnel"])
+
+    return classes
+
+
+class AnswerIndex:
+    """Packets of the answer grouped for the checks.
+
+    Checks look at the first packet of every animation frame (hop):
+    its source, target, edge and class. Hops are indexed once per answer
+    (see check_practice_service.check_task) and the index is shared by all
+    requirements, so a check follows a request or reply from node to node
+    instead of scanning all packets again.
+    """
+
+    def __init__(self, packets):
+        self.packets = packets
+        # (source, target, edge) of every hop
+        self.hops = []
+        self.classes = []
+        # node -> positions of hops from it
+        self.sources = {}
+        # classes -> (positions of hops, node -> positions of hops from it)
+        self._flows = {}
+        # (source, target) -> echo request and reply paths
+        self._echo_paths = {}
+
+        for position, frame in enumerate(packets or []):
+            config = frame[0].get("config", {})
+            source = config.get("source")
+
+            self.hops.append((source, config.get("target"), config.get("path")))
+            self.classes.append(packet_classes(packet_meta(frame[0])))
+            self.sources.setdefault(source, []).append(position)
+
+    def flow(self, classes):
+        """Hops of packets of any of the classes.
+
+        Returns:
+            tuple: Positions of hops and dict node -> positions of hops from the node.
+        """
+        flow = self._flows.get(classes)
+
+        if flow is None:
+            positions = [
+                position
+                for position, hop_classes in enumerate(self.classes)
+                if not hop_classes.isdisjoint(classes)
+            ]
+            sources = {}
+
+            for position in positions:
+                sources.setdefault(self.hops[position][0], []).append(position)
+
+            flow = self._flows[classes] = (positions, sources)
+
+        return flow
+
+    def hops_of(self, classes):
+        positions, _ = self.flow(classes)
+        return [self.hops[position] for position in positions]
+
+    def hops_from(self, classes, node):
+        """Hops of packets of the classes sent by the node (in order)."""
+        _, sources = self.flow(classes)
+        return [self.hops[position] for position in sources.get(node, [])]
+
+    def follow(self, classes, start, end=None):
+        """Path of the packet: next hop is the first later hop from the last node.
+
+        Returns:
+            tuple: Nodes of the path (starting with start), its edges
+            and whether the path has reached end (it stops there).
+        """
+        _, sources = self.flow(classes)
+        path = [start]
+        edges = []
+        position = -1
+
+        while True:
+            positions = sources.get(path[-1], [])
+            i = bisect_right(positions, position)
+
+            if i == len(positions):
+                return path, edges, False
+
+            position = positions[i]
+            _, target, edge = self.hops[position]
+            path.append(target)
+            edges.append(edge)
+
+            if target == end:
+                return path, edges, True
+
+    def echo_paths(self, source_device, target_device):
+        """Paths of the last echo request from source_device and of its reply.
+
+        Request path is restarted by every request sent by source_device
+        (until one reaches target_device), reply path starts at target_device.
+        """
+        key = (source_device, target_device)
+
+        if key not in self._echo_paths:
+            request_path = []
+            reply_path = []
+
+            for position in self.flow(ECHO)[0]:
+                source, target, _ = self.hops[position]
+
+                if ECHO_REQUEST in self.classes[position]:
+                    if source == source_device and (
+                        not request_path or request_path[-1] != target_device
+                    ):
+                        request_path = [source]
+                        reply_path = []
+                    if request_path and source == request_path[-1]:
+                        request_path.append(target)
+                else:
+                    if not reply_path and source == target_device:
+                        reply_path = [source]
+                    if reply_path and source == reply_path[-1]:
+                        reply_path.append(target)
+
+            self._echo_paths[key] = (request_path, reply_path)
+
+        return self._echo_paths[key]
+
+    def reaches(self, classes, source_device, target_device):
+        """Check if packet of the classes from source_device reaches target_device.
+
+        Every hop from source_device (of any class) starts the path again.
+        """
+        current = source_device
+        last = -1
+
+        for position in merge(
+            self.sources.get(source_device, []), self.flow(classes)[0]
+        ):
+            # Hop from source_device of the classes is in both lists
+            if position == last:
+                continue
+
+            last = position
+            source, target, _ = self.hops[position]
+
+            if source == source_device:
+                current = source_device
+
+            if source == current and not self.classes[position].isdisjoint(classes):
+                current = target
+
+                if current == target_device:
+                    return True
+
+        return False
+
+
+class TopologyIndex:
+    """Nodes, edges and interfaces of the answer network for lookups by id.
+
+    Built once per answer (see check_practice_service.check_task)
+    and shared by all requirements.
+    As with a scan of the lists, the first node (edge) with the id is found.
+    """
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.edges = edges
+        self._nodes = {}
+        self._edges = {}
+        # node id -> edges connected to the node
+        self._adjacent = {}
+        # node id -> [(ip, netmask, network or None if ip/netmask is invalid)]
+        self._networks = {}
+
+        for node in nodes:
+            self._nodes.setdefault(node.get("data", {}).get("id"), node)
+
+        for edge in edges:
+            data = edge.get("data", {})
+            self._edges.setdefault(data.get("id"), edge)
+
+            for node_id in {data.get("source"), data.get("target")}:
+                self._adjacent.setdefault(node_id, []).append(edge)
+
+    def node(self, node_id):
+        return self._nodes.get(node_id)
+
+    def edge(self, edge_id):
+        return self._edges.get(edge_id)
+
+    @staticmethod
+    def other_end(edge, node_id):
+        """Node connected by the edge to node_id."""
+        return (
+            edge["data"]["target"]
+            if edge["data"]["source"] == node_id
+            else edge["data"]["source"]
+        )
+
+    def edges_between(self, node_id, other_id):
+        return [
+            edge
+            for edge in self._adjacent.get(node_id, [])
+            if self.other_end(edge, node_id) == other_id
+        ]
+
+    def links(self, node_id):
+        """Connected interfaces of the node.
+
+        Returns:
+            list: Tuples (interface, edge, id of the connected node)
+            in the order of interfaces.
+        """
+        node = self.node(node_id)
+        links = []
+
+        for interface in node.get("interface", []) if node else []:
+            edge = self.edge(interface.get("connect"))
+
+            if interface.get("connect") and edge:
+                links.append((interface, edge, self.other_end(edge, node_id)))
+
+        return links
+
+    def connects(self, node_id):
+        """Ids of edges connected to interfaces of the node."""
+        node = self.node(node_id)
+        interfaces = node.get("interface", []) if node else []
+
+        return {interface.get("connect") for interface in interfaces}
+
+    def networks(self, node_id):
+        """IP networks of interfaces of the node (computed once)."""
+        if node_id not in self._networks:
+            node = self.node(node_id)
+            networks = []
+
+            for interface in node.get("interface", []) if node else []:
+                ip = interface.get("ip")
+                mask = interface.get("netmask")
+
+                if not ip or not mask:
+                    continue
+
+                try:
+                    network = ipaddress.IPv4Network(f"{ip}/{mask}", strict=False)
+                except Exception:
+                    network = None
+
+                networks.append((ip, mask, network))
+
+            self._networks[node_id] = networks
+
+        return self._networks[node_id]
+
+
+def check_subnet_mask(topology, device, target, expected_mask):
     hints = []
-    host_node = next((node for node in nodes if node["data"]["id"] == device), None)
+    host_node = topology.node(device)
 
     if not host_node:
         hints.append(
@@ -20,10 +338,7 @@ def check_subnet_mask(answer, device, target, expected_mask):
         return False, hints
 
     target_edges = [
-        edge["data"]["id"]
-        for edge in edges
-        if (edge["data"]["source"] == device and edge["data"]["target"] == target)
-        or (edge["data"]["source"] == target and edge["data"]["target"] == device)
+        edge["data"]["id"] for edge in topology.edges_between(device, target)
     ]
 
     if not target_edges:
@@ -55,13 +370,11 @@ def check_subnet_mask(answer, device, target, expected_mask):
     return False, hints
 
 
-def check_vlan_id(answer, device, target, expected_equal):
-    nodes = answer["nodes"]
-    edges = answer["edges"]
+def check_vlan_id(topology, device, target, expected_equal):
     hints = []
 
-    device_node = next((node for node in nodes if node["data"]["id"] == device), None)
-    target_node = next((node for node in nodes if node["data"]["id"] == target), None)
+    device_node = topology.node(device)
+    target_node = topology.node(target)
 
     if not device_node or not target_node:
         if not device_node:
@@ -75,34 +388,16 @@ def check_vlan_id(answer, device, target, expected_equal):
 
         return False, hints
 
-    def find_connected_switch(node):
-        for iface in node.get("interface", []):
-            edge_id = iface.get("connect")
-            if not edge_id:
-                continue
-
-            connected_edge = next(
-                (edge for edge in edges if edge["data"]["id"] == edge_id), None
-            )
-            if not connected_edge:
-                continue
-
-            connected_node_id = (
-                connected_edge["data"]["target"]
-                if connected_edge["data"]["source"] == node["data"]["id"]
-                else connected_edge["data"]["source"]
-            )
-
-            connected_node = next(
-                (n for n in nodes if n["data"]["id"] == connected_node_id), None
-            )
+    def find_connected_switch(node_id):
+        for _, _, connected_node_id in topology.links(node_id):
+            connected_node = topology.node(connected_node_id)
             if connected_node and connected_node["config"]["type"] == "l2_switch":
                 return connected_node
 
         return None
 
-    device_switch = find_connected_switch(device_node)
-    target_switch = find_connected_switch(target_node)
+    device_switch = find_connected_switch(device)
+    target_switch = find_connected_switch(target)
 
     if not device_switch or not target_switch:
         if not device_switch:
@@ -117,13 +412,9 @@ def check_vlan_id(answer, device, target, expected_equal):
 
     def get_vlans_on_switch(switch, node_id):
         vlans = set()
+        node_connects = topology.connects(node_id)
         for iface in switch.get("interface", []):
-            if iface.get("connect") and iface["connect"] in [
-                iface.get("connect")
-                for iface in next(
-                    (n["interface"] for n in nodes if n["data"]["id"] == node_id), []
-                )
-            ]:
+            if iface.get("connect") and iface["connect"] in node_connects:
                 vlan = iface.get("vlan")
                 if isinstance(vlan, list):
                     vlans.update(vlan)
@@ -156,60 +447,22 @@ def is_private_ip(ip):
     return ipaddress.ip_address(ip).is_private
 
 
-def check_different_paths(answer, source_device, target_device):
+def check_different_paths(index, source_device, target_device):
     hints = []
-    packets = answer.get("packets", [])
 
-    if not packets:
+    if not index.packets:
         return False, ["Вы не отправляете пакетов по сети."]
 
-    request_path = []
-    reply_path = []
-    request_edges = []
-    reply_edges = []
-
-    def is_request(pkt_type):
-        return (
-            "ICMP echo-request" in pkt_type
-            or ("UDP" in pkt_type and "> 4789" in pkt_type)
-            or "GRE tunnel" in pkt_type
-            or "IPIP tunnel" in pkt_type
-        )
-
-    def is_reply(pkt_type):
-        return (
-            "ICMP echo-reply" in pkt_type
-            or ("UDP" in pkt_type and "> 4789" in pkt_type)
-            or "GRE tunnel" in pkt_type
-            or "IPIP tunnel" in pkt_type
-        )
-
-    for packet in packets:
-        config = packet[0].get("config", {})
-        pkt_type = config.get("type", "")
-        src = config.get("source")
-        tgt = config.get("target")
-        edge_id = config.get("path")
-
-        if is_request(pkt_type):
-            if not request_path:
-                if src == source_device:
-                    request_path = [src, tgt]
-                    request_edges = [edge_id]
-            else:
-                if src == request_path[-1]:
-                    request_path.append(tgt)
-                    request_edges.append(edge_id)
+    request_path, request_edges, _ = index.follow(
+        (ECHO_REQUEST, *TUNNELS), source_device
+    )
+    reply_path, reply_edges, _ = index.follow((ECHO_REPLY, *TUNNELS), target_device)
 
-        if is_reply(pkt_type):
-            if not reply_path:
-                if src == target_device:
-                    reply_path = [src, tgt]
-                    reply_edges = [edge_id]
-            else:
-                if src == reply_path[-1]:
-                    reply_path.append(tgt)
-                    reply_edges.append(edge_id)
+    # Packet from the device wasn't found
+    if not request_edges:
+        request_path = []
+    if not reply_edges:
+        reply_path = []
 
     if not request_path:
         hints.append(
@@ -248,21 +501,13 @@ def check_different_paths(answer, source_device, target_device):
     return True, []
 
 
-def check_path(answer, device, target, required_path):
+def check_path(index, device, target, required_path):
     hints = []
-    packets = answer["packets"]
+    icmp_hops = index.hops_of((ICMP,))
 
-    actual_path = []
-    actual_path.append(device)
+    actual_path = [device] + [target for _, target, _ in icmp_hops]
 
-    is_icmp = False
-
-    for packet in packets:
-        packet_type = packet[0]["config"]["type"]
-
-        if "ICMP" in packet_type:
-            actual_path.append(packet[0]["config"]["target"])
-            is_icmp = True
+    is_icmp = bool(icmp_hops)
 
     if not is_icmp:
         hints.append("Вы не отправляете ICMP пакетов по сети.")
@@ -297,39 +542,16 @@ def check_path(answer, device, target, required_path):
 
 
 def check_tunnel_echo_request(
-    answer, source_device, target_device, tunnel_start, tunnel_end
+    index, source_device, target_device, tunnel_start, tunnel_end
 ):
-    packets = answer.get("packets", [])
     hints = []
 
-    if not packets:
+    if not index.packets:
         return False, ["Вы не отправляете запросов по сети."]
 
-    def extract_packet_info(pkt):
-        cfg = pkt[0]["config"]
-        return cfg["type"], cfg["source"], cfg["target"]
-
     def trace_path(start, end, is_request=True):
-        path = [start]
-        reached = False
-        current = start
-
-        expected_type = "ICMP echo-request" if is_request else "ICMP echo-reply"
-        for pkt in packets:
-            ptype, src, dst = extract_packet_info(pkt)
-            if src != current:
-                continue
-
-            if (
-                expected_type in ptype
-                or "IPIP tunnel" in ptype
-                or "GRE tunnel" in ptype
-            ):
-                path.append(dst)
-                current = dst
-                if current == end:
-                    reached = True
-                    break
+        echo = ECHO_REQUEST if is_request else ECHO_REPLY
+        path, _, reached = index.follow((echo, *IP_TUNNELS), start, end)
 
         return path, reached
 
@@ -344,21 +566,16 @@ def check_tunnel_echo_request(
 
         for _ in range(max_hops):
             found = False
-            for pkt in packets:
-                ptype, src, dst = extract_packet_info(pkt)
-                if src == current and dst not in visited:
-                    if "IPIP tunnel" in ptype:
-                        if tunnel_type_used and tunnel_type_used != "IPIP tunnel":
-                            return False, None
-                        tunnel_type_used = "IPIP tunnel"
-                    elif "GRE tunnel" in ptype:
-                        if tunnel_type_used and tunnel_type_used != "GRE tunnel":
-                            return False, None
-                        tunnel_type_used = "GRE tunnel"
-                    else:
-                        continue
-
-                    visited.add(src)
+            for position in index.flow(IP_TUNNELS)[1].get(current, []):
+                _, dst, _ = index.hops[position]
+                if dst not in visited:
+                    tunnel = next(c for c in index.classes[position] if c in IP_TUNNELS)
+
+                    if tunnel_type_used and tunnel_type_used != tunnel:
+                        return False, None
+                    tunnel_type_used = tunnel
+
+                    visited.add(current)
                     current = dst
                     found = True
                     if current == tunnel_dst:
@@ -410,35 +627,16 @@ def check_tunnel_echo_request(
 
 
 def check_vxlan_echo_request(
-    answer, source_device, target_device, tunnel_start, tunnel_end
+    index, source_device, target_device, tunnel_start, tunnel_end
 ):
-    packets = answer.get("packets", [])
     hints = []
 
-    if not packets:
+    if not index.packets:
         return False, ["Вы не отправляете запросов по сети."]
 
-    def extract_packet_info(pkt):
-        cfg = pkt[0]["config"]
-        return cfg["type"], cfg["source"], cfg["target"]
-
     def trace_path(start, end, is_request=True):
-        path = [start]
-        reached = False
-        current = start
-
-        expected_type = "ICMP echo-request" if is_request else "ICMP echo-reply"
-        for pkt in packets:
-            ptype, src, dst = extract_packet_info(pkt)
-            if src != current:
-                continue
-
-            if expected_type in ptype or ("UDP" in ptype and "> 4789 in ptype"):
-                path.append(dst)
-                current = dst
-                if current == end:
-                    reached = True
-                    break
+        echo = ECHO_REQUEST if is_request else ECHO_REPLY
+        path, _, reached = index.follow((echo, "vxlan"), start, end)
 
         return path, reached
 
@@ -453,17 +651,15 @@ def check_vxlan_echo_request(
 
         for _ in range(max_hops):
             found = False
-            for pkt in packets:
-                ptype, src, dst = extract_packet_info(pkt)
-                if src == current and dst not in visited:
-                    if "UDP" in ptype and "> 4789" in ptype:
-                        vxlan_used = True
-                        visited.add(src)
-                        current = dst
-                        found = True
-                        if current == tunnel_dst:
-                            return True, vxlan_used
-                        break
+            for _, dst, _ in index.hops_from(("vxlan",), current):
+                if dst not in visited:
+                    vxlan_used = True
+                    visited.add(current)
+                    current = dst
+                    found = True
+                    if current == tunnel_dst:
+                        return True, vxlan_used
+                    break
             if not found:
                 break
         return False, vxlan_used
@@ -507,35 +703,13 @@ def check_vxlan_echo_request(
     return False, hints
 
 
-def check_echo_request(answer, source_device, target_device, direction="two-way"):
+def check_echo_request(index, source_device, target_device, direction="two-way"):
     hints = []
-    packets = answer.get("packets", [])
 
-    if not packets:
+    if not index.packets:
         return False, ["Вы не отправляете пакетов по сети."]
 
-    request_path = []
-    reply_path = []
-
-    for packet in packets:
-        config = packet[0]["config"]
-        packet_type = config["type"]
-        source = config["source"]
-        target = config["target"]
-
-        if "ICMP echo-request" in packet_type:
-            if source == source_device and (
-                not request_path or request_path[-1] != target_device
-            ):
-                request_path = [source]
-                reply_path = []
-            if source == request_path[-1] if request_path else False:
-                request_path.append(target)
-        elif "ICMP echo-reply" in packet_type:
-            if not reply_path and source == target_device:
-                reply_path = [source]
-            if reply_path and source == reply_path[-1]:
-                reply_path.append(target)
+    request_path, reply_path = index.echo_paths(source_device, target_device)
 
     if direction == "one-way":
         valid = (
@@ -574,36 +748,13 @@ def check_echo_request(answer, source_device, target_device, direction="two-way"
     return False, hints
 
 
-def check_no_echo_request(answer, source_device, target_device):
+def check_no_echo_request(index, source_device, target_device):
     hints = []
-    packets = answer.get("packets", [])
 
-    if not packets:
+    if not index.packets:
         return True, []
 
-    def has_request_reached():
-        current = source_device
-        for packet in packets:
-            cfg = packet[0].get("config", {})
-            ptype = cfg.get("type")
-            src = cfg.get("source")
-            dst = cfg.get("target")
-
-            is_icmp = "ICMP echo-request" in ptype
-            is_ipip = "IPIP tunnel" in ptype
-            is_gre = "GRE tunnel" in ptype
-            is_vxlan = "UDP" in ptype and "> 4789" in ptype
-
-            if src == source_device and current != source_device:
-                current = source_device
-
-            if src == current and (is_icmp or is_ipip or is_gre or is_vxlan):
-                current = dst
-                if current == target_device:
-                    return True
-        return False
-
-    if has_request_reached():
+    if index.reaches((ECHO_REQUEST, *TUNNELS), source_device, target_device):
         hints.append(
             f"Обнаружен ping от {source_device} к {target_device} (включая туннели), хотя он не должен был проходить"
         )
@@ -612,7 +763,7 @@ def check_no_echo_request(answer, source_device, target_device):
         return True, []
 
 
-def process_host_command(cmd, answer, device):
+def process_host_command(cmd, index, device):
     points_for_host = 0
     hints = []
 
@@ -620,7 +771,7 @@ def process_host_command(cmd, answer, device):
         if command == "echo-request":
             points = cmd.get("points", 1)
             check_result, echo_hints = check_echo_request(
-                answer, device, target, cmd.get("direction", "two-way")
+                index, device, target, cmd.get("direction", "two-way")
             )
 
             if check_result:
@@ -634,7 +785,7 @@ def process_host_command(cmd, answer, device):
                 path_points = path.get("points", 1)
 
                 path_result, path_hints = check_path(
-                    answer, device, target, required_path
+                    index, device, target, required_path
                 )
 
                 if path_result:
@@ -644,7 +795,7 @@ def process_host_command(cmd, answer, device):
 
             different_paths_points = cmd.get("different_paths")
             if different_paths_points and check_result:
-                path_result, path_hints = check_different_paths(answer, device, target)
+                path_result, path_hints = check_different_paths(index, device, target)
                 if path_result:
                     points_for_host += different_paths_points.get("points", 1)
                 else:
@@ -652,7 +803,7 @@ def process_host_command(cmd, answer, device):
 
         elif command == "no-echo-request":
             points = cmd.get("points", 1)
-            check_result, no_echo_hints = check_no_echo_request(answer, device, target)
+            check_result, no_echo_hints = check_no_echo_request(index, device, target)
 
             if check_result:
                 points_for_host += points
@@ -665,7 +816,7 @@ def process_host_command(cmd, answer, device):
             tunnel_end = cmd.get("tunnel_end")
 
             result, tunnel_hints = check_tunnel_echo_request(
-                answer, device, target, tunnel_start, tunnel_end
+                index, device, target, tunnel_start, tunnel_end
             )
 
             if result:
@@ -675,7 +826,7 @@ def process_host_command(cmd, answer, device):
 
             different_paths_points = cmd.get("different_paths")
             if different_paths_points and result:
-                path_result, path_hints = check_different_paths(answer, device, target)
+                path_result, path_hints = check_different_paths(index, device, target)
                 if path_result:
                     points_for_host += different_paths_points.get("points", 1)
                 else:
@@ -687,7 +838,7 @@ def process_host_command(cmd, answer, device):
             tunnel_end = cmd.get("tunnel_end")
 
             result, vxlan_hints = check_vxlan_echo_request(
-                answer, device, target, tunnel_start, tunnel_end
+                index, device, target, tunnel_start, tunnel_end
             )
 
             if result:
@@ -697,7 +848,7 @@ def process_host_command(cmd, answer, device):
 
             different_paths_points = cmd.get("different_paths")
             if different_paths_points and result:
-                path_result, path_hints = check_different_paths(answer, device, target)
+                path_result, path_hints = check_different_paths(index, device, target)
                 if path_result:
                     points_for_host += different_paths_points.get("points", 1)
                 else:
@@ -1,11 +1,10 @@
-import ipaddress
 import logging
 
 import quiz.service.check_host_service as chs
 from quiz.service.check_network_service import check_network_configuration
 
 
-def check_in_one_network_with(requirement, answer, device):
+def check_in_one_network_with(requirement, topology, device):
     points = 0
     hints = []
 
@@ -16,30 +15,24 @@ def check_in_one_network_with(requirement, answer, device):
         hints.append("Целевое устройство не указано.")
         return points, hints
 
-    nodes = answer.get("nodes", [])
-    host_node = next((n for n in nodes if n["data"]["id"] == device), None)
-    target_node = next((n for n in nodes if n["data"]["id"] == target_id), None)
+    host_node = topology.node(device)
+    target_node = topology.node(target_id)
 
     if not host_node or not target_node:
         hints.append(f"Не удалось найти одно из устройств: {device}, {target_id}.")
         return points, hints
 
-    def get_networks(node):
+    def get_networks(node_id):
         networks = set()
-        for interface in node.get("interface", []):
-            ip = interface.get("ip")
-            mask = interface.get("netmask")
-
-            if ip and mask:
-                try:
-                    cidr = ipaddress.IPv4Network(f"{ip}/{mask}", strict=False)
-                    networks.add(cidr)
-                except Exception:
-                    hints.append(f"Некорректный IP или маска: {ip}/{mask}")
+        for ip, mask, cidr in topology.networks(node_id):
+            if cidr is None:
+                hints.append(f"Некорректный IP или маска: {ip}/{mask}")
+            else:
+                networks.add(cidr)
         return networks
 
-    host_networks = get_networks(host_node)
-    target_networks = get_networks(target_node)
+    host_networks = get_networks(device)
+    target_networks = get_networks(target_id)
 
     if not host_networks or not target_networks:
         hints.append("Не удалось определить IP-сети одного из устройств.")
@@ -55,25 +48,20 @@ def check_in_one_network_with(requirement, answer, device):
     return points, hints
 
 
-def check_abstract_ip_equal(abstract_equal, answer, device):
+def check_abstract_ip_equal(abstract_equal, topology, device):
     points = 0
     hints = []
 
     if not abstract_equal:
         return points, hints
 
-    nodes = answer["nodes"]
-    edges = answer["edges"]
-
     to_node_id = abstract_equal.get("to")
     expected_equal_with = abstract_equal.get("expected_equal_with")
     points_awarded = abstract_equal.get("points", 1)
 
-    device_node = next((n for n in nodes if n["data"]["id"] == device), None)
-    to_node = next((n for n in nodes if n["data"]["id"] == to_node_id), None)
-    compare_node = next(
-        (n for n in nodes if n["data"]["id"] == expected_equal_with), None
-    )
+    device_node = topology.node(device)
+    to_node = topology.node(to_node_id)
+    compare_node = topology.node(expected_equal_with)
 
     if not device_node or not to_node or not compare_node:
         hints.append(
@@ -82,20 +70,9 @@ def check_abstract_ip_equal(abstract_equal, answer, device):
         return points, hints
 
     device_ips_to_to_node = set()
-    for intf in device_node.get("interface", []):
-        edge_id = intf.get("connect")
+    for intf, _, connected in topology.links(device):
         ip = intf.get("ip")
-        if not edge_id or not ip:
-            continue
-        edge = next((e for e in edges if e["data"]["id"] == edge_id), None)
-        if not edge:
-            continue
-        connected = (
-            edge["data"]["target"]
-            if edge["data"]["source"] == device
-            else edge["data"]["source"]
-        )
-        if connected == to_node_id:
+        if ip and connected == to_node_id:
             device_ips_to_to_node.add(ip)
 
     if not device_ips_to_to_node:
@@ -122,13 +99,12 @@ def check_abstract_ip_equal(abstract_equal, answer, device):
     return points, hints
 
 
-def check_host(requirement, answer, device):
+def check_host(requirement, index, topology, device):
     points_for_host = 0
     points = 0
     hints = []
 
-    nodes = answer["nodes"]
-    host_node = next((node for node in nodes if node["data"]["id"] == device), None)
+    host_node = topology.node(device)
 
     if not host_node:
         hints.append(f"Устройство {device} не найдено в сети.")
@@ -137,7 +113,7 @@ def check_host(requirement, answer, device):
     # Checking commands (ping in particular)
     cmd = requirement.get("cmd")
     if cmd:
-        points_for_cmd, cmd_hints = chs.process_host_command(cmd, answer, device)
+        points_for_cmd, cmd_hints = chs.process_host_command(cmd, index, device)
         points_for_host += points_for_cmd
         hints.extend(cmd_hints)
 
@@ -151,7 +127,7 @@ def check_host(requirement, answer, device):
 
         for target in targets:
             result, equal_vlan_hints = chs.check_vlan_id(
-                answer, device, target, expected_equal=True
+                topology, device, target, expected_equal=True
             )
             if not result:
                 all_vlan_conditions_passed = False
@@ -171,7 +147,7 @@ def check_host(requirement, answer, device):
 
         for target in targets:
             result, no_equal_vlan_hints = chs.check_vlan_id(
-                answer, device, target, expected_equal=False
+                topology, device, target, expected_equal=False
             )
             if not result:
                 all_vlan_conditions_passed = False
@@ -186,9 +162,7 @@ def check_host(requirement, answer, device):
         points = ip_check.get("points", 1)
         target_node_id = ip_check.get("to")
 
-        target_node = next(
-            (node for node in nodes if node["data"]["id"] == target_node_id), None
-        )
+        target_node = topology.node(target_node_id)
 
         if not target_node:
             hints.append(
@@ -204,10 +178,7 @@ def check_host(requirement, answer, device):
                 )
                 continue
 
-            connected_edge = next(
-                (edge for edge in answer["edges"] if edge["data"]["id"] == edge_id),
-                None,
-            )
+            connected_edge = topology.edge(edge_id)
 
             if not connected_edge:
                 hints.append(
@@ -215,11 +186,7 @@ def check_host(requirement, answer, device):
                 )
                 continue
 
-            connected_node_id = (
-                connected_edge["data"]["target"]
-                if connected_edge["data"]["source"] == device
-                else connected_edge["data"]["source"]
-            )
+            connected_node_id = topology.other_end(connected_edge, device)
 
             if connected_node_id == target_node_id:
                 source_ip = interface.get("ip")
@@ -256,7 +223,7 @@ def check_host(requirement, answer, device):
         expected_mask = mask_check.get("subnet_mask")
 
         result, mask_hints = chs.check_subnet_mask(
-            answer, device, target, expected_mask
+            topology, device, target, expected_mask
         )
 
         if result:
@@ -280,19 +247,12 @@ def check_host(requirement, answer, device):
             if not edge_id:
                 continue
 
-            connected_edge = next(
-                (edge for edge in answer["edges"] if edge["data"]["id"] == edge_id),
-                None,
-            )
+            connected_edge = topology.edge(edge_id)
 
             if not connected_edge:
                 continue
 
-            connected_node_id = (
-                connected_edge["data"]["target"]
-                if connected_edge["data"]["source"] == device
-                else connected_edge["data"]["source"]
-            )
+            connected_node_id = topology.other_end(connected_edge, device)
 
             if connected_node_id == target_node_id:
                 actual_ip = interface.get("ip")
@@ -313,14 +273,16 @@ def check_host(requirement, answer, device):
     # abstract_ip_equal
     abstract_equal = requirement.get("abstract_ip_equal")
     if abstract_equal:
-        points, abstract_hints = check_abstract_ip_equal(abstract_equal, answer, device)
+        points, abstract_hints = check_abstract_ip_equal(
+            abstract_equal, topology, device
+        )
         points_for_host += points
         hints.extend(abstract_hints)
 
     # Check if two hosts are in the same network
     in_one_network_with = requirement.get("in_one_network_with")
     if in_one_network_with:
-        p, net_hints = check_in_one_network_with(in_one_network_with, answer, device)
+        p, net_hints = check_in_one_network_with(in_one_network_with, topology, device)
         points_for_host += p
         hints.extend(net_hints)
 
@@ -333,6 +295,10 @@ def check_task(requirements, answer):
 
     logging.info(f"requirements: {requirements}")
 
+    # Answer is indexed once for all requirements
+    index = chs.AnswerIndex(answer.get("packets"))
+    topology = chs.TopologyIndex(answer.get("nodes", []), answer.get("edges", []))
+
     for requirement in requirements:
         for device, requirements in requirement.items():
             if (
@@ -340,7 +306,7 @@ def check_task(requirements, answer):
                 or device.startswith("server")
                 or device.startswith("router")
             ):
-                points, device_hints = check_host(requirements, answer, device)
+                points, device_hints = check_host(requirements, index, topology, device)
                 total_points += points
                 hints.extend(device_hints)
             elif device.startswith("network"):
@@ -1,9 +1,10 @@
 import json
 import uuid
 from copy import deepcopy
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 from celery_app import app
+from simulation_cache import network_hash
 
 
 def create_check_task(network: dict, requirements: list[dict], session_question_id):
@@ -75,8 +76,9 @@ def get_configured_tasks(schema: Dict[str, Any], scenarios: List[Dict]) -> List[
         modifications = scenario.get("modifications", [])
 
         # Every scenario generates new schema and requirements,
-        # we need it in additional checks
-        scenario_schema = deepcopy(schema)
+        # we need it in additional checks.
+        # Modifications replace edges and jobs lists, nodes are shared
+        scenario_schema = dict(schema)
         scenario_requirements = deepcopy(scenario.get("requirements", {}))
 
         applied_modifications = []
@@ -203,7 +205,8 @@ def get_configured_tasks(schema: Dict[str, Any], scenarios: List[Dict]) -> List[
                     continue
 
                 # Add ping job
-                scenario_schema.setdefault("jobs", []).append(
+                scenario_schema["jobs"] = [
+                    *scenario_schema.get("jobs", []),
                     {
                         "id": uuid.uuid4().hex,
                         "job_id": 1,
@@ -211,8 +214,8 @@ def get_configured_tasks(schema: Dict[str, Any], scenarios: List[Dict]) -> List[
                         "arg_1": to_host_ip,
                         "level": -1,
                         "host_id": from_host_name,
-                    }
-                )
+                    },
+                ]
 
             else:
                 raise ValueError(
@@ -224,6 +227,23 @@ def get_configured_tasks(schema: Dict[str, Any], scenarios: List[Dict]) -> List[
     return results
 
 
+def shared_emulations(schemas: Iterable[Dict[str, Any]]) -> List[int]:
+    """Find scenarios which networks are the same.
+
+    Scenarios without modifications (or with the same ones) differ
+    only in requirements, their network is emulated once.
+
+    Returns:
+        List[int]: For every scenario index of the first scenario with the same network.
+    """
+    first: Dict[str, int] = {}
+
+    return [
+        first.setdefault(network_hash(schema), index)
+        for index, schema in enumerate(schemas)
+    ]
+
+
 def clean_schema(user_schema: Dict[str, Any]) -> Dict[str, Any]:
     """Remove unnecessary jobs from the user's network schema."""
     if not isinstance(user_schema, dict):
@@ -1,6 +1,7 @@
 import json
 import logging
 from datetime import datetime
+from typing import Any
 from zoneinfo import ZoneInfo
 
 from markupsafe import Markup
@@ -14,6 +15,7 @@ from quiz.util.dto import (
     QuestionDto,
     calculate_max_score,
 )
+from simulation_cache import network_hash
 
 MOSCOW_TZ = ZoneInfo("Europe/Moscow")
 
@@ -368,7 +370,12 @@ def answer_on_session_question(session_question_id: str, answer, user: User):
             for net, req, mods in prepared_task
         ]
 
-        networks_to_check = []
+        from tasks import send_emulation_task, wait_emulation_task
+
+        # Send all scenarios first, so they are emulated in parallel.
+        # Scenarios with the same network share one emulation
+        emulations = []
+        sent: dict[str, Any] = {}
         for network_json, req_json, modifications_json in prepared_task_json:
             try:
                 network_json = (
@@ -385,9 +392,34 @@ def answer_on_session_question(session_question_id: str, answer, user: User):
                     else modifications_json
                 )
 
-                from tasks import create_emulation_task
+                key = network_hash(network_json)
+
+                if key not in sent:
+                    sent[key] = (
+                        send_emulation_task(network_json)
+                        if network_json.get("jobs")
+                        else None
+                    )
+
+                emulations.append((network_json, key, req_json, modifications_json))
+
+            except Exception as e:
+                logging.error(f"Ошибка при создании задачи: {e}.")
+
+        networks_to_check = []
+        animations: dict[str, Any] = {}
+        for network_json, key, req_json, modifications_json in emulations:
+            try:
+                if key not in animations:
+                    # Failed emulation is waited for only once (None)
+                    animations[key] = None
+                    animations[key] = wait_emulation_task(sent[key], network_json)
+
+                animation = animations[key]
+
+                if animation is None:
+                    continue
 
-                animation = create_emulation_task(network_json)
                 networks_to_check.append(
                     (network_json, animation, req_json, modifications_json)
                 )
@@ -0,0 +1,268 @@
+"""Content-addressed cache of emulation results.
+
+Emulation result depends only on nodes, edges and jobs of the network,
+so identical networks (copied examples, unchanged re-runs) can reuse
+the animation and pcaps of the previous run instead of going to back-end workers.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any
+
+import pcap_store
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = os.getenv("EMULATION_CACHE_DIR", "static/emulation_cache")
+CACHE_MAX_BYTES = int(os.getenv("EMULATION_CACHE_MAX_MB", "512")) * 1024 * 1024
+CACHE_ENABLED = os.getenv("EMULATION_CACHE_ENABLED", "1") == "1"
+
+PENDING_DIR = os.path.join(CACHE_DIR, "pending")
+# Pending tasks without result after this time (in seconds) are lost
+PENDING_TTL = 24 * 3600
+PACKETS_FILE = "packets.json"
+# Size of the entry in bytes, recorded when it's stored
+SIZE_FILE = "size"
+PCAPS_DIR = "pcaps"
+
+# Fields that are used only by the editor and don't change emulation result
+IGNORED_NODE_FIELDS = ("position", "classes")
+IGNORED_EDGE_FIELDS = ("position", "classes")
+IGNORED_JOB_FIELDS = ("id",)
+
+# Netem applies these randomly, so every run of such edge gives its own result
+RANDOM_EDGE_FIELDS = ("loss_percentage", "duplicate_percentage")
+
+
+def _strip(item: Any, ignored: tuple[str, ...]) -> Any:
+    if not isinstance(item, dict):
+        return item
+
+    return {k: v for k, v in item.items() if k not in ignored}
+
+
+def network_hash(network: dict | str) -> str:
+    """Canonical hash of the emulation-relevant part of the network.
+
+    Args:
+        network (dict | str): Network schema (or its JSON).
+
+    Returns:
+        str: Hex digest. Networks with the same nodes, edges and jobs
+        have the same hash regardless of positions, zoom and pan.
+    """
+    jnet = json.loads(network) if isinstance(network, str) else network
+
+    canonical = {
+        "nodes": [_strip(n, IGNORED_NODE_FIELDS) for n in jnet.get("nodes", [])],
+        "edges": [_strip(e, IGNORED_EDGE_FIELDS) for e in jnet.get("edges", [])],
+        # Jobs order matters (jobs with equal priority run one by one)
+        "jobs": [_strip(j, IGNORED_JOB_FIELDS) for j in jnet.get("jobs", [])],
+    }
+
+    data = json.dumps(
+        canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(network: dict | str) -> bool:
+    """Check that emulation result of the network is reproducible.
+
+    Networks with lossy or duplicating edges give a different result
+    on every run, so the result of one run mustn't be replayed.
+    """
+    jnet = json.loads(network) if isinstance(network, str) else network
+
+    for edge in jnet.get("edges", []):
+        data = edge.get("data", {})
+
+        if any(float(data.get(field) or 0) > 0 for field in RANDOM_EDGE_FIELDS):
+            return False
+
+    return True
+
+
+def _entry_dir(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def get(key: str, pcap_dir: str) -> str | None:
+    """Look up cached result and restore its pcaps.
+
+    Args:
+        key (str): Network hash.
+        pcap_dir (str): Directory where pcaps of the network should be placed.
+
+    Returns:
+        str | None: Animation JSON or None if there is no such result.
+    """
+    if not CACHE_ENABLED:
+        return None
+
+    entry = _entry_dir(key)
+
+    # Referenced pcaps could be removed from the blob store
+    if not pcap_store.blobs_available(os.path.join(entry, PCAPS_DIR)):
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    try:
+        with open(os.path.join(entry, PACKETS_FILE), "r") as file:
+            packets = file.read()
+
+        if os.path.exists(pcap_dir):
+            shutil.rmtree(pcap_dir)
+
+        shutil.copytree(os.path.join(entry, PCAPS_DIR), pcap_dir)
+    except OSError:
+        # Entry is missing or was evicted while we were reading it
+        return None
+
+    # Mark entry as recently used
+    now = time.time()
+    os.utime(entry, (now, now))
+
+    return packets
+
+
+def put(key: str, packets: str, pcap_dir: str) -> None:
+    """Store emulation result and evict old entries if cache is too big.
+
+    Args:
+        key (str): Network hash.
+        packets (str): Animation JSON.
+        pcap_dir (str): Directory with pcaps of the emulated network.
+    """
+    if not CACHE_ENABLED:
+        return
+
+    entry = _entry_dir(key)
+    tmp_entry = os.path.join(CACHE_DIR, "tmp_" + uuid.uuid4().hex)
+
+    try:
+        os.makedirs(tmp_entry)
+        with open(os.path.join(tmp_entry, PACKETS_FILE), "w") as file:
+            file.write(packets)
+
+        if os.path.exists(pcap_dir):
+            shutil.copytree(pcap_dir, os.path.join(tmp_entry, PCAPS_DIR))
+        else:
+            os.makedirs(os.path.join(tmp_entry, PCAPS_DIR))
+
+        with open(os.path.join(tmp_entry, SIZE_FILE), "w") as file:
+            file.write(str(_dir_size(tmp_entry)))
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        os.rename(tmp_entry, entry)
+    except OSError as e:
+        print("Can't store emulation result in cache:", e)
+    finally:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    evict()
+
+
+def _dir_size(path: str) -> int:
+    size = 0
+
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                size += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                continue
+
+    return size
+
+
+def _entry_size(entry: str) -> int:
+    try:
+        with open(os.path.join(entry, SIZE_FILE), "r") as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        # Entry was stored before sizes were recorded
+        return _dir_size(entry)
+
+
+def evict(max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Remove least recently used entries until cache fits into max_bytes.
+
+    Pending files of lost emulation tasks are removed too.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    _evict_pending()
+
+    entries = []
+
+    for prefix in os.listdir(CACHE_DIR):
+        prefix_dir = os.path.join(CACHE_DIR, prefix)
+
+        if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+            continue
+
+        for key in os.listdir(prefix_dir):
+            entry = os.path.join(prefix_dir, key)
+            try:
+                entries.append((os.path.getmtime(entry), _entry_size(entry), entry))
+            except OSError:
+                continue
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def _evict_pending() -> None:
+    if not os.path.isdir(PENDING_DIR):
+        return
+
+    expired = time.time() - PENDING_TTL
+
+    for task_guid in os.listdir(PENDING_DIR):
+        path = os.path.join(PENDING_DIR, task_guid)
+
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+        except OSError:
+            continue
+
+
+def add_pending(task_guid: str, key: str) -> None:
+    """Remember which network hash the emulation task belongs to."""
+    if not CACHE_ENABLED:
+        return
+
+    os.makedirs(PENDING_DIR, exist_ok=True)
+
+    with open(os.path.join(PENDING_DIR, task_guid), "w") as file:
+        file.write(key)
+
+
+def pop_pending(task_guid: str) -> str | None:
+    """Get (and forget) network hash of the finished emulation task."""
+    path = os.path.join(PENDING_DIR, task_guid)
+
+    try:
+        with open(path, "r") as file:
+            key = file.read().strip()
+        os.remove(path)
+    except OSError:
+        return None
+
+    return key or None
@@ -406,4 +406,47 @@ var PacketPlayer = (function () {
             return instance || (instance = createInstance());
         }
     }
-})();
\ No newline at end of file
+})();
+
+// Convert animation into list of frames with packet objects.
+// Back-end may send it in compact format (version 2, see encode_animation in back/src/pkt_parser.py):
+// strings table, links table and column-wise packets. Old format (list of frames) is returned as is.
+var DecodeAnimation = function (animation) {
+
+    if (!animation || Array.isArray(animation) || animation.v !== 2) {
+        return animation;
+    }
+
+    const strings = animation.strings;
+    const frames = [];
+    let pkt = 0;
+    let timestamp = 0;
+
+    animation.frames.forEach(function (size) {
+        const frame = [];
+
+        for (let i = 0; i < size; i++, pkt++) {
+            const link = animation.links[animation.link[pkt]];
+            const label = strings[animation.labels[pkt]];
+
+            timestamp += animation.ts[pkt];
+
+            frame.push({
+                'data': {'id': 'pkt_' + pkt.toString(36).toUpperCase(), 'label': label, 'type': 'packet'},
+                'config': {
+                    'type': label,
+                    'path': strings[link[0]],
+                    'source': strings[link[1]],
+                    'target': strings[link[2]],
+                    'loss_percentage': link[3],
+                    'duplicate_percentage': link[4],
+                },
+                'timestamp': timestamp.toString(),
+            });
+        }
+
+        frames.push(frame);
+    });
+
+    return frames;
+}
@@ -1747,7 +1747,7 @@ const CheckSimulation = function (simulation_id)
             // Simulation is ended up and we can grab the packets
             if (xhr.status === 200)
             {
-                packets = JSON.parse(data.packets);
+                packets = DecodeAnimation(JSON.parse(data.packets));
                 pcaps = data.pcaps;
 
                 // Set filters
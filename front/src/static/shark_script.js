@@ -1,35 +1,148 @@
-let pcap_data = data;
-let tds = document.querySelectorAll('tbody tr');
+// Packets are loaded page by page (see mimishark_packets in miminet_shark.py),
+// pcap_data keeps loaded packets by their number in the capture.
+let pcap_data = {};
 let input = document.querySelector('#bytes');
 let rows = document.querySelector('#rows');
 let ascii = document.querySelector('#ascii');
 let decode = document.querySelector('#decode');
-if (tds.length > 0){
-	tds[0].classList.toggle('selected');
-	tds[0].classList.add('no-hover');
+let packet_list = document.querySelector('#height_changer');
+let packet_list_box = document.querySelector('#tab').parentElement;
+let filter_protocol = document.querySelector('#filter_protocol');
+let filter_address = document.querySelector('#filter_address');
+
+let packets_loaded = 0;
+let packets_total = null;
+let packets_loading = false;
+// Incremented when filters change, responses of old requests are ignored
+let packets_request = 0;
+let filter_timer = null;
+
+function clear_packet_info() {
+    input.replaceChildren();
+    rows.replaceChildren();
+    ascii.replaceChildren();
+    decode.replaceChildren();
+}
+
+function select_packet_row(row) {
+    packet_list.querySelectorAll('tr').forEach(function (el) {
+        el.classList.remove('selected');
+        el.classList.remove('no-hover');
+    });
+    clear_packet_info();
 
-    // Creating div elements for byte assignments
-	createByteDivs(pcap_data[0].bytes, pcap_data[0]);
+    row.classList.add('no-hover');
+    row.classList.toggle('selected');
+
+    const pkt = pcap_data[row.id];
+    createByteDivs(pkt.bytes, pkt);
     AddHoverInfoAttribute();
 }
-tds.forEach(function (item) {
-    item.onclick = function () {
-        tds.forEach(function (el) {
-            el.classList.remove('selected');
-            el.classList.remove('no-hover');
-            input.replaceChildren();
-            rows.replaceChildren();
-            ascii.replaceChildren();
-            decode.replaceChildren();
-        });
-        this.classList.add('no-hover');
-        this.classList.toggle('selected');
 
-        createByteDivs(pcap_data[this.id - 1].bytes, pcap_data[this.id - 1]);
-        AddHoverInfoAttribute();
+function add_packet_row(pkt) {
+    pcap_data[pkt.number] = pkt;
+
+    const tr = document.createElement('tr');
+    tr.id = pkt.number;
+
+    const th = document.createElement('th');
+    th.scope = 'row';
+    th.textContent = pkt.number;
+    tr.appendChild(th);
+
+    [pkt.time, pkt.source, pkt.destination, pkt.protocol, pkt.length].forEach(function (value) {
+        const td = document.createElement('td');
+        td.textContent = value;
+        tr.appendChild(td);
+    });
+
+    tr.onclick = function () {
+        select_packet_row(this);
     };
+
+    packet_list.appendChild(tr);
+}
+
+function all_packets_loaded() {
+    return packets_total !== null && packets_loaded >= packets_total;
+}
+
+function load_packets() {
+    if (packets_loading || all_packets_loaded()) {
+        return;
+    }
+
+    packets_loading = true;
+    const request_id = packets_request;
+    const params = new URLSearchParams({
+        guid: mimishark_guid,
+        iface: mimishark_iface,
+        offset: packets_loaded,
+        limit: mimishark_page_size,
+        protocol: filter_protocol.value,
+        address: filter_address.value,
+    });
+
+    fetch(mimishark_packets_url + '?' + params)
+        .then(response => response.json())
+        .then(function (data) {
+            if (request_id !== packets_request) {
+                return;
+            }
+
+            const first_page = packets_loaded === 0;
+
+            packets_total = data.total;
+            data.packets.forEach(add_packet_row);
+            packets_loaded += data.packets.length;
+
+            if (first_page && data.packets.length > 0) {
+                select_packet_row(packet_list.querySelector('tr'));
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        })
+        .finally(function () {
+            if (request_id !== packets_request) {
+                return;
+            }
+
+            packets_loading = false;
+
+            // Page doesn't fill the list, so there will be no scroll event
+            if (packet_list_box.scrollHeight <= packet_list_box.clientHeight) {
+                load_packets();
+            }
+        });
+}
+
+function reload_packets() {
+    packets_request++;
+    packets_loading = false;
+    packets_loaded = 0;
+    packets_total = null;
+    pcap_data = {};
+    packet_list.replaceChildren();
+    clear_packet_info();
+    load_packets();
+}
+
+packet_list_box.addEventListener('scroll', function () {
+    if (this.scrollTop + this.clientHeight >= this.scrollHeight - 100) {
+        load_packets();
+    }
 });
 
+[filter_protocol, filter_address].forEach(function (el) {
+    el.addEventListener('input', function () {
+        clearTimeout(filter_timer);
+        filter_timer = setTimeout(reload_packets, 300);
+    });
+});
+
+load_packets();
+
 function make_pa(text, count) {
     const decode_p = document.createElement('p');
     const decode_a = document.createElement('a');
@@ -0,0 +1,311 @@
+"""State of the task checks which scenarios are emulated in parallel.
+
+Every scenario of the task is sent to back-end workers at once
+(see tasks.perform_task_check), results come to tasks.save_check_result
+and are stored here until the last one arrives. Then the check is finished
+exactly once: by the result of the last scenario or by the timeout.
+
+Students of a group often submit the same network at the end of the exam.
+Network is emulated once for all of them (single-flight): scenarios attach to
+the emulation of the same network which is in flight (or finished recently)
+and get its result, requirements of every scenario are checked separately.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHECK_DIR = os.getenv("TASK_CHECK_DIR", "task_checks")
+# Scenarios without result after this time are skipped (as failed emulations)
+CHECK_TIMEOUT = int(os.getenv("TASK_CHECK_TIMEOUT", "120"))
+# Results of emulations finished less than this time (in seconds) ago are reused
+RECENT_TTL = int(os.getenv("TASK_CHECK_RECENT_TTL", "300"))
+
+STATE_FILE = "check.json"
+FINISHED_DIR = "finished"
+
+# Scenarios waiting for emulation of the network: inflight/<network hash>/<task id>
+INFLIGHT_DIR = os.path.join(CHECK_DIR, "inflight")
+# Results of recent emulations: recent/<network hash>
+RECENT_DIR = os.path.join(CHECK_DIR, "recent")
+# Created by the scenario which sends the emulation
+SENDER_FILE = "sender"
+
+
+def _check_dir(check_id: str) -> str:
+    return os.path.join(CHECK_DIR, check_id)
+
+
+def _result_file(check_id: str, index: int) -> str:
+    return os.path.join(_check_dir(check_id), f"{index}.json")
+
+
+def _write(path: str, data: str) -> None:
+    # Readers never see partially written file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    with open(tmp_path, "w") as file:
+        file.write(data)
+
+    os.rename(tmp_path, path)
+
+
+def scenario_task_id(check_id: str, index: int) -> str:
+    """Id of the scenario of the check."""
+    return f"{check_id}.{index}"
+
+
+def new_check(
+    session_question_id, guid, scenarios: list[tuple], emulations: list[int]
+) -> str:
+    """Remember the check before its emulations are sent.
+
+    Args:
+        session_question_id: Id of the task in the db (None for checks without session).
+        guid: Network guid of the check without session.
+        scenarios (List[Tuple]): List of tuples (network, requirements, modifications).
+        emulations (List[int]): For every scenario index of the scenario
+            which emulation result it shares (see shared_emulations).
+
+    Returns:
+        str: Check id.
+    """
+    check_id = uuid.uuid4().hex
+    os.makedirs(_check_dir(check_id))
+
+    state = {
+        "session_question_id": session_question_id,
+        "guid": guid,
+        "scenarios": scenarios,
+        "emulations": emulations,
+    }
+    _write(os.path.join(_check_dir(check_id), STATE_FILE), json.dumps(state))
+
+    return check_id
+
+
+def put_result(task_id: str, animation: str) -> str | None:
+    """Store emulation result of the scenario.
+
+    Returns:
+        str | None: Check id if results of all its scenarios are stored.
+    """
+    check_id, _, index = task_id.rpartition(".")
+
+    # Not a scenario of the check or the check is already finished
+    if not check_id or not index.isdigit() or not os.path.isdir(_check_dir(check_id)):
+        return None
+
+    try:
+        _write(_result_file(check_id, int(index)), animation)
+    except OSError:
+        # Finished by timeout while we were writing
+        return None
+
+    return check_id if is_complete(check_id) else None
+
+
+def is_complete(check_id: str) -> bool:
+    """Check if results of all scenarios of the check are stored."""
+    try:
+        with open(os.path.join(_check_dir(check_id), STATE_FILE), "r") as file:
+            emulations = json.load(file)["emulations"]
+    except OSError:
+        return False
+
+    return all(os.path.exists(_result_file(check_id, i)) for i in set(emulations))
+
+
+def claim(check_id: str) -> tuple | None:
+    """Take the check for finishing and forget it.
+
+    Returns:
+        tuple | None: Tuple (session_question_id, guid, networks_to_check)
+        or None if the check is already taken.
+        networks_to_check are tuples (network, animation, requirements, modifications)
+        of scenarios which have results.
+    """
+    check_dir = _check_dir(check_id)
+
+    # mkdir is atomic, only one worker takes the check
+    try:
+        os.mkdir(os.path.join(check_dir, FINISHED_DIR))
+    except OSError:
+        return None
+
+    try:
+        with open(os.path.join(check_dir, STATE_FILE), "r") as file:
+            state = json.load(file)
+
+        networks_to_check = []
+
+        for index, (network, requirements, modifications) in enumerate(
+            state["scenarios"]
+        ):
+            try:
+                emulation = state["emulations"][index]
+
+                with open(_result_file(check_id, emulation), "r") as file:
+                    animation = file.read()
+            except OSError:
+                logging.error(
+                    f"Check task failed!\nNetwork Schema: {json.dumps(network)}."
+                )
+                continue
+
+            networks_to_check.append((network, animation, requirements, modifications))
+    finally:
+        shutil.rmtree(check_dir, ignore_errors=True)
+
+    return state["session_question_id"], state["guid"], networks_to_check
+
+
+def network_task_id(key: str) -> str:
+    """Id of the emulation task of the network."""
+    return f"{key}.{uuid.uuid4().hex}"
+
+
+def _is_expired(path: str, ttl: int) -> bool:
+    try:
+        return os.path.getmtime(path) < time.time() - ttl
+    except OSError:
+        return False
+
+
+def _recent_result(key: str) -> str | None:
+    path = os.path.join(RECENT_DIR, key)
+
+    if _is_expired(path, RECENT_TTL):
+        return None
+
+    try:
+        with open(path, "r") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _remove(path: str) -> None:
+    # Rename first, so nobody adds files to the directory being removed
+    removed = os.path.join(CHECK_DIR, "removed_" + uuid.uuid4().hex)
+
+    try:
+        os.rename(path, removed)
+    except OSError:
+        return
+
+    shutil.rmtree(removed, ignore_errors=True)
+
+
+def attach(task_id: str, key: str) -> bool:
+    """Attach the scenario to the emulation of its network.
+
+    If the network was emulated recently, the result is stored at once,
+    otherwise the scenario waits for the emulation in flight.
+
+    Args:
+        task_id (str): Id of the scenario (see scenario_task_id).
+        key (str): Network hash (see simulation_cache.network_hash).
+
+    Returns:
+        bool: True if nobody emulates the network and the caller should
+        send the emulation (with network_task_id).
+    """
+    os.makedirs(INFLIGHT_DIR, exist_ok=True)
+    inflight = os.path.join(INFLIGHT_DIR, key)
+
+    while True:
+        animation = _recent_result(key)
+
+        if animation is not None:
+            put_result(task_id, animation)
+            return False
+
+        try:
+            os.mkdir(inflight)
+            sender = True
+        except FileExistsError:
+            sender = False
+
+            # Emulation is lost (worker was restarted), send it again
+            if _is_expired(os.path.join(inflight, SENDER_FILE), CHECK_TIMEOUT):
+                _remove(inflight)
+                continue
+
+        try:
+            open(os.path.join(inflight, task_id), "w").close()
+
+            if sender:
+                open(os.path.join(inflight, SENDER_FILE), "w").close()
+        except FileNotFoundError:
+            # Emulation has just finished, its result may be recent now
+            continue
+
+        return sender
+
+
+def put_network_result(task_id: str, animation: str) -> list[str]:
+    """Store emulation result of the network for all scenarios waiting for it.
+
+    Args:
+        task_id (str): Id of the emulation task (see network_task_id).
+        animation (str): Animation JSON.
+
+    Returns:
+        List[str]: Ids of checks which have results of all scenarios now.
+    """
+    key, _, _ = task_id.partition(".")
+
+    # Empty animation may be the result of failed emulation, don't reuse it
+    if animation != json.dumps("[]"):
+        os.makedirs(RECENT_DIR, exist_ok=True)
+        _write(os.path.join(RECENT_DIR, key), animation)
+
+    taken = os.path.join(CHECK_DIR, "taken_" + uuid.uuid4().hex)
+
+    # New scenarios can't attach after this, they find recent result instead
+    try:
+        os.rename(os.path.join(INFLIGHT_DIR, key), taken)
+    except OSError:
+        return []
+
+    checks = []
+
+    for name in os.listdir(taken):
+        if name == SENDER_FILE:
+            continue
+
+        check_id = put_result(name, animation)
+
+        if check_id:
+            checks.append(check_id)
+
+    shutil.rmtree(taken, ignore_errors=True)
+    _evict()
+
+    return checks
+
+
+def _evict() -> None:
+    """Remove expired results and lost emulations."""
+    for key in os.listdir(RECENT_DIR) if os.path.isdir(RECENT_DIR) else []:
+        path = os.path.join(RECENT_DIR, key)
+
+        if _is_expired(path, RECENT_TTL):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+    for key in os.listdir(INFLIGHT_DIR) if os.path.isdir(INFLIGHT_DIR) else []:
+        path = os.path.join(INFLIGHT_DIR, key)
+
+        if _is_expired(os.path.join(path, SENDER_FILE), CHECK_TIMEOUT):
+            _remove(path)
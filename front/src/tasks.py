@@ -4,21 +4,28 @@ import os
 import shutil
 import uuid
 
+import pcap_store
+import simulation_cache
+import task_checks
 from app import app as flask_app
 from celery.exceptions import TimeoutError
 from celery.result import AsyncResult, allow_join_result
 from celery_app import EXCHANGE_TYPE, SEND_NETWORK_EXCHANGE, app
 from miminet_model import Network, Simulate, SimulateLog, db
+from quiz.service.network_upload_service import shared_emulations
 from quiz.service.session_question_service import (
     answer_on_exam_question,
     answer_on_exam_without_session,
 )
+from sqlalchemy import not_
 from sqlalchemy.orm.exc import StaleDataError
 
 
 @app.task(bind=True, queue="common-results-queue")
 def save_simulate_result(self, animation, pcaps):
     task_guid = self.request.id
+    # Forget the task before any early return, pending files aren't left behind
+    network_key = simulation_cache.pop_pending(task_guid)
 
     with flask_app.app_context():
         sim = Simulate.query.filter(Simulate.task_guid == task_guid).first()
@@ -48,102 +55,175 @@ def save_simulate_result(self, animation, pcaps):
 
         for pcap in pcaps:
             name = pcap[1]
+
+            # Pcap is in the blob store, it'll be downloaded when needed
+            if pcap_store.is_ref(pcap[0]):
+                pcap_store.write_ref(pcap_dir, name, pcap[0])
+                continue
+
             with open(pcap_dir + "/" + name + ".pcap", "wb") as file:
                 file.write(pcap[0])
 
+        # Timings of emulation phases (older workers don't send them)
+        timings = (self.request.headers or {}).get("timings")
+
         try:
             sim.packets = animation
             sim.ready = True
+
+            if timings is not None:
+                simlog.filter(not_(SimulateLog.ready)).update(
+                    {"timings": json.dumps(timings)}, synchronize_session=False
+                )
+
             simlog.update({"ready": 1})
 
             db.session.commit()
         except StaleDataError:
             return
 
+        # Empty animation may be the result of failed emulation, don't cache it
+        if network_key and animation and animation != "[]":
+            simulation_cache.put(network_key, animation, pcap_dir)
+
+
+def _load_json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
 
 @app.task(name="tasks.check_task_network", queue="task-checking-queue")
 def perform_task_check(session_question_id, data_list):
-    """Celery task for checking practice tasks. Write results to database.
+    """Celery task for checking practice tasks.
+
+    Scenarios are emulated in parallel, the task doesn't wait for them.
+    Scenarios attach to emulations of the same network sent by other checks
+    (see task_checks.attach). Results are checked and written to database
+    by save_check_result when the last emulation finishes
+    (or by finish_task_check on timeout).
 
     Args:
         session_question_id: Id of the current task in the db
         data_list (List[Tuple]): List of tuples (network schema, requirements).
     """
 
-    networks_to_check = []
+    scenarios = []
+    guid = None
 
-    if session_question_id is None:
-        for network_json, req_json, modifications_json, guid in data_list:
-            try:
-                network_json = (
-                    json.loads(network_json)
-                    if isinstance(network_json, str)
-                    else network_json
-                )
-                req_json = (
-                    json.loads(req_json) if isinstance(req_json, str) else req_json
-                )
-                modifications_json = (
-                    json.loads(modifications_json)
-                    if isinstance(modifications_json, str)
-                    else modifications_json
+    for scenario in data_list:
+        try:
+            if session_question_id is None:
+                network_json, req_json, modifications_json, guid = scenario
+            else:
+                network_json, req_json, modifications_json = scenario
+
+            scenarios.append(
+                (
+                    _load_json(network_json),
+                    _load_json(req_json),
+                    _load_json(modifications_json),
                 )
+            )
 
-                animation = create_emulation_task(network_json)
-                networks_to_check.append(
-                    (network_json, animation, req_json, modifications_json)
-                )
+        except Exception as e:
+            logging.error(f"Ошибка при создании задачи: {e}.")
 
-            except Exception as e:
-                logging.error(f"Ошибка при создании задачи: {e}.")
+    # Scenarios with the same network share one emulation
+    emulations = shared_emulations(network for network, _, _ in scenarios)
+    check_id = task_checks.new_check(session_question_id, guid, scenarios, emulations)
 
-        answer_on_exam_without_session(networks_to_check, guid)
+    for index, (network, _, _) in enumerate(scenarios):
+        if emulations[index] != index:
+            continue
 
+        task_id = task_checks.scenario_task_id(check_id, index)
+
+        # Nothing to emulate
+        if not network.get("jobs"):
+            task_checks.put_result(task_id, "[]")
+            continue
+
+        key = simulation_cache.network_hash(network)
+
+        if task_checks.attach(task_id, key):
+            send_emulation_task(
+                network,
+                task_id=task_checks.network_task_id(key),
+                network_task_name="tasks.save_check_result",
+            )
+
+    if task_checks.is_complete(check_id):
+        finish_check(check_id)
     else:
-        for network_json, req_json, modifications_json in data_list:
-            try:
-                network_json = (
-                    json.loads(network_json)
-                    if isinstance(network_json, str)
-                    else network_json
-                )
-                req_json = (
-                    json.loads(req_json) if isinstance(req_json, str) else req_json
-                )
-                modifications_json = (
-                    json.loads(modifications_json)
-                    if isinstance(modifications_json, str)
-                    else modifications_json
-                )
+        finish_task_check.apply_async((check_id,), countdown=task_checks.CHECK_TIMEOUT)
+
+
+@app.task(bind=True, queue="common-results-queue")
+def save_check_result(self, animation, pcaps):
+    """Store emulation result of the network, check tasks which got all results."""
+    for check_id in task_checks.put_network_result(
+        self.request.id, json.dumps(animation)
+    ):
+        finish_check(check_id)
 
-                animation = create_emulation_task(network_json)
-                networks_to_check.append(
-                    (network_json, animation, req_json, modifications_json)
-                )
 
-            except Exception as e:
-                logging.error(f"Ошибка при создании задачи: {e}.")
+@app.task(queue="task-checking-queue")
+def finish_task_check(check_id):
+    """Check the task with results received before the timeout."""
+    finish_check(check_id)
 
+
+def finish_check(check_id):
+    claimed = task_checks.claim(check_id)
+
+    # Already checked
+    if claimed is None:
+        return
+
+    session_question_id, guid, networks_to_check = claimed
+
+    if session_question_id is None:
+        answer_on_exam_without_session(networks_to_check, guid)
+    else:
         with flask_app.app_context():
             answer_on_exam_question(session_question_id, networks_to_check)
 
 
-def create_emulation_task(net_schema):
-    if not net_schema.get("jobs"):
-        return []
+def send_emulation_task(net_schema, task_id=None, network_task_name=None):
+    """Send network to task check emulation (pcaps are not returned).
+
+    Args:
+        net_schema: Network schema (or its JSON).
+        task_id: Id of the emulation task.
+        network_task_name: Task which receives the result (see save_simulate_result).
 
+    Returns:
+        AsyncResult: Result of the emulation.
+    """
     net_schema = (
         json.dumps(net_schema) if not isinstance(net_schema, str) else net_schema
     )
+    # Checks use only the animation, worker doesn't upload pcaps for them
+    headers = {"return_pcaps": 0}
+
+    if network_task_name:
+        headers["network_task_name"] = network_task_name
 
-    async_obj = app.send_task(
+    return app.send_task(
         "tasks.mininet_worker",
         [net_schema],
         routing_key=str(uuid.uuid4()),
         exchange=SEND_NETWORK_EXCHANGE,
         exchange_type=EXCHANGE_TYPE,
+        task_id=task_id,
+        headers=headers,
     )
 
+
+def wait_emulation_task(async_obj, net_schema):
+    """Wait for the animation of the emulation (not in Celery tasks)."""
+    if async_obj is None:
+        return []
+
     async_res = AsyncResult(id=async_obj.id, app=app)
 
     try:
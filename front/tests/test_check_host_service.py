@@ -0,0 +1,385 @@
+import copy
+import json
+import os
+
+import pytest
+
+# Assumes sys.path is updated in conftest.py to include src
+import quiz.service.check_host_service as chs
+from quiz.service.check_practice_service import check_task
+
+# Emulation results of the back-end tests
+TEST_JSON_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../back/tests/test_json")
+)
+
+REQUEST = "ICMP echo-request\n10.0.0.1 > 10.0.1.1"
+REPLY = "ICMP echo-reply\n10.0.1.1 > 10.0.0.1"
+GRE = "GRE tunnel\n1.1.1.1 > 1.1.1.2"
+
+
+def load_json(name):
+    with open(os.path.join(TEST_JSON_DIR, name), "r") as file:
+        return json.load(file)
+
+
+def index(name):
+    return chs.AnswerIndex(load_json(f"{name}_answer.json"))
+
+
+def frame(source, target, label, meta=None):
+    """Animation frame with a single packet.
+
+    Packets without meta are as in animations of older workers.
+    """
+    edge = "edge_" + "_".join(sorted((source, target)))
+    packet = {
+        "data": {"label": label},
+        "config": {"type": label, "path": edge, "source": source, "target": target},
+    }
+
+    if meta is not None:
+        packet["meta"] = meta
+
+    return [packet]
+
+
+# Metadata as made by back/src/dissectors.py
+def icmp_meta(icmp_type, src, dst):
+    return {
+        "proto": "icmp",
+        "icmp_type": icmp_type,
+        "icmp_code": 0,
+        "src": src,
+        "dst": dst,
+    }
+
+
+REQUEST_META = icmp_meta(8, "10.0.0.1", "10.0.1.1")
+REPLY_META = icmp_meta(0, "10.0.1.1", "10.0.0.1")
+
+
+def tunnel_meta(tunnel, src, dst, inner_src, inner_dst):
+    return {
+        "proto": tunnel,
+        "tunnel": tunnel,
+        "src": src,
+        "dst": dst,
+        "inner_src": inner_src,
+        "inner_dst": inner_dst,
+    }
+
+
+def vxlan_meta(src, dst, inner_src, inner_dst):
+    return {
+        "proto": "udp",
+        "sport": 40000,
+        "dport": 4789,
+        "tunnel": "vxlan",
+        "vni": 42,
+        "src": src,
+        "dst": dst,
+        "inner_src": inner_src,
+        "inner_dst": inner_dst,
+    }
+
+
+def tunnel_packets(request_tunnel, reply_tunnel, label):
+    """Ping through a tunnel between router_1 and router_2 with metadata."""
+    return [
+        frame("host_1", "router_1", REQUEST, REQUEST_META),
+        frame("router_1", "router_2", label, request_tunnel),
+        frame("router_2", "host_2", REQUEST, REQUEST_META),
+        frame("host_2", "router_2", REPLY, REPLY_META),
+        frame("router_2", "router_1", label, reply_tunnel),
+        frame("router_1", "host_1", REPLY, REPLY_META),
+    ]
+
+
+GRE_META = tunnel_meta("gre", "1.1.1.1", "1.1.1.2", "10.0.0.1", "10.0.1.1")
+GRE_REPLY_META = tunnel_meta("gre", "1.1.1.2", "1.1.1.1", "10.0.1.1", "10.0.0.1")
+IPIP_META = tunnel_meta("ipip", "1.1.1.1", "1.1.1.2", "10.0.0.1", "10.0.1.1")
+IPIP_REPLY_META = tunnel_meta("ipip", "1.1.1.2", "1.1.1.1", "10.0.1.1", "10.0.0.1")
+VXLAN_META = vxlan_meta("1.1.1.1", "1.1.1.2", "10.0.0.1", "10.0.1.1")
+VXLAN_REPLY_META = vxlan_meta("1.1.1.2", "1.1.1.1", "10.0.1.1", "10.0.0.1")
+VXLAN = "UDP 40000 > 4789\n1.1.1.1 > 1.1.1.2"
+
+
+# Ping through GRE tunnel between router_1 and router_2
+GRE_PACKETS = [
+    frame("host_1", "router_1", REQUEST),
+    frame("router_1", "router_2", GRE),
+    frame("router_2", "host_2", REQUEST),
+    frame("host_2", "router_2", REPLY),
+    frame("router_2", "router_1", GRE),
+    frame("router_1", "host_1", REPLY),
+]
+
+# Reply returns through router_3
+ASYMMETRIC_PACKETS = [
+    frame("host_1", "router_1", REQUEST),
+    frame("router_1", "router_2", REQUEST),
+    frame("router_2", "host_2", REQUEST),
+    frame("host_2", "router_2", REPLY),
+    frame("router_2", "router_3", REPLY),
+    frame("router_3", "router_1", REPLY),
+    frame("router_1", "host_1", REPLY),
+]
+
+
+class TestPacketMeta:
+    def test_meta(self):
+        packet = frame("host_1", "router_1", REQUEST, REQUEST_META)[0]
+
+        assert chs.packet_meta(packet) is REQUEST_META
+
+    def test_label(self):
+        packet = frame("host_1", "router_1", REQUEST)[0]
+
+        assert chs.packet_meta(packet) == {"proto": "icmp", "icmp_type": 8}
+
+    def test_meta_over_label(self):
+        # Meta of a packet that isn't recognized from its label
+        packet = frame("router_1", "router_2", "IP 1.1.1.1 > 1.1.1.2", GRE_META)[0]
+
+        assert chs.packet_classes(chs.packet_meta(packet)) == {"gre"}
+
+
+class TestEchoRequest:
+    def test_two_way(self):
+        assert chs.check_echo_request(index("router"), "host_1", "host_2") == (
+            True,
+            [],
+        )
+
+    def test_reversed(self):
+        assert chs.check_echo_request(index("router"), "host_2", "host_1") == (
+            False,
+            [
+                "Запрос от host_2 к host_1 не обнаружен.",
+                "Ответ от host_1 не обнаружен.",
+            ],
+        )
+
+    def test_one_way(self):
+        result = chs.check_echo_request(
+            index("router"), "host_2", "host_1", direction="one-way"
+        )
+        assert result == (False, ["Запрос от host_2 к host_1 не обнаружен."])
+
+    def test_host_unreachable(self):
+        assert chs.check_echo_request(
+            index("icmp_host_unreachable"), "host_1", "host_2"
+        ) == (False, ["Запрос не достиг host_2.", "Ответ от host_2 не обнаружен."])
+
+    def test_no_packets(self):
+        assert chs.check_echo_request(chs.AnswerIndex([]), "host_1", "host_2") == (
+            False,
+            ["Вы не отправляете пакетов по сети."],
+        )
+
+    def test_meta(self):
+        packets = [
+            frame("host_1", "router_1", REQUEST, REQUEST_META),
+            frame("router_1", "host_2", REQUEST, REQUEST_META),
+            frame("host_2", "router_1", REPLY, REPLY_META),
+            frame("router_1", "host_1", REPLY, REPLY_META),
+        ]
+
+        assert chs.check_echo_request(chs.AnswerIndex(packets), "host_1", "host_2") == (
+            True,
+            [],
+        )
+
+    def test_meta_disagrees_with_label(self):
+        # Labels say echo requests, but replies go back
+        packets = [
+            frame("host_1", "router_1", REQUEST, REQUEST_META),
+            frame("router_1", "host_2", REQUEST, REQUEST_META),
+            frame("host_2", "router_1", REQUEST, REPLY_META),
+            frame("router_1", "host_1", REQUEST, REPLY_META),
+        ]
+        without_meta = [
+            [{k: v for k, v in f[0].items() if k != "meta"}] for f in packets
+        ]
+
+        assert chs.check_echo_request(chs.AnswerIndex(packets), "host_1", "host_2") == (
+            True,
+            [],
+        )
+        assert not chs.check_echo_request(
+            chs.AnswerIndex(without_meta), "host_1", "host_2"
+        )[0]
+
+    def test_no_echo_request(self):
+        assert chs.check_no_echo_request(index("router"), "host_2", "host_1") == (
+            True,
+            [],
+        )
+        assert chs.check_no_echo_request(index("link_down"), "host_1", "host_2") == (
+            True,
+            [],
+        )
+
+    def test_unexpected_echo_request(self):
+        result, hints = chs.check_no_echo_request(index("router"), "host_1", "host_2")
+
+        assert not result
+        assert len(hints) == 1
+
+
+class TestPath:
+    def test_required_path(self):
+        result = chs.check_path(
+            index("router"), "host_1", "host_2", ["l2sw1", "router_1", "l2sw2"]
+        )
+        assert result == (True, [])
+
+    def test_other_path(self):
+        result, hints = chs.check_path(
+            index("router"), "host_1", "host_2", ["router_1"]
+        )
+
+        assert not result
+        assert "['l2sw1', 'router_1', 'l2sw2']" in hints[0]
+
+    @pytest.mark.parametrize(
+        "name, source, target",
+        [("router", "host_1", "host_2"), ("rstp_four_switch", "host_1", "host_4")],
+    )
+    def test_same_paths(self, name, source, target):
+        result, hints = chs.check_different_paths(index(name), source, target)
+
+        assert not result
+        assert len(hints) == 1
+
+    def test_different_paths(self):
+        packets = chs.AnswerIndex(ASYMMETRIC_PACKETS)
+
+        assert chs.check_echo_request(packets, "host_1", "host_2") == (True, [])
+        assert chs.check_different_paths(packets, "host_1", "host_2") == (True, [])
+
+
+class TestTunnels:
+    def test_gre(self):
+        packets = chs.AnswerIndex(GRE_PACKETS)
+        result = chs.check_tunnel_echo_request(
+            packets, "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert result == (True, [])
+
+    @pytest.mark.parametrize(
+        "request_tunnel, reply_tunnel",
+        [(GRE_META, GRE_REPLY_META), (IPIP_META, IPIP_REPLY_META)],
+    )
+    def test_meta(self, request_tunnel, reply_tunnel):
+        packets = tunnel_packets(request_tunnel, reply_tunnel, GRE)
+        result = chs.check_tunnel_echo_request(
+            chs.AnswerIndex(packets), "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert result == (True, [])
+
+    def test_meta_disagrees_with_label(self):
+        # Labels say GRE both ways, but the reply goes through IPIP
+        packets = tunnel_packets(GRE_META, IPIP_REPLY_META, GRE)
+        result = chs.check_tunnel_echo_request(
+            chs.AnswerIndex(packets), "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert result == (False, ["Тип туннеля различается для запроса и ответа."])
+
+    def test_no_tunnel(self):
+        result, hints = chs.check_tunnel_echo_request(
+            index("router"), "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert not result
+        assert len(hints) == 2
+
+    @pytest.mark.parametrize(
+        "name, source, target, tunnel_start, tunnel_end",
+        [
+            ("vxlan_simple", "host_1", "host_3", "router_1", "router_3"),
+            ("vlan_with_vxlan", "host_2", "host_3", "router_1", "router_2"),
+        ],
+    )
+    def test_vxlan(self, name, source, target, tunnel_start, tunnel_end):
+        result = chs.check_vxlan_echo_request(
+            index(name), source, target, tunnel_start, tunnel_end
+        )
+
+        assert result == (True, [])
+
+    def test_vxlan_meta(self):
+        packets = tunnel_packets(VXLAN_META, VXLAN_REPLY_META, VXLAN)
+        result = chs.check_vxlan_echo_request(
+            chs.AnswerIndex(packets), "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert result == (True, [])
+
+    def test_vxlan_meta_disagrees_with_label(self):
+        # Datagrams to VXLAN port that aren't VXLAN frames
+        udp_meta = {k: v for k, v in VXLAN_META.items() if k in ("proto", "dport")}
+        packets = tunnel_packets(udp_meta, udp_meta, VXLAN)
+
+        result, hints = chs.check_vxlan_echo_request(
+            chs.AnswerIndex(packets), "host_1", "host_2", "router_1", "router_2"
+        )
+
+        assert not result
+        assert len(hints) == 4
+
+    def test_no_vxlan(self):
+        result, hints = chs.check_vxlan_echo_request(
+            index("router"), "host_1", "host_2", "router_1", "router_3"
+        )
+
+        assert not result
+        assert len(hints) == 2
+
+
+class TestCheckTask:
+    def test_points(self):
+        answer = load_json("router_network.json")
+        answer["packets"] = load_json("router_answer.json")
+        requirements = [
+            {
+                "host_1": {
+                    "cmd": {
+                        "echo-request": "host_2",
+                        "points": 2,
+                        "path": {
+                            "required_path": ["l2sw1", "router_1", "l2sw2"],
+                            "points": 3,
+                        },
+                    }
+                }
+            },
+            {"host_2": {"cmd": {"no-echo-request": "host_1"}}},
+        ]
+
+        assert check_task(requirements, answer) == (6, [])
+
+    def test_answer_is_not_modified(self):
+        answer = load_json("vxlan_simple_network.json")
+        answer["packets"] = load_json("vxlan_simple_answer.json")
+        expected = copy.deepcopy(answer)
+        requirements = [
+            {
+                "host_1": {
+                    "cmd": {
+                        "vxlan-echo-request": "host_3",
+                        "tunnel_start": "router_1",
+                        "tunnel_end": "router_3",
+                    },
+                    "mask_check": {"to": "router_1", "subnet_mask": 24},
+                }
+            }
+        ]
+
+        check_task(requirements, answer)
+
+        assert answer == expected
@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+# Assumes sys.path is updated in conftest.py to include src
+import simulation_cache
+
+
+def network(**edge_data):
+    return {
+        "nodes": [{"data": {"id": "host_1"}}, {"data": {"id": "host_2"}}],
+        "edges": [
+            {"data": {"id": "edge_1", "source": "host_1", "target": "host_2"}},
+            {
+                "data": {
+                    "id": "edge_2",
+                    "source": "host_2",
+                    "target": "host_1",
+                    **edge_data,
+                }
+            },
+        ],
+        "jobs": [{"id": "job_1", "job_id": 1, "host_id": "host_1", "arg_1": "1.1.1.1"}],
+    }
+
+
+class TestIsCacheable:
+    @pytest.mark.parametrize(
+        "edge_data",
+        [{}, {"loss_percentage": 0, "duplicate_percentage": 0}],
+    )
+    def test_reproducible(self, edge_data):
+        assert simulation_cache.is_cacheable(network(**edge_data))
+
+    @pytest.mark.parametrize(
+        "edge_data",
+        [
+            {"loss_percentage": 10, "duplicate_percentage": 0},
+            {"loss_percentage": 0, "duplicate_percentage": 5},
+            {"loss_percentage": "50"},
+        ],
+    )
+    def test_random(self, edge_data):
+        assert not simulation_cache.is_cacheable(network(**edge_data))
+
+    def test_network_json(self):
+        assert not simulation_cache.is_cacheable(json.dumps(network(loss_percentage=1)))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(simulation_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(simulation_cache, "PENDING_DIR", str(tmp_path / "pending"))
+    monkeypatch.setattr(simulation_cache, "CACHE_ENABLED", True)
+
+    return tmp_path
+
+
+def put(cache_dir, key, pcap_size):
+    pcap_dir = cache_dir / key
+    pcap_dir.mkdir()
+    (pcap_dir / "host_1_1_out.pcap").write_bytes(b"\x00" * pcap_size)
+
+    simulation_cache.put(key, "[]", str(pcap_dir))
+
+
+class TestEvict:
+    def test_recorded_sizes(self, cache_dir, monkeypatch):
+        put(cache_dir, "aa" + "0" * 62, 1000)
+        put(cache_dir, "bb" + "0" * 62, 1000)
+
+        # Stored entries aren't walked again
+        def walk(path):
+            raise AssertionError(f"{path} is walked")
+
+        monkeypatch.setattr(simulation_cache, "_dir_size", walk)
+        simulation_cache.evict(max_bytes=10_000)
+
+        assert sorted(p.name for p in (cache_dir / "cache").iterdir()) == ["aa", "bb"]
+
+    def test_least_recently_used(self, cache_dir):
+        old_key, new_key = "aa" + "0" * 62, "bb" + "0" * 62
+        put(cache_dir, old_key, 1000)
+        put(cache_dir, new_key, 1000)
+        os.utime(simulation_cache._entry_dir(old_key), (0, 0))
+
+        simulation_cache.evict(max_bytes=1500)
+
+        assert not os.path.exists(simulation_cache._entry_dir(old_key))
+        assert os.path.exists(simulation_cache._entry_dir(new_key))